@@ -0,0 +1,108 @@
+"""
+Admission control for the Gemini-backed stages of /api/chat and /api/generate-text.
+
+At most ADMISSION_MAX_CONCURRENT requests run against Gemini at once. Up to
+ADMISSION_MAX_QUEUE more wait for a slot for at most ADMISSION_MAX_WAIT
+seconds; anything beyond that is rejected immediately with Overloaded, which
+the endpoints turn into 503 + Retry-After. During a spike the service keeps
+answering the requests it admits instead of pushing every key into quota
+errors and timing out everyone.
+"""
+
+import os
+import math
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from backend import metrics
+from backend import tracing
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", 4))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", 16))
+ADMISSION_MAX_WAIT = float(os.getenv("ADMISSION_MAX_WAIT", 2.0))
+
+
+class Overloaded(Exception):
+    """No slot could be granted; retry_after is a hint in whole seconds"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Overloaded ({reason}), retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Concurrency limit with a bounded, time-limited wait queue."""
+
+    def __init__(self, max_concurrent: int = ADMISSION_MAX_CONCURRENT,
+                 max_queue: int = ADMISSION_MAX_QUEUE, max_wait: float = ADMISSION_MAX_WAIT):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.max_wait = max_wait
+        self.semaphore = asyncio.Semaphore(self.max_concurrent)
+        self.active = 0
+        self.waiting = 0
+        # Moving average of how long an admitted request holds its slot
+        self.avg_service_time = 1.0
+
+    def retry_after(self) -> int:
+        """Rough time until the queue ahead of a new request drains"""
+        backlog = self.waiting + self.active + 1
+        return max(1, math.ceil(self.avg_service_time * backlog / self.max_concurrent))
+
+    def _reject(self, reason: str):
+        retry_after = self.retry_after()
+        metrics.ADMISSION_REJECTIONS.inc(reason=reason)
+        logger.warning(f"Rejected request ({reason}): {self.active} active, {self.waiting} waiting")
+        raise Overloaded(reason, retry_after)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one of the concurrent slots for the with-block, or raise Overloaded"""
+        if not self.semaphore.locked():
+            # Free slot and nobody queued ahead: acquire() returns without suspending
+            await self.semaphore.acquire()
+            metrics.ADMISSION_WAIT.observe(0.0)
+        else:
+            if self.waiting >= self.max_queue:
+                self._reject("queue_full")
+            self.waiting += 1
+            start = time.perf_counter()
+            try:
+                with tracing.span("queue"):
+                    await asyncio.wait_for(self.semaphore.acquire(), timeout=self.max_wait)
+            except asyncio.TimeoutError:
+                self._reject("timeout")
+            finally:
+                self.waiting -= 1
+                metrics.ADMISSION_WAIT.observe(time.perf_counter() - start)
+
+        self.active += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self.semaphore.release()
+            self.avg_service_time = 0.8 * self.avg_service_time + 0.2 * (time.perf_counter() - start)
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "max_wait": self.max_wait,
+            "avg_service_time": round(self.avg_service_time, 3),
+        }
+
+
+# Singleton instance
+generation_admission = AdmissionController()
+
+metrics.ADMISSION_ACTIVE.set_function(lambda: generation_admission.active)
+metrics.ADMISSION_QUEUE_DEPTH.set_function(lambda: generation_admission.waiting)
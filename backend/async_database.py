@@ -0,0 +1,118 @@
+"""
+Async data-access layer with the same function surface as backend/database.py.
+
+Each call runs on a dedicated, bounded thread pool so a slow query or a held
+write lock never blocks the event loop. Reads and writes use separate pools:
+SQLite only allows one writer at a time anyway, and keeping writers on their
+own pool means reads never queue behind them. Bulk imports get a thread of
+their own, so a long import does not hold up chat logs and other writes; it
+only takes the write lock for one chunk at a time.
+"""
+
+import os
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from backend import database
+from backend import metrics
+
+DB_READ_THREADS = int(os.getenv("DB_READ_THREADS", 4))
+DB_WRITE_THREADS = int(os.getenv("DB_WRITE_THREADS", 1))
+
+_read_executor = ThreadPoolExecutor(max_workers=DB_READ_THREADS, thread_name_prefix="db-read")
+_write_executor = ThreadPoolExecutor(max_workers=DB_WRITE_THREADS, thread_name_prefix="db-write")
+_import_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-import")
+
+
+def _wrap(name: str, executor: ThreadPoolExecutor):
+    """Build an async version of database.<name> that runs on executor"""
+    func = getattr(database, name)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        loop = asyncio.get_running_loop()
+        # Resolve at call time so patched database functions are honoured
+        call = functools.partial(getattr(database, name), *args, **kwargs)
+        with metrics.DB_CALL_DURATION.time(function=name):
+            return await loop.run_in_executor(executor, call)
+
+    return wrapper
+
+
+def _reader(name: str):
+    return _wrap(name, _read_executor)
+
+
+def _writer(name: str):
+    return _wrap(name, _write_executor)
+
+
+async def run_read(func, *args, **kwargs):
+    """Run an arbitrary blocking read on the read pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_read_executor, functools.partial(func, *args, **kwargs))
+
+
+async def run_write(func, *args, **kwargs):
+    """Run an arbitrary blocking write on the write pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_write_executor, functools.partial(func, *args, **kwargs))
+
+
+async def run_import(func, *args, **kwargs):
+    """Run a multi-transaction bulk import on its own thread, beside the write pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_import_executor, functools.partial(func, *args, **kwargs))
+
+
+# ========== NEWS ==========
+get_all_news = _reader("get_all_news")
+get_news_page = _reader("get_news_page")
+get_news_by_id = _reader("get_news_by_id")
+get_news_by_ids = _reader("get_news_by_ids")
+add_news = _writer("add_news")
+update_news = _writer("update_news")
+delete_news = _writer("delete_news")
+bulk_insert_news = _writer("bulk_insert_news")
+
+# ========== TIPS ==========
+get_all_tips = _reader("get_all_tips")
+get_tips_page = _reader("get_tips_page")
+get_tip_by_id = _reader("get_tip_by_id")
+get_tips_by_ids = _reader("get_tips_by_ids")
+add_tip = _writer("add_tip")
+update_tip = _writer("update_tip")
+delete_tip = _writer("delete_tip")
+bulk_insert_tips = _writer("bulk_insert_tips")
+
+# ========== NEWS CATEGORIES ==========
+get_all_categories = _reader("get_all_categories")
+get_category_by_id = _reader("get_category_by_id")
+add_category = _writer("add_category")
+
+# ========== FULL-TEXT SEARCH ==========
+search_content = _reader("search_content")
+
+# ========== USERS ==========
+get_user_by_email = _reader("get_user_by_email")
+get_user_by_id = _reader("get_user_by_id")
+
+# ========== CHAT LOG ==========
+add_chat_log = _writer("add_chat_log")
+get_conversation_turns = _reader("get_conversation_turns")
+get_user_chat_logs = _reader("get_user_chat_logs")
+
+# ========== SEARCH HISTORY ==========
+add_search_history = _writer("add_search_history")
+get_user_search_history = _reader("get_user_search_history")
+add_log_batch = _writer("add_log_batch")
+
+# ========== FAVORITE NEWS ==========
+add_favorite_news = _writer("add_favorite_news")
+remove_favorite_news = _writer("remove_favorite_news")
+get_user_favorites = _reader("get_user_favorites")
+is_news_favorited = _reader("is_news_favorited")
+
+# ========== DATA VERSIONS ==========
+get_data_versions = _reader("get_data_versions")
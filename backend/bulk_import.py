@@ -0,0 +1,275 @@
+"""
+Bulk import of news and tips from JSONL or CSV files.
+
+Records are streamed from the file, validated, and inserted in chunks of
+BULK_CHUNK_SIZE rows, each chunk in a single executemany transaction. New
+documents are embedded into the RAG index in batches once all chunks are in,
+and the cache file is written once.
+
+Usage:
+    python backend/bulk_import.py news data/news.jsonl
+    python backend/bulk_import.py tips data/tips.csv --no-embed
+"""
+
+import os
+import io
+import csv
+import codecs
+import sys
+import json
+import time
+import logging
+import argparse
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional
+
+try:
+    from backend import database
+except ImportError:
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    from backend import database
+
+logger = logging.getLogger(__name__)
+
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", 1000))
+# Only the first errors are kept in the result; the rest are counted
+MAX_REPORTED_ERRORS = 50
+
+KINDS = ("news", "tips")
+FORMATS = ("jsonl", "csv")
+
+
+@dataclass
+class ImportResult:
+    kind: str
+    inserted: int = 0
+    skipped: int = 0
+    errors: List[str] = field(default_factory=list)
+    ids: List[int] = field(default_factory=list)
+    seconds: float = 0.0
+
+    def add_error(self, line: int, message: str):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"line {line}: {message}")
+
+    def summary(self) -> Dict:
+        return {
+            "kind": self.kind,
+            "inserted": self.inserted,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "seconds": round(self.seconds, 3),
+        }
+
+
+def detect_format(filename: Optional[str]) -> str:
+    """jsonl (default) or csv, from the file extension"""
+    if filename and filename.lower().endswith(".csv"):
+        return "csv"
+    return "jsonl"
+
+
+def _decode_lines(stream: BinaryIO, errors: List[tuple]) -> Iterator[str]:
+    """
+    Decode a binary stream line by line. An undecodable line is recorded in
+    errors and replaced by a blank line, so the lines after it still import.
+    """
+    for line_number, raw in enumerate(stream, start=1):
+        if line_number == 1:
+            raw = raw.removeprefix(codecs.BOM_UTF8)
+        try:
+            yield raw.decode("utf-8")
+        except UnicodeDecodeError as e:
+            errors.append((line_number, f"invalid UTF-8 at byte {e.start}"))
+            yield "\n"
+
+
+def _drain(errors: List[tuple]) -> Iterator[tuple]:
+    while errors:
+        yield errors.pop(0)
+
+
+def iter_records(stream, fmt: str) -> Iterator[tuple]:
+    """
+    Yield (line_number, record) from a JSONL or CSV stream (text, or binary UTF-8).
+    Bad JSON, CSV or UTF-8 yields an error string instead of a record.
+    """
+    decode_errors = []
+    if not isinstance(stream, io.TextIOBase):
+        stream = _decode_lines(stream, decode_errors)
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        while True:
+            try:
+                record = next(reader)
+            except StopIteration:
+                break
+            except csv.Error as e:
+                record = f"invalid CSV: {e}"
+            yield from _drain(decode_errors)
+            yield reader.line_num, record
+        yield from _drain(decode_errors)
+        return
+    for line_number, line in enumerate(stream, start=1):
+        yield from _drain(decode_errors)
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, f"invalid JSON: {e}"
+            continue
+        yield line_number, record
+    yield from _drain(decode_errors)
+
+
+def _text(record: Dict, key: str, max_length: Optional[int] = None, required: bool = False) -> Optional[str]:
+    value = record.get(key)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        if required:
+            raise ValueError(f"'{key}' is required")
+        return None
+    value = str(value).strip()
+    if max_length and len(value) > max_length:
+        raise ValueError(f"'{key}' is longer than {max_length} characters")
+    return value
+
+
+def _timestamp(record: Dict, key: str) -> Optional[str]:
+    value = _text(record, key)
+    if value is None:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"'{key}' is not an ISO date/time")
+    # Same format as CURRENT_TIMESTAMP so keyset ordering stays consistent
+    return parsed.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def validate_news(record: Dict, category_ids: set) -> Dict:
+    """Return a row for bulk_insert_news or raise ValueError"""
+    try:
+        category_id = int(record.get("category_id"))
+    except (TypeError, ValueError):
+        raise ValueError("'category_id' must be an integer")
+    if category_id not in category_ids:
+        raise ValueError(f"unknown category_id {category_id}")
+    return {
+        "title": _text(record, "title", 255, required=True),
+        "summary": _text(record, "summary", 500),
+        "content": _text(record, "content", required=True),
+        "category_id": category_id,
+        "image_url": _text(record, "image_url", 500),
+        "published_at": _timestamp(record, "published_at"),
+    }
+
+
+def validate_tip(record: Dict, category_ids: set = None) -> Dict:
+    """Return a row for bulk_insert_tips or raise ValueError"""
+    return {
+        "title": _text(record, "title", 255, required=True),
+        "content": _text(record, "content", required=True),
+        "difficulty": _text(record, "difficulty", 50),
+        "created_at": _timestamp(record, "created_at"),
+    }
+
+
+def import_records(kind: str, records: Iterable[tuple], chunk_size: Optional[int] = None,
+                   result: Optional[ImportResult] = None) -> ImportResult:
+    """
+    Validate and insert (line_number, record) pairs in chunked transactions.
+    Pass result to keep the ids of the committed chunks if a later chunk raises.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"kind must be one of: {', '.join(KINDS)}")
+    chunk_size = chunk_size or BULK_CHUNK_SIZE
+    validate = validate_news if kind == "news" else validate_tip
+    insert = database.bulk_insert_news if kind == "news" else database.bulk_insert_tips
+    category_ids = {c["id"] for c in database.get_all_categories()} if kind == "news" else set()
+
+    result = result or ImportResult(kind=kind)
+    start = time.perf_counter()
+    chunk = []
+    try:
+        for line_number, record in records:
+            if not isinstance(record, dict):
+                result.add_error(line_number, record if isinstance(record, str) else "expected an object")
+                continue
+            try:
+                chunk.append(validate(record, category_ids))
+            except ValueError as e:
+                result.add_error(line_number, str(e))
+                continue
+            if len(chunk) >= chunk_size:
+                result.ids.extend(insert(chunk))
+                chunk = []
+        if chunk:
+            result.ids.extend(insert(chunk))
+    finally:
+        result.inserted = len(result.ids)
+        result.seconds = time.perf_counter() - start
+    logger.info(f"Imported {result.inserted} {kind} ({result.skipped} skipped) in {result.seconds:.2f}s")
+    return result
+
+
+def import_file(kind: str, stream, fmt: Optional[str] = None, filename: Optional[str] = None,
+                chunk_size: Optional[int] = None, result: Optional[ImportResult] = None) -> ImportResult:
+    """Import from a text or binary (UTF-8) file object"""
+    fmt = fmt or detect_format(filename)
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+    return import_records(kind, iter_records(stream, fmt), chunk_size, result)
+
+
+def index_imported(kind: str, ids: List[int], chunk_size: int = 500) -> int:
+    """Embed imported rows into the RAG index in chunks, writing the cache once"""
+    from backend.rag_system import rag_system
+
+    fetch = database.get_news_by_ids if kind == "news" else database.get_tips_by_ids
+    added = 0
+    for i in range(0, len(ids), chunk_size):
+        items = fetch(ids[i:i + chunk_size])
+        if kind == "news":
+            added += rag_system.add_documents(news_items=items, save=False)
+        else:
+            added += rag_system.add_documents(tip_items=items, save=False)
+    if added:
+        rag_system.save_cache()
+    return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("kind", choices=KINDS)
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS, help="defaults to the file extension")
+    parser.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE)
+    parser.add_argument("--no-embed", action="store_true", help="skip adding the rows to the RAG index")
+    args = parser.parse_args()
+
+    with open(args.path, "rb") as f:
+        result = import_file(args.kind, f, fmt=args.format, filename=args.path, chunk_size=args.chunk_size)
+
+    print(f"✅ {result.inserted} kayıt eklendi, {result.skipped} kayıt atlandı ({result.seconds:.2f} sn)")
+    for error in result.errors:
+        print(f"   ⚠️  {error}")
+
+    if result.ids and not args.no_embed:
+        from backend.rag_system import rag_system
+        if not os.path.exists(rag_system.cache_file):
+            # The backend builds the full index (including these rows) on its next start
+            print("ℹ️  RAG önbelleği yok, indeks backend açılışında oluşturulacak")
+            return
+        rag_system.load_data()
+        start = time.perf_counter()
+        added = index_imported(args.kind, result.ids)
+        print(f"🔎 {added} doküman RAG indeksine eklendi ({time.perf_counter() - start:.2f} sn)")
+        print("ℹ️  Çalışan backend yeni indeksi yeniden başlatıldığında yükler")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Server-side chat sessions.
+
+Turns are persisted in chat_log (through db_writer) and the most recently used
+conversations are kept in an in-memory LRU, so clients only send the new message plus a
+conversation_id instead of the whole history. A conversation loaded from chat_log is
+completed with the turns db_writer has not flushed yet.
+"""
+
+import os
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from backend import async_database
+from backend import metrics
+from backend.db_writer import db_writer
+
+logger = logging.getLogger(__name__)
+
+# chat_log.user_id is NOT NULL; the app has no login yet
+ANONYMOUS_USER_ID = 0
+
+
+def merge_pending(turns: List[Dict], pending: List[Dict]) -> List[Dict]:
+    """Append the unflushed turns to those read from chat_log, skipping any already written"""
+    for overlap in range(min(len(turns), len(pending)), 0, -1):
+        if turns[-overlap:] == pending[:overlap]:
+            return turns + pending[overlap:]
+    return turns + pending
+
+
+class SessionStore:
+    """LRU of hot conversations backed by the chat_log table."""
+
+    def __init__(self, max_sessions: Optional[int] = None, max_turns: Optional[int] = None):
+        self.max_sessions = max_sessions or int(os.getenv("CHAT_SESSION_CACHE_SIZE", 500))
+        self.max_turns = max_turns or int(os.getenv("CHAT_SESSION_MAX_TURNS", 200))
+        self.sessions: "OrderedDict[str, List[Dict]]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    async def get_history(self, conversation_id: str) -> List[Dict]:
+        """Return the conversation's turns as [{'user': ..., 'assistant': ...}]"""
+        with self.lock:
+            turns = self.sessions.get(conversation_id)
+            if turns is not None:
+                self.sessions.move_to_end(conversation_id)
+                metrics.CHAT_SESSION_REQUESTS.inc(result="hit")
+                return list(turns)
+
+        metrics.CHAT_SESSION_REQUESTS.inc(result="miss")
+
+        # Taken before the read: a turn flushed in between shows up in both and is merged below
+        pending = [{"user": user, "assistant": bot} for user, bot in db_writer.pending_turns(conversation_id)]
+        rows = await async_database.get_conversation_turns(conversation_id, limit=self.max_turns)
+        turns = [{"user": row["user_message"], "assistant": row["bot_response"]} for row in rows]
+        turns = merge_pending(turns, pending)[-self.max_turns:]
+        with self.lock:
+            # Another request may have loaded it meanwhile; keep whichever is newer
+            if conversation_id not in self.sessions:
+                self._store(conversation_id, turns)
+            return list(self.sessions[conversation_id])
+
+    def append_turn(self, conversation_id: str, user_message: str, bot_response: str):
+        """
+        Record a completed turn in the hot cache.
+        Persisting it to chat_log is left to db_writer.
+        """
+        with self.lock:
+            turns = self.sessions.get(conversation_id)
+            if turns is None:
+                # Evicted while the answer was generated: caching just this turn would hide
+                # the older ones, so let the next get_history reload everything from chat_log
+                return
+            turns.append({"user": user_message, "assistant": bot_response})
+            self._store(conversation_id, turns[-self.max_turns:])
+
+    def _store(self, conversation_id: str, turns: List[Dict]):
+        self.sessions[conversation_id] = turns
+        self.sessions.move_to_end(conversation_id)
+        while len(self.sessions) > self.max_sessions:
+            self.sessions.popitem(last=False)
+
+
+# Singleton instance
+chat_sessions = SessionStore()
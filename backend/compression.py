@@ -0,0 +1,170 @@
+"""
+Response compression with Accept-Encoding negotiation.
+
+Brotli is used when the client accepts it and the brotli package is installed,
+gzip otherwise. Bodies smaller than COMPRESSION_MIN_SIZE are sent as-is.
+CompressionMiddleware handles any response that is not already encoded;
+cached endpoints compress once and keep the encoded bytes (see main.cached_json).
+"""
+
+import os
+import zlib
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 5))
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def _parse_accept_encoding(header: str) -> Dict[str, float]:
+    """{'gzip': 1.0, 'br': 0.0, ...} from an Accept-Encoding header"""
+    weights = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    return weights
+
+
+def negotiate(accept_encoding: Optional[str], size: int) -> Optional[str]:
+    """Pick 'br', 'gzip' or None for a body of size bytes"""
+    if not accept_encoding or size < COMPRESSION_MIN_SIZE:
+        return None
+    weights = _parse_accept_encoding(accept_encoding)
+    wildcard = weights.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_q = None, 0.0
+    for encoding in candidates:
+        q = weights.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class StreamEncoder:
+    """Incremental compressor for bodies sent in several chunks."""
+
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self.compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+            self._compress = self.compressor.process
+            self._finish = self.compressor.finish
+        else:
+            # wbits=31 selects the gzip container
+            self.compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+            self._compress = self.compressor.compress
+            self._finish = self.compressor.flush
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compress(chunk)
+
+    def finish(self) -> bytes:
+        return self._finish()
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a complete body with the negotiated encoding"""
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    encoder = StreamEncoder(encoding)
+    return encoder.compress(body) + encoder.finish()
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing JSON/NDJSON/text responses the app left unencoded."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = Headers(scope=scope).get("accept-encoding")
+        if not accept_encoding:
+            await self.app(scope, receive, send)
+            return
+        responder = _Responder(send, accept_encoding)
+        await self.app(scope, receive, responder.send)
+
+
+class _Responder:
+    def __init__(self, send, accept_encoding: str):
+        self._send = send
+        self.accept_encoding = accept_encoding
+        self.start_message = None
+        self.encoder: Optional[StreamEncoder] = None
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            # Hold the headers until the first body chunk shows the size
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        if self.start_message is not None:
+            await self._start(message)
+            return
+
+        if self.encoder is None:
+            await self._send(message)
+            return
+        more_body = message.get("more_body", False)
+        chunk = self.encoder.compress(message.get("body", b""))
+        if not more_body:
+            chunk += self.encoder.finish()
+        await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    async def _start(self, message):
+        start, self.start_message = self.start_message, None
+        headers = MutableHeaders(raw=list(start["headers"]))
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        compressible = (
+            "content-encoding" not in headers
+            and headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+            and start["status"] not in (204, 304)
+        )
+        encoding = None
+        if compressible:
+            if "accept-encoding" not in headers.get("vary", "").lower():
+                headers.add_vary_header("Accept-Encoding")
+            # A streamed body's final size is unknown; treat it as large enough
+            size = max(len(body), COMPRESSION_MIN_SIZE) if more_body else len(body)
+            encoding = negotiate(self.accept_encoding, size)
+
+        if encoding is None:
+            await self._send({**start, "headers": headers.raw})
+            await self._send(message)
+            return
+
+        headers["Content-Encoding"] = encoding
+        if more_body:
+            self.encoder = StreamEncoder(encoding)
+            del headers["Content-Length"]
+            body = self.encoder.compress(body)
+        else:
+            body = compress(body, encoding)
+            headers["Content-Length"] = str(len(body))
+        await self._send({**start, "headers": headers.raw})
+        await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
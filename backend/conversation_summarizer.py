@@ -0,0 +1,154 @@
+"""
+Rolling conversation summarization for long chats.
+
+Once a conversation grows past a threshold, older turns are compressed into a
+short summary in the background. Summaries are cached by a digest of the
+summarized prefix, so every conversation sharing that prefix reuses them and
+each new chunk of turns only extends the previous summary.
+
+Summarizing has to start no later than the prompt builder starts dropping
+turns (PROMPT_HISTORY_TURNS), otherwise the oldest turns fall out of the
+prompt before any summary covers them. At most SUMMARY_MAX_CONCURRENT
+summaries run at once; when all slots are busy a summary is simply
+rescheduled on the conversation's next turn.
+"""
+
+import os
+import json
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from backend.llm_providers import llm_provider
+from backend.prompt_builder import format_turn, prompt_builder
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = (
+    "Aşağıdaki tarım danışmanlığı sohbetini, sonraki soruları yanıtlamak için gereken "
+    "bilgileri (ürünler, sorunlar, konum, verilen öneriler) koruyarak en fazla 5 cümlede "
+    "Türkçe olarak özetle. Yalnızca özeti yaz.\n\n"
+)
+
+
+class ConversationSummarizer:
+    """Compresses older history turns into a cached rolling summary."""
+
+    def __init__(self, threshold: Optional[int] = None, keep_recent: Optional[int] = None,
+                 chunk_size: Optional[int] = None, max_entries: int = 1000,
+                 model_name: Optional[str] = None, history_limit: Optional[int] = None,
+                 max_concurrent: Optional[int] = None):
+        # Turns the prompt builder keeps; older ones only survive through the summary
+        self.history_limit = history_limit or prompt_builder.max_history_turns
+        # One turn early by default, so the first summary usually lands before a turn is dropped
+        self.threshold = threshold or int(os.getenv("SUMMARY_THRESHOLD_TURNS", max(1, self.history_limit - 1)))
+        if self.threshold > self.history_limit:
+            raise ValueError(
+                f"SUMMARY_THRESHOLD_TURNS ({self.threshold}) must not exceed "
+                f"PROMPT_HISTORY_TURNS ({self.history_limit}), or older turns are dropped unsummarized"
+            )
+        self.keep_recent = keep_recent or int(os.getenv("SUMMARY_KEEP_RECENT_TURNS", 3))
+        # Summaries advance in whole chunks so the cache keys stay stable across turns
+        self.chunk_size = chunk_size or int(os.getenv("SUMMARY_CHUNK_TURNS", 2))
+        self.model_name = model_name or os.getenv("SUMMARY_MODEL", "gemini-2.5-flash")
+        self.max_entries = max_entries
+        self.cache: "OrderedDict[str, str]" = OrderedDict()
+        self.pending: Dict[str, asyncio.Task] = {}
+        # Background summaries run outside admission control, so they get their own small limit
+        self.slots = threading.BoundedSemaphore(max_concurrent or int(os.getenv("SUMMARY_MAX_CONCURRENT", 2)))
+
+    def _prefix_digests(self, history: List[Dict], covered: int) -> List[Tuple[int, str]]:
+        """Digest of every chunk-aligned history prefix up to covered turns"""
+        digests = []
+        running = hashlib.sha1()
+        for index, turn in enumerate(history[:covered], start=1):
+            running.update(json.dumps(
+                [turn.get('user', ''), turn.get('assistant', '')], ensure_ascii=False
+            ).encode("utf-8"))
+            if index % self.chunk_size == 0:
+                digests.append((index, running.hexdigest()))
+        return digests
+
+    def _get(self, key: str) -> Optional[str]:
+        summary = self.cache.get(key)
+        if summary is not None:
+            self.cache.move_to_end(key)
+        return summary
+
+    def _put(self, key: str, summary: str):
+        self.cache[key] = summary
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+
+    def prepare(self, history: List[Dict]) -> Tuple[Optional[str], List[Dict]]:
+        """
+        Return (summary, recent_turns) for the prompt.
+        Uses the newest cached summary and schedules the next one if it is missing.
+        """
+        if not history or len(history) <= self.threshold:
+            return None, history or []
+
+        covered = ((len(history) - self.keep_recent) // self.chunk_size) * self.chunk_size
+        digests = self._prefix_digests(history, covered)
+        if not digests:
+            return None, history
+
+        # Newest cached prefix summary, if any
+        best_turns, best_summary = 0, None
+        for turns, key in reversed(digests):
+            summary = self._get(key)
+            if summary is not None:
+                best_turns, best_summary = turns, summary
+                break
+
+        target_turns, target_key = digests[-1]
+        if best_turns < target_turns:
+            self._schedule(target_key, best_summary, history[best_turns:target_turns])
+
+        return best_summary, history[best_turns:]
+
+    def _schedule(self, key: str, previous_summary: Optional[str], turns: List[Dict]):
+        """Start a background summarization unless one is already running for key or no slot is free"""
+        if key in self.pending:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if not self.slots.acquire(blocking=False):
+            return
+        task = loop.create_task(self._summarize_async(key, previous_summary, turns))
+        self.pending[key] = task
+        task.add_done_callback(lambda _: self._finished(key))
+
+    def _finished(self, key: str):
+        self.pending.pop(key, None)
+        self.slots.release()
+
+    async def _summarize_async(self, key: str, previous_summary: Optional[str], turns: List[Dict]):
+        try:
+            summary = await asyncio.to_thread(self.summarize, previous_summary, turns)
+            if summary:
+                self._put(key, summary)
+        except Exception as e:
+            logger.warning(f"Conversation summarization failed: {e}")
+
+    def summarize(self, previous_summary: Optional[str], turns: List[Dict]) -> str:
+        """Extend previous_summary with turns using the summary model"""
+        transcript = "\n".join(filter(None, (format_turn(turn) for turn in turns)))
+        prompt = SUMMARY_PROMPT
+        if previous_summary:
+            prompt += f"Önceki özet: {previous_summary}\n\n"
+        prompt += f"Yeni mesajlar:\n{transcript}"
+
+        model_name = llm_provider.generation_models([self.model_name])[0]
+        response = llm_provider.generate_content(model_name, prompt)
+        return (getattr(response, 'text', None) or "").strip()
+
+
+# Singleton instance
+conversation_summarizer = ConversationSummarizer()
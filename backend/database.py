@@ -4,25 +4,164 @@ Veritabanı bağlantısı ve yardımcı fonksiyonlar
 
 import sqlite3
 import os
-from typing import Optional, List, Dict, Any
+import re
+import itertools
+import json
+import time
+import base64
+import binascii
+import threading
+from typing import Optional, List, Dict, Any, Iterator
 from contextlib import contextmanager
 
+try:
+    from backend import metrics
+except ImportError:
+    import metrics
+
 # Veritabanı dosya yolu
 DB_PATH = os.path.join(os.path.dirname(__file__), "..", "database.db")
 
-@contextmanager
-def get_db_connection():
-    """Veritabanı bağlantısı context manager"""
-    conn = sqlite3.connect(DB_PATH)
+# Bağlantı ayarları
+BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", 16384))
+MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 128 * 1024 * 1024))
+
+# data_versions tablosunun en fazla kaç saniyede bir yeniden okunacağı
+DATA_VERSION_TTL = float(os.getenv("DATA_VERSION_TTL", 1.0))
+
+# Bağlantı havuzu: her thread kendi okuma bağlantısını tutar,
+# yazmalar ise kilitle korunan tek bir yazma bağlantısından geçer.
+_local = threading.local()
+_write_lock = threading.RLock()
+_write_conn: Optional[sqlite3.Connection] = None
+_write_key = None
+# DB_PATH değişirse veya havuz kapatılırsa bağlantılar yeniden açılır
+_generation = 0
+_all_connections: List[sqlite3.Connection] = []
+_registry_lock = threading.Lock()
+
+def _open_connection(read_only: bool) -> sqlite3.Connection:
+    """Yeni bir bağlantı aç ve performans ayarlarını uygula"""
+    conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
     conn.row_factory = sqlite3.Row  # Sözlük benzeri erişim için
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    # WAL: okuyucular yazıcıları, yazıcılar okuyucuları bloklamaz (kalıcı ayar).
+    # Mod değiştirmek kilit gerektirir, bu yüzden yalnızca gerekiyorsa ayarla.
+    if conn.execute("PRAGMA journal_mode").fetchone()[0].lower() != "wal":
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+        except sqlite3.OperationalError:
+            # Başka bir süreç kilidi tutuyor; sonraki bağlantıda tekrar denenir
+            pass
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    if read_only:
+        conn.execute("PRAGMA query_only = ON")
+    with _registry_lock:
+        _all_connections.append(conn)
+    return conn
+
+def _get_read_connection() -> sqlite3.Connection:
+    key = (DB_PATH, _generation)
+    if getattr(_local, "read_key", None) != key:
+        _local.read_conn = _open_connection(read_only=True)
+        _local.read_key = key
+    return _local.read_conn
+
+def _get_write_connection() -> sqlite3.Connection:
+    global _write_conn, _write_key
+    key = (DB_PATH, _generation)
+    if _write_key != key:
+        _write_conn = _open_connection(read_only=False)
+        _write_key = key
+    return _write_conn
+
+@contextmanager
+def get_db_connection(versioned: bool = True):
+    """
+    Yazma bağlantısı context manager (havuzdan, transaction sonunda commit).
+    versioned=False: yalnızca data_versions tetikleyicisi olmayan tablolara
+    (sohbet/arama geçmişi, favoriler) yazılıyor, önbellek sürümleri değişmez.
+    """
+    wait_start = time.perf_counter()
+    with _write_lock:
+        metrics.DB_WRITE_LOCK_WAIT.observe(time.perf_counter() - wait_start)
+        conn = _get_write_connection()
+        try:
+            with metrics.DB_QUERY_DURATION.time(mode="write"):
+                yield conn
+                conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            if versioned:
+                mark_data_changed()
+
+@contextmanager
+def get_read_connection():
+    """Okuma bağlantısı context manager (thread başına bir bağlantı)"""
+    conn = _get_read_connection()
     try:
-        yield conn
-        conn.commit()
-    except Exception:
-        conn.rollback()
-        raise
+        with metrics.DB_QUERY_DURATION.time(mode="read"):
+            yield conn
     finally:
-        conn.close()
+        if conn.in_transaction:
+            conn.rollback()
+
+def close_all_connections():
+    """Havuzdaki tüm bağlantıları kapat (kapanışta ve testlerde)"""
+    global _write_conn, _write_key, _generation
+    with _write_lock, _registry_lock:
+        for conn in _all_connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        _all_connections.clear()
+        _write_conn = None
+        _write_key = None
+        _generation += 1
+
+# ========== DATA VERSIONS (HTTP önbellek doğrulama) ==========
+
+# Yazmalar sayacı artırır; önbellekteki sürümler sayaç değişince geçersiz olur
+_data_change_seq = 0
+_data_versions_state = (None, 0.0, {})
+
+def mark_data_changed():
+    """Bu süreçteki bir yazmadan sonra sürümlerin yeniden okunmasını sağla"""
+    global _data_change_seq
+    _data_change_seq += 1
+
+def cached_data_versions() -> Optional[Dict[str, Dict]]:
+    """Bellekteki sürümler hâlâ geçerliyse onları, değilse None döndür (veritabanına dokunmaz)"""
+    cached_key, checked_at, versions = _data_versions_state
+    if cached_key == (DB_PATH, _generation, _data_change_seq) and time.monotonic() - checked_at < DATA_VERSION_TTL:
+        return versions
+    return None
+
+def get_data_versions() -> Dict[str, Dict]:
+    """
+    Tablo başına değişiklik sayaçlarını getir: {tablo: {"version", "updated_at"}}.
+    Sayaçlar tetikleyicilerle güncellenir; sonuç bellekte tutulur ve yalnızca
+    bu süreçte sürümlü bir tabloya yazma olduysa ya da DATA_VERSION_TTL dolduysa
+    yeniden okunur (diğer süreçlerin yazmaları en geç TTL sonra görülür).
+    """
+    global _data_versions_state
+    versions = cached_data_versions()
+    if versions is not None:
+        return versions
+    
+    key = (DB_PATH, _generation, _data_change_seq)
+    with get_read_connection() as conn:
+        rows = conn.execute("SELECT table_name, version, updated_at FROM data_versions").fetchall()
+    versions = {row["table_name"]: {"version": row["version"], "updated_at": row["updated_at"]} for row in rows}
+    _data_versions_state = (key, time.monotonic(), versions)
+    return versions
 
 def dict_factory(cursor, row):
     """Satırları sözlük olarak döndür"""
@@ -30,33 +169,122 @@ def dict_factory(cursor, row):
 
 # ========== NEWS (Haberler) Fonksiyonları ==========
 
-def get_all_news(limit: Optional[int] = None, category_id: Optional[int] = None) -> List[Dict]:
-    """Tüm haberleri getir"""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        query = """
-            SELECT n.*, nc.name as category_name 
+def encode_cursor(sort_value: Any, row_id: int) -> str:
+    """Sayfalama için opak cursor üret"""
+    raw = json.dumps([sort_value, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple:
+    """Cursor'ı (sıralama değeri, id) olarak çöz; geçersizse ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_value, row_id = json.loads(raw)
+        if isinstance(sort_value, (list, dict)):
+            raise ValueError("sort value must be a scalar")
+        return sort_value, int(row_id)
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise ValueError("Invalid cursor") from e
+
+def _check_limit(limit: Optional[int]):
+    """Sayfa boyutu pozitif olmalı (None: sınırsız); değilse ValueError"""
+    if limit is not None and limit < 1:
+        raise ValueError("limit must be a positive integer")
+
+# Liste uçlarında fields= ile seçilebilecek alanlar ve SQL karşılıkları
+NEWS_FIELDS = {
+    "id": "n.id",
+    "title": "n.title",
+    "summary": "n.summary",
+    "content": "n.content",
+    "excerpt": "substr(n.content, 1, 200) as excerpt",
+    "category_id": "n.category_id",
+    "category_name": "nc.name as category_name",
+    "published_at": "n.published_at",
+    "image_url": "n.image_url",
+}
+TIPS_FIELDS = {
+    "id": "id",
+    "title": "title",
+    "content": "content",
+    "difficulty": "difficulty",
+    "created_at": "created_at",
+}
+
+def parse_fields(fields: Optional[str], allowed: Dict[str, str]) -> Optional[List[str]]:
+    """
+    "title,summary" gibi bir fields parametresini doğrula.
+    Boşsa None (tüm alanlar); bilinmeyen alan varsa ValueError.
+    """
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}")
+    return names
+
+def _select_list(fields: Optional[List[str]], allowed: Dict[str, str], sort_key: str) -> str:
+    """İstenen alanların SELECT listesi; sayfalama için id ve sıralama alanı her zaman eklenir"""
+    names = list(dict.fromkeys(["id", sort_key] + fields))
+    return ", ".join(allowed[name] for name in names)
+
+def get_news_page(limit: Optional[int] = None, category_id: Optional[int] = None,
+                  cursor: Optional[str] = None, fields: Optional[List[str]] = None) -> Dict:
+    """
+    Haberleri (published_at, id) üzerinden keyset sayfalama ile getir.
+    fields verilirse yalnızca o sütunlar okunur (ör. liste görünümü için content olmadan).
+    Dönüş: {"items": [...], "next_cursor": str | None}
+    """
+    _check_limit(limit)
+    with get_read_connection() as conn:
+        cursor_obj = conn.cursor()
+        if fields:
+            columns = _select_list(fields, NEWS_FIELDS, "published_at")
+            # Kategori adı istenmediyse JOIN'e gerek yok
+            join = "LEFT JOIN news_categories nc ON n.category_id = nc.id" if "category_name" in fields else ""
+        else:
+            columns = "n.*, nc.name as category_name"
+            join = "LEFT JOIN news_categories nc ON n.category_id = nc.id"
+        query = f"""
+            SELECT {columns}
             FROM news n
-            LEFT JOIN news_categories nc ON n.category_id = nc.id
+            {join}
+            WHERE 1=1
         """
         params = []
         
         if category_id:
-            query += " WHERE n.category_id = ?"
+            query += " AND n.category_id = ?"
             params.append(category_id)
         
-        query += " ORDER BY n.published_at DESC"
+        if cursor:
+            # İndeks üzerinde seek: OFFSET taraması yok
+            query += " AND (n.published_at, n.id) < (?, ?)"
+            params.extend(decode_cursor(cursor))
+        
+        query += " ORDER BY n.published_at DESC, n.id DESC"
         
         if limit:
+            # Bir fazlasını çekerek sonraki sayfa olup olmadığını anla
             query += " LIMIT ?"
-            params.append(limit)
+            params.append(limit + 1)
         
-        cursor.execute(query, params)
-        return [dict(row) for row in cursor.fetchall()]
+        cursor_obj.execute(query, params)
+        items = [dict(row) for row in cursor_obj.fetchall()]
+    
+    next_cursor = None
+    if limit and len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1]["published_at"], items[-1]["id"])
+    return {"items": items, "next_cursor": next_cursor}
+
+def get_all_news(limit: Optional[int] = None, category_id: Optional[int] = None) -> List[Dict]:
+    """Tüm haberleri getir"""
+    return get_news_page(limit=limit, category_id=category_id)["items"]
 
 def get_news_by_id(news_id: int) -> Optional[Dict]:
     """ID'ye göre haber getir"""
-    with get_db_connection() as conn:
+    with get_read_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT n.*, nc.name as category_name 
@@ -130,31 +358,89 @@ def delete_news(news_id: int) -> bool:
         cursor.execute("DELETE FROM news WHERE id = ?", (news_id,))
         return cursor.rowcount > 0
 
-# ========== TIPS Fonksiyonları ==========
+def get_news_by_ids(news_ids: List[int]) -> List[Dict]:
+    """Birden fazla haberi ID listesiyle getir (yeniden indeksleme için)"""
+    if not news_ids:
+        return []
+    placeholders = ", ".join("?" * len(news_ids))
+    with get_read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT n.*, nc.name as category_name 
+            FROM news n
+            LEFT JOIN news_categories nc ON n.category_id = nc.id
+            WHERE n.id IN ({placeholders})
+            ORDER BY n.id
+        """, news_ids)
+        return [dict(row) for row in cursor.fetchall()]
 
-def get_all_tips(limit: Optional[int] = None, difficulty: Optional[str] = None) -> List[Dict]:
-    """Tüm tips'leri getir"""
+def bulk_insert_news(rows: List[Dict]) -> List[int]:
+    """
+    Haberleri tek transaction içinde executemany ile ekle.
+    Dönüş: eklenen haberlerin ID'leri (sırayla)
+    """
+    if not rows:
+        return []
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        query = "SELECT * FROM tips WHERE 1=1"
+        cursor.executemany("""
+            INSERT INTO news (title, summary, content, category_id, image_url, published_at)
+            VALUES (?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+        """, [
+            (row["title"], row.get("summary"), row["content"], row["category_id"],
+             row.get("image_url"), row.get("published_at"))
+            for row in rows
+        ])
+        # Transaction boyunca başka yazıcı olamaz, ID'ler ardışıktır
+        last_id = cursor.execute("SELECT last_insert_rowid()").fetchone()[0]
+        return list(range(last_id - len(rows) + 1, last_id + 1))
+
+# ========== TIPS Fonksiyonları ==========
+
+def get_tips_page(limit: Optional[int] = None, difficulty: Optional[str] = None,
+                  cursor: Optional[str] = None, fields: Optional[List[str]] = None) -> Dict:
+    """
+    Tips'leri (created_at, id) üzerinden keyset sayfalama ile getir.
+    fields verilirse yalnızca o sütunlar okunur.
+    Dönüş: {"items": [...], "next_cursor": str | None}
+    """
+    _check_limit(limit)
+    with get_read_connection() as conn:
+        cursor_obj = conn.cursor()
+        columns = _select_list(fields, TIPS_FIELDS, "created_at") if fields else "*"
+        query = f"SELECT {columns} FROM tips WHERE 1=1"
         params = []
         
         if difficulty:
             query += " AND difficulty = ?"
             params.append(difficulty)
         
-        query += " ORDER BY created_at DESC"
+        if cursor:
+            query += " AND (created_at, id) < (?, ?)"
+            params.extend(decode_cursor(cursor))
+        
+        query += " ORDER BY created_at DESC, id DESC"
         
         if limit:
             query += " LIMIT ?"
-            params.append(limit)
+            params.append(limit + 1)
         
-        cursor.execute(query, params)
-        return [dict(row) for row in cursor.fetchall()]
+        cursor_obj.execute(query, params)
+        items = [dict(row) for row in cursor_obj.fetchall()]
+    
+    next_cursor = None
+    if limit and len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1]["created_at"], items[-1]["id"])
+    return {"items": items, "next_cursor": next_cursor}
+
+def get_all_tips(limit: Optional[int] = None, difficulty: Optional[str] = None) -> List[Dict]:
+    """Tüm tips'leri getir"""
+    return get_tips_page(limit=limit, difficulty=difficulty)["items"]
 
 def get_tip_by_id(tip_id: int) -> Optional[Dict]:
     """ID'ye göre tip getir"""
-    with get_db_connection() as conn:
+    with get_read_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM tips WHERE id = ?", (tip_id,))
         row = cursor.fetchone()
@@ -205,18 +491,47 @@ def delete_tip(tip_id: int) -> bool:
         cursor.execute("DELETE FROM tips WHERE id = ?", (tip_id,))
         return cursor.rowcount > 0
 
+def get_tips_by_ids(tip_ids: List[int]) -> List[Dict]:
+    """Birden fazla tip'i ID listesiyle getir (yeniden indeksleme için)"""
+    if not tip_ids:
+        return []
+    placeholders = ", ".join("?" * len(tip_ids))
+    with get_read_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT * FROM tips WHERE id IN ({placeholders}) ORDER BY id", tip_ids)
+        return [dict(row) for row in cursor.fetchall()]
+
+def bulk_insert_tips(rows: List[Dict]) -> List[int]:
+    """
+    Tips'leri tek transaction içinde executemany ile ekle.
+    Dönüş: eklenen tips'lerin ID'leri (sırayla)
+    """
+    if not rows:
+        return []
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany("""
+            INSERT INTO tips (title, content, difficulty, created_at)
+            VALUES (?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+        """, [
+            (row["title"], row["content"], row.get("difficulty"), row.get("created_at"))
+            for row in rows
+        ])
+        last_id = cursor.execute("SELECT last_insert_rowid()").fetchone()[0]
+        return list(range(last_id - len(rows) + 1, last_id + 1))
+
 # ========== NEWS CATEGORIES Fonksiyonları ==========
 
 def get_all_categories() -> List[Dict]:
     """Tüm kategorileri getir"""
-    with get_db_connection() as conn:
+    with get_read_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM news_categories ORDER BY name")
         return [dict(row) for row in cursor.fetchall()]
 
 def get_category_by_id(category_id: int) -> Optional[Dict]:
     """ID'ye göre kategori getir"""
-    with get_db_connection() as conn:
+    with get_read_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM news_categories WHERE id = ?", (category_id,))
         row = cursor.fetchone()
@@ -232,11 +547,116 @@ def add_category(name: str, description: Optional[str] = None) -> int:
         """, (name, description))
         return cursor.lastrowid
 
+# ========== FULL-TEXT SEARCH Fonksiyonları ==========
+
+SEARCH_SNIPPET_TOKENS = 16
+
+def build_fts_query(text: str) -> Optional[str]:
+    """
+    Kullanıcı sorgusunu güvenli bir FTS5 MATCH ifadesine çevir.
+    Her kelime önek (prefix) olarak aranır, böylece Türkçe ekler de eşleşir
+    ("domates" -> "domatesler"). Dotless ı / i farkı için her kelimenin iki
+    yazımı da aranır.
+    """
+    terms = []
+    for word in re.findall(r"\w+", text.replace("İ", "i").replace("I", "ı").lower()):
+        variants = {word, word.replace("ı", "i"), word.replace("i", "ı")}
+        terms.append("(" + " OR ".join(f'"{variant}"*' for variant in sorted(variants)) + ")")
+    return " AND ".join(terms) if terms else None
+
+def search_content(query: str, kind: str = "all", limit: int = 10) -> List[Dict]:
+    """
+    Haber ve tips içinde BM25 sıralı tam metin arama (vurgulu snippet ile).
+    bm25() skorları tablonun kendi istatistiklerine göre hesaplanır, iki tablo
+    arasında karşılaştırılamaz; bu yüzden sonuçlar tablo içi sıraya (rank)
+    göre dönüşümlü birleştirilir.
+    """
+    match = build_fts_query(query)
+    if not match:
+        return []
+    
+    news_results, tip_results = [], []
+    with get_read_connection() as conn:
+        cursor = conn.cursor()
+        if kind in ("all", "news"):
+            cursor.execute(f"""
+                SELECT 'news' as type, n.id, n.title, n.summary, n.published_at, n.category_id,
+                       snippet(news_fts, -1, '<mark>', '</mark>', '…', {SEARCH_SNIPPET_TOKENS}) as snippet,
+                       -bm25(news_fts, 10.0, 4.0, 1.0) as score
+                FROM news_fts
+                JOIN news n ON n.id = news_fts.rowid
+                WHERE news_fts MATCH ?
+                ORDER BY bm25(news_fts, 10.0, 4.0, 1.0)
+                LIMIT ?
+            """, (match, limit))
+            news_results = [dict(row) for row in cursor.fetchall()]
+        if kind in ("all", "tips"):
+            cursor.execute(f"""
+                SELECT 'tip' as type, t.id, t.title, t.difficulty, t.created_at,
+                       snippet(tips_fts, -1, '<mark>', '</mark>', '…', {SEARCH_SNIPPET_TOKENS}) as snippet,
+                       -bm25(tips_fts, 10.0, 1.0) as score
+                FROM tips_fts
+                JOIN tips t ON t.id = tips_fts.rowid
+                WHERE tips_fts MATCH ?
+                ORDER BY bm25(tips_fts, 10.0, 1.0)
+                LIMIT ?
+            """, (match, limit))
+            tip_results = [dict(row) for row in cursor.fetchall()]
+    
+    results = []
+    for position, pair in enumerate(itertools.zip_longest(news_results, tip_results), start=1):
+        for row in pair:
+            if row is not None:
+                row["rank"] = position
+                results.append(row)
+    return results[:limit]
+
+# ========== EXPORT Fonksiyonları ==========
+
+# Dışa aktarılabilen tablolar ve sütunları (sabit liste: tablo adı SQL'e gömülür)
+EXPORT_TABLES = {
+    "news": ["id", "title", "summary", "content", "category_id", "image_url", "published_at"],
+    "tips": ["id", "title", "content", "difficulty", "created_at"],
+    "chat_log": ["id", "user_id", "conversation_id", "user_message", "bot_response", "created_at"],
+}
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 500))
+
+def iter_table_rows(table: str, since_id: Optional[int] = None,
+                    batch_size: Optional[int] = None) -> Iterator[List[Dict]]:
+    """
+    Bir tabloyu id sırasıyla parça parça (fetchmany) oku; bellek kullanımı tablo boyutundan bağımsızdır.
+    Kendi bağlantısını açar: generator farklı thread'lerde ilerletilebilir ve
+    tüm dışa aktarma tek bir tutarlı snapshot üzerinden yapılır.
+    """
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"table must be one of: {', '.join(EXPORT_TABLES)}")
+    columns = ", ".join(EXPORT_TABLES[table])
+    query = f"SELECT {columns} FROM {table}"
+    params = []
+    if since_id is not None:
+        query += " WHERE id > ?"
+        params.append(since_id)
+    query += " ORDER BY id"
+    
+    conn = _open_connection(read_only=True)
+    try:
+        cursor = conn.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(batch_size or EXPORT_BATCH_SIZE)
+            if not rows:
+                break
+            yield [dict(row) for row in rows]
+    finally:
+        conn.close()
+        with _registry_lock:
+            if conn in _all_connections:
+                _all_connections.remove(conn)
+
 # ========== USERS Fonksiyonları ==========
 
 def get_user_by_email(email: str) -> Optional[Dict]:
     """Email'e göre kullanıcı getir"""
-    with get_db_connection() as conn:
+    with get_read_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM users WHERE email = ?", (email,))
         row = cursor.fetchone()
@@ -244,7 +664,7 @@ def get_user_by_email(email: str) -> Optional[Dict]:
 
 def get_user_by_id(user_id: int) -> Optional[Dict]:
     """ID'ye göre kullanıcı getir"""
-    with get_db_connection() as conn:
+    with get_read_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
         row = cursor.fetchone()
@@ -252,19 +672,37 @@ def get_user_by_id(user_id: int) -> Optional[Dict]:
 
 # ========== CHAT LOG Fonksiyonları ==========
 
-def add_chat_log(user_id: int, user_message: str, bot_response: str) -> int:
+def add_chat_log(user_id: int, user_message: str, bot_response: str,
+                 conversation_id: Optional[str] = None) -> int:
     """Chat log ekle"""
-    with get_db_connection() as conn:
+    with get_db_connection(versioned=False) as conn:
         cursor = conn.cursor()
         cursor.execute("""
-            INSERT INTO chat_log (user_id, user_message, bot_response)
-            VALUES (?, ?, ?)
-        """, (user_id, user_message, bot_response))
+            INSERT INTO chat_log (user_id, user_message, bot_response, conversation_id)
+            VALUES (?, ?, ?, ?)
+        """, (user_id, user_message, bot_response, conversation_id))
         return cursor.lastrowid
 
+def get_conversation_turns(conversation_id: str, limit: Optional[int] = None) -> List[Dict]:
+    """Konuşmanın son mesajlarını kronolojik sırayla getir"""
+    with get_read_connection() as conn:
+        cursor = conn.cursor()
+        query = """
+            SELECT user_message, bot_response FROM chat_log
+            WHERE conversation_id = ? ORDER BY id DESC
+        """
+        params = [conversation_id]
+        
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        
+        cursor.execute(query, params)
+        return [dict(row) for row in reversed(cursor.fetchall())]
+
 def get_user_chat_logs(user_id: int, limit: Optional[int] = None) -> List[Dict]:
     """Kullanıcının chat loglarını getir"""
-    with get_db_connection() as conn:
+    with get_read_connection() as conn:
         cursor = conn.cursor()
         query = "SELECT * FROM chat_log WHERE user_id = ? ORDER BY created_at DESC"
         params = [user_id]
@@ -280,7 +718,7 @@ def get_user_chat_logs(user_id: int, limit: Optional[int] = None) -> List[Dict]:
 
 def add_search_history(user_id: int, query: str) -> int:
     """Arama geçmişi ekle"""
-    with get_db_connection() as conn:
+    with get_db_connection(versioned=False) as conn:
         cursor = conn.cursor()
         cursor.execute("""
             INSERT INTO search_history (user_id, query)
@@ -290,7 +728,7 @@ def add_search_history(user_id: int, query: str) -> int:
 
 def get_user_search_history(user_id: int, limit: Optional[int] = None) -> List[Dict]:
     """Kullanıcının arama geçmişini getir"""
-    with get_db_connection() as conn:
+    with get_read_connection() as conn:
         cursor = conn.cursor()
         query = "SELECT * FROM search_history WHERE user_id = ? ORDER BY created_at DESC"
         params = [user_id]
@@ -302,11 +740,33 @@ def get_user_search_history(user_id: int, limit: Optional[int] = None) -> List[D
         cursor.execute(query, params)
         return [dict(row) for row in cursor.fetchall()]
 
+# ========== TOPLU LOG YAZMA ==========
+
+def add_log_batch(chat_rows: List[tuple], search_rows: List[tuple]) -> int:
+    """
+    Chat log ve arama geçmişi satırlarını tek transaction içinde toplu ekle.
+    chat_rows: (user_id, user_message, bot_response, conversation_id)
+    search_rows: (user_id, query)
+    """
+    with get_db_connection(versioned=False) as conn:
+        cursor = conn.cursor()
+        if chat_rows:
+            cursor.executemany("""
+                INSERT INTO chat_log (user_id, user_message, bot_response, conversation_id)
+                VALUES (?, ?, ?, ?)
+            """, chat_rows)
+        if search_rows:
+            cursor.executemany("""
+                INSERT INTO search_history (user_id, query)
+                VALUES (?, ?)
+            """, search_rows)
+        return len(chat_rows) + len(search_rows)
+
 # ========== FAVORITE NEWS Fonksiyonları ==========
 
 def add_favorite_news(user_id: int, news_id: int) -> int:
     """Favori haber ekle"""
-    with get_db_connection() as conn:
+    with get_db_connection(versioned=False) as conn:
         cursor = conn.cursor()
         try:
             cursor.execute("""
@@ -320,7 +780,7 @@ def add_favorite_news(user_id: int, news_id: int) -> int:
 
 def remove_favorite_news(user_id: int, news_id: int) -> bool:
     """Favori haberden çıkar"""
-    with get_db_connection() as conn:
+    with get_db_connection(versioned=False) as conn:
         cursor = conn.cursor()
         cursor.execute("""
             DELETE FROM favorite_news WHERE user_id = ? AND news_id = ?
@@ -329,7 +789,7 @@ def remove_favorite_news(user_id: int, news_id: int) -> bool:
 
 def get_user_favorites(user_id: int) -> List[Dict]:
     """Kullanıcının favori haberlerini getir"""
-    with get_db_connection() as conn:
+    with get_read_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT n.*, nc.name as category_name, fn.created_at as favorited_at
@@ -343,7 +803,7 @@ def get_user_favorites(user_id: int) -> List[Dict]:
 
 def is_news_favorited(user_id: int, news_id: int) -> bool:
     """Haber favori mi kontrol et"""
-    with get_db_connection() as conn:
+    with get_read_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT COUNT(*) FROM favorite_news 
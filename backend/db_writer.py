@@ -0,0 +1,229 @@
+"""
+Background writer for chat_log and search_history.
+
+Request handlers enqueue rows without touching SQLite. A single writer thread
+drains the queue every few milliseconds (or once enough rows pile up) and
+inserts each batch with executemany in one transaction. When the queue is
+full or a batch cannot be written, rows are spilled to a JSONL file next to
+the database (DB_WRITER_SPILL_PATH, empty to disable) and written once the
+database accepts writes again, so responses never wait on the database.
+Rows are only dropped when they cannot be spilled either; that is logged as an
+error and counted in db_writer_dropped_rows_total.
+
+Chat turns that are still queued or spilled are returned by pending_turns, so
+a conversation reloaded from chat_log before the flush is still complete.
+"""
+
+import os
+import json
+import time
+import queue
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from backend import database
+from backend import metrics
+
+logger = logging.getLogger(__name__)
+
+CHAT_LOG = "chat_log"
+SEARCH_HISTORY = "search_history"
+
+
+class BackgroundWriter:
+    """Batches log rows from request handlers into periodic bulk inserts."""
+
+    def __init__(self, flush_interval_ms: Optional[int] = None, batch_size: Optional[int] = None,
+                 max_queue: Optional[int] = None, spill_path: Optional[str] = None):
+        self.flush_interval = (flush_interval_ms or int(os.getenv("DB_WRITER_FLUSH_MS", 200))) / 1000
+        self.batch_size = batch_size or int(os.getenv("DB_WRITER_BATCH_SIZE", 100))
+        self.max_queue = max_queue or int(os.getenv("DB_WRITER_MAX_QUEUE", 10000))
+        if spill_path is None:
+            spill_path = os.getenv("DB_WRITER_SPILL_PATH",
+                                   os.path.join(os.path.dirname(database.DB_PATH), "log_spill.jsonl"))
+        self.spill_path = spill_path
+        self.queue: "queue.Queue" = queue.Queue(maxsize=self.max_queue)
+        self.spill_lock = threading.Lock()
+        self.thread: Optional[threading.Thread] = None
+        self.stopping = threading.Event()
+        # Updated from request threads and the writer thread
+        self.stats = {"enqueued": 0, "written": 0, "batches": 0, "dropped": 0, "spilled": 0, "failed": 0}
+        self.stats_lock = threading.Lock()
+        # Chat rows not in chat_log yet, per conversation, in order
+        self.unflushed: Dict[str, List[tuple]] = defaultdict(list)
+        self.unflushed_lock = threading.Lock()
+
+    def _count(self, name: str, amount: int = 1):
+        with self.stats_lock:
+            self.stats[name] += amount
+
+    # ---------- producer side ----------
+
+    def log_chat(self, user_id: int, user_message: str, bot_response: str,
+                 conversation_id: Optional[str] = None) -> bool:
+        """Queue a chat_log row; never blocks"""
+        return self._enqueue(CHAT_LOG, (user_id, user_message, bot_response, conversation_id))
+
+    def log_search(self, user_id: int, query: str) -> bool:
+        """Queue a search_history row; never blocks"""
+        return self._enqueue(SEARCH_HISTORY, (user_id, query))
+
+    def pending_turns(self, conversation_id: str) -> List[Tuple[str, str]]:
+        """(user_message, bot_response) of the conversation's turns not written to chat_log yet"""
+        with self.unflushed_lock:
+            return [(row[1], row[2]) for row in self.unflushed.get(conversation_id, ())]
+
+    def _track(self, batch: List[tuple]):
+        with self.unflushed_lock:
+            for table, row in batch:
+                if table == CHAT_LOG and row[3]:
+                    self.unflushed[row[3]].append(row)
+
+    def _untrack(self, batch: List[tuple]):
+        with self.unflushed_lock:
+            for table, row in batch:
+                rows = self.unflushed.get(row[3]) if table == CHAT_LOG and row[3] else None
+                if rows is None:
+                    continue
+                try:
+                    rows.remove(row)
+                except ValueError:
+                    # Replayed from a previous run's spill file
+                    pass
+                if not rows:
+                    del self.unflushed[row[3]]
+
+    def _enqueue(self, table: str, row: tuple) -> bool:
+        self._track([(table, row)])
+        try:
+            self.queue.put_nowait((table, row))
+            self._count("enqueued")
+            return True
+        except queue.Full:
+            self._spill([(table, row)])
+            return False
+
+    # ---------- consumer side ----------
+
+    def start(self):
+        """Start the writer thread and replay rows spilled by a previous run"""
+        if self.thread and self.thread.is_alive():
+            return
+        self.stopping.clear()
+        self._replay_spill()
+        self.thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the writer thread after flushing everything still queued"""
+        self.stopping.set()
+        if self.thread:
+            self.thread.join(timeout)
+            self.thread = None
+        # Anything enqueued after the thread exited
+        self._write(self._drain())
+
+    def _run(self):
+        while not self.stopping.is_set():
+            batch = self._collect()
+            if batch and self._write(batch) and self.spill_path and os.path.exists(self.spill_path):
+                # The database takes writes again: bring back rows spilled meanwhile
+                self._replay_spill()
+        self._write(self._drain())
+
+    def _collect(self) -> List[tuple]:
+        """Wait for the first row, then gather until the batch fills or the interval passes"""
+        try:
+            first = self.queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain(self) -> List[tuple]:
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def _write(self, batch: List[tuple]) -> bool:
+        """Insert batch; spill it if that fails. Returns True if it was written"""
+        if not batch:
+            return False
+        chat_rows = [row for table, row in batch if table == CHAT_LOG]
+        search_rows = [row for table, row in batch if table == SEARCH_HISTORY]
+        try:
+            database.add_log_batch(chat_rows, search_rows)
+        except Exception as e:
+            logger.error(f"Background log write failed for {len(batch)} rows: {e}")
+            self._count("failed", len(batch))
+            self._spill(batch)
+            return False
+        self._untrack(batch)
+        self._count("written", len(batch))
+        self._count("batches")
+        return True
+
+    # ---------- overflow handling ----------
+
+    def _spill(self, batch: List[tuple]):
+        """Append rows to the spill file, or drop them if none is configured"""
+        if not self.spill_path:
+            self._drop(batch, "no DB_WRITER_SPILL_PATH configured")
+            return
+        try:
+            with self.spill_lock, open(self.spill_path, "a", encoding="utf-8") as f:
+                for table, row in batch:
+                    f.write(json.dumps({"table": table, "row": row}, ensure_ascii=False) + "\n")
+            self._count("spilled", len(batch))
+            metrics.DB_WRITER_SPILLED.inc(len(batch))
+        except OSError as e:
+            self._drop(batch, f"could not spill: {e}")
+
+    def _drop(self, batch: List[tuple], reason: str):
+        self._untrack(batch)
+        self._count("dropped", len(batch))
+        for table in (CHAT_LOG, SEARCH_HISTORY):
+            count = sum(1 for t, _ in batch if t == table)
+            if count:
+                metrics.DB_WRITER_DROPPED.inc(count, table=table)
+        logger.error(f"Dropped {len(batch)} log rows ({reason})")
+
+    def _replay_spill(self):
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return
+        with self.spill_lock:
+            try:
+                with open(self.spill_path, encoding="utf-8") as f:
+                    batch = [(item["table"], tuple(item["row"])) for item in map(json.loads, f)]
+                os.remove(self.spill_path)
+            except OSError as e:
+                logger.error(f"Could not replay spilled log rows: {e}")
+                return
+            except (ValueError, KeyError) as e:
+                # Keep the file for inspection, but out of the way of new spills
+                try:
+                    os.replace(self.spill_path, self.spill_path + ".bad")
+                except OSError:
+                    pass
+                logger.error(f"Unreadable spill file moved to {self.spill_path}.bad: {e}")
+                return
+        logger.info(f"Replaying {len(batch)} spilled log rows")
+        self._write(batch)
+
+
+# Singleton instance
+db_writer = BackgroundWriter()
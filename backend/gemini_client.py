@@ -1,86 +1,124 @@
 import os
-import google.generativeai as genai
 from google.api_core import exceptions as google_exceptions
 import logging
+import threading
 import time
 
+from backend import metrics
+from backend.key_manager import KeyManager, mask_key
+from backend.retry_policy import RetryPolicy, retry_after
+
 logger = logging.getLogger(__name__)
 
+def load_api_keys():
+    """All configured Gemini API keys: GEMINI_API_KEY, then GEMINI_API_KEY_2, _3, ... until one is missing."""
+    keys = []
+
+    # Check for GEMINI_API_KEY
+    key1 = os.getenv("GEMINI_API_KEY")
+    if key1:
+        keys.append(key1)
+
+    # Check for numbered keys (e.g., GEMINI_API_KEY_2, GEMINI_API_KEY_3, etc.)
+    i = 2
+    while True:
+        key = os.getenv(f"GEMINI_API_KEY_{i}")
+        if key:
+            keys.append(key)
+            i += 1
+        else:
+            break
+
+    return keys
+
 class GeminiClient:
     _instance = None
+    # Guards creating the singleton: the first requests may arrive on several worker threads at once
+    _instance_lock = threading.Lock()
 
     def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(GeminiClient, cls).__new__(cls)
-            cls._instance._initialized = False
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = super(GeminiClient, cls).__new__(cls)
+                cls._instance._initialized = False
         return cls._instance
 
     def __init__(self):
-        if self._initialized:
-            return
-            
-        self.api_keys = self._load_api_keys()
-        self.current_key_index = 0
-        self.model_cache = {}
-        
-        if not self.api_keys:
-            logger.warning("No Gemini API keys found in environment variables.")
-        else:
-            self._configure_current_key()
-            
-        self._initialized = True
+        with self._instance_lock:
+            if self._initialized:
+                return
+
+            self.api_keys = self._load_api_keys()
+            self.current_key_index = 0
+            # Each key has its own API client and models, so a call keeps the key it started with
+            # even if another thread rotates meanwhile (genai.configure is process-wide)
+            self.key_clients = {}
+            self.model_cache = {}
+            self._lock = threading.Lock()
+            self.key_manager = KeyManager(self.api_keys)
+            self.retry_policy = RetryPolicy()
+
+            if not self.api_keys:
+                logger.warning("No Gemini API keys found in environment variables.")
+            else:
+                logger.info(f"Using Gemini API key index 0 ({mask_key(self.api_keys[0])})")
+                self.get_client(0)
+
+            self._initialized = True
 
     def _load_api_keys(self):
         """Load all available Gemini API keys from environment variables."""
-        keys = []
-        
-        # Check for GEMINI_API_KEY
-        key1 = os.getenv("GEMINI_API_KEY")
-        if key1:
-            keys.append(key1)
-            
-        # Check for numbered keys (e.g., GEMINI_API_KEY_2, GEMINI_API_KEY_3, etc.)
-        i = 2
-        while True:
-            key = os.getenv(f"GEMINI_API_KEY_{i}")
-            if key:
-                keys.append(key)
-                i += 1
-            else:
-                break
-                
-        return keys
-
-    def _configure_current_key(self):
-        """Configure genai with the currently selected API key."""
-        if not self.api_keys:
-            return
-            
-        current_key = self.api_keys[self.current_key_index]
-        # Mask key for logging
-        masked_key = f"{current_key[:4]}...{current_key[-4:]}" if len(current_key) > 8 else "***"
-        logger.info(f"Configuring Gemini API with key index {self.current_key_index} ({masked_key})")
-        genai.configure(api_key=current_key)
-
-    def rotate_key(self):
-        """Switch to the next available API key."""
+        return load_api_keys()
+
+    def get_client(self, key_index: int):
+        """Get or create the GenerativeServiceClient bound to one API key."""
+        with self._lock:
+            client = self.key_clients.get(key_index)
+            if client is None:
+                # Imported on first use: the SDK takes about a second to import
+                from google.ai import generativelanguage as glm
+                client_options = {"api_key": self.api_keys[key_index]}
+                endpoint = os.getenv("GEMINI_API_ENDPOINT")
+                if endpoint:
+                    # e.g. the local fake server used by benchmarks/load_test.py (REST accepts http:// endpoints)
+                    client_options["api_endpoint"] = endpoint
+                    client = glm.GenerativeServiceClient(transport="rest", client_options=client_options)
+                else:
+                    client = glm.GenerativeServiceClient(client_options=client_options)
+                self.key_clients[key_index] = client
+            return client
+
+    def rotate_key(self, failed_index: int = None):
+        """Switch to the next API key, skipping keys known to be invalid or exhausted.
+
+        failed_index is the key the caller's request failed on; if another thread already
+        moved off it, the current key is kept instead of skipping a good one.
+        """
         if not self.api_keys or len(self.api_keys) <= 1:
             logger.warning("Key rotation requested but no alternative keys available.")
             return False
 
-        self.current_key_index = (self.current_key_index + 1) % len(self.api_keys)
-        self._configure_current_key()
-        
-        # Clear model cache as models might need re-instantiation (though usually configure is global)
-        # But to be safe and ensure new configuration takes effect if models hold on to config
-        self.model_cache = {} 
+        with self._lock:
+            if failed_index is not None and failed_index != self.current_key_index:
+                return True
+            next_index = self.key_manager.next_usable(self.current_key_index)
+            if next_index is None or next_index == self.current_key_index:
+                # Nothing known to be usable: plain round robin, the states may be stale
+                next_index = (self.current_key_index + 1) % len(self.api_keys)
+            self.current_key_index = next_index
+        logger.info(f"Switched to Gemini API key index {next_index} ({mask_key(self.api_keys[next_index])})")
+        metrics.LLM_KEY_ROTATIONS.inc()
         return True
 
-    def get_model(self, model_name: str, system_instruction: str = None):
-        """Get or create a GenerativeModel."""
-        cache_key = f"{model_name}_{hash(system_instruction) if system_instruction else 'no_sys'}"
-        
-        if cache_key not in self.model_cache:
+    def get_model(self, model_name: str, system_instruction: str = None, key_index: int = None):
+        """Get or create a GenerativeModel that sends its requests with the given key (default: current)."""
+        import google.generativeai as genai
+        if key_index is None:
+            key_index = self.current_key_index
+        cache_key = (key_index, model_name, hash(system_instruction) if system_instruction else 'no_sys')
+
+        model = self.model_cache.get(cache_key)
+        if model is None:
             if system_instruction:
                 try:
                     model = genai.GenerativeModel(model_name, system_instruction=system_instruction)
@@ -89,61 +127,105 @@ class GeminiClient:
                     model = genai.GenerativeModel(model_name)
             else:
                 model = genai.GenerativeModel(model_name)
-            self.model_cache[cache_key] = model
-            
-        return self.model_cache[cache_key]
+            # The client slot is filled lazily from the global configuration otherwise
+            model._client = self.get_client(key_index)
+            with self._lock:
+                model = self.model_cache.setdefault(cache_key, model)
+
+        return model
+
+    def _instrumented(self, operation: str, model_name: str, func):
+        """Wrap func(key_index) to record latency and errors per model and key index for every attempt."""
+
+        def call(key_index):
+            labels = {"operation": operation, "model": model_name, "key": str(key_index)}
+            start = time.perf_counter()
+            try:
+                return func(key_index)
+            except Exception as e:
+                metrics.LLM_ERRORS.inc(error=type(e).__name__, **labels)
+                raise
+            finally:
+                metrics.LLM_REQUEST_DURATION.observe(time.perf_counter() - start, **labels)
+
+        return call
 
     def embed_content(self, model: str, content, task_type: str = "retrieval_document"):
         """Wrapper for genai.embed_content with retry logic."""
-        return self._execute_with_retry(
-            genai.embed_content,
-            model=model,
-            content=content,
-            task_type=task_type
-        )
+        import google.generativeai as genai
+
+        def _embed(key_index):
+            return genai.embed_content(model=model, content=content, task_type=task_type,
+                                       client=self.get_client(key_index))
+
+        return self._execute_with_retry(self._instrumented("embed", model, _embed))
 
     def generate_content(self, model_name: str, prompt: str, system_instruction: str = None):
         """Wrapper for model.generate_content with retry logic."""
         
-        def _generate():
-            model = self.get_model(model_name, system_instruction)
+        def _generate(key_index):
+            model = self.get_model(model_name, system_instruction, key_index=key_index)
             return model.generate_content(prompt)
             
-        return self._execute_with_retry(_generate)
+        return self._execute_with_retry(self._instrumented("generate", model_name, _generate))
 
-    def _execute_with_retry(self, func, *args, **kwargs):
-        """Execute a function and retry with key rotation on specific errors."""
-        max_retries = len(self.api_keys) if self.api_keys else 1
-        
-        for attempt in range(max_retries):
+    def count_tokens(self, model_name: str, text: str) -> int:
+        """Count tokens for text using the model's own tokenizer."""
+
+        def _count(key_index):
+            model = self.get_model(model_name, key_index=key_index)
+            return model.count_tokens(text).total_tokens
+
+        return self._execute_with_retry(self._instrumented("count_tokens", model_name, _count))
+
+    def _execute_with_retry(self, func):
+        """Execute func(key_index): switch keys on quota / invalid-key errors, back off and retry transient ones.
+
+        Each attempt reads the current key once and passes it to func, so a 429 or a success is
+        charged to the key that actually served the request.
+        """
+        # Move off a key already known to be bad before spending a request on it
+        if self.api_keys and not self.key_manager.is_usable(self.current_key_index) \
+                and self.key_manager.usable_indices():
+            self.rotate_key()
+
+        last_key = {}
+
+        def attempt():
+            key_index = self.current_key_index
+            last_key["index"] = key_index
             try:
-                return func(*args, **kwargs)
-                
-            except google_exceptions.ResourceExhausted as e:
-                logger.warning(f"ResourceExhausted error on key index {self.current_key_index}: {e}")
-                if attempt < max_retries - 1:
-                    logger.info("Retrying with next API key...")
-                    if self.rotate_key():
-                        # Small delay to let config settle if needed
-                        time.sleep(0.5) 
-                        continue
-                raise e
-            except google_exceptions.PermissionDenied as e:
-                logger.warning(f"PermissionDenied error on key index {self.current_key_index}: {e}")
+                result = func(key_index)
+            # The REST transport reports quota errors as plain HTTP 429 (TooManyRequests,
+            # the parent of gRPC's ResourceExhausted)
+            except google_exceptions.TooManyRequests as e:
+                logger.warning(f"ResourceExhausted error on key index {key_index}: {e}")
+                self.key_manager.mark_exhausted(key_index, retry_after(e), error=str(e)[:200])
+                raise
+            except (google_exceptions.PermissionDenied, google_exceptions.Unauthenticated) as e:
                 # This might happen if a key is invalid
-                if attempt < max_retries - 1:
-                     logger.info("Retrying with next API key...")
-                     if self.rotate_key():
-                        time.sleep(0.5)
-                        continue
-                raise e
-            except Exception as e:
-                # For other errors, we might not want to rotate key immediately?
-                # But let's log it
-                logger.error(f"Gemini API Error: {e}")
-                raise e
-        
-        raise Exception("All API keys failed.")
+                logger.warning(f"{type(e).__name__} error on key index {key_index}: {e}")
+                self.key_manager.mark_invalid(key_index, error=str(e)[:200])
+                raise
+            if self.api_keys:
+                self.key_manager.mark_valid(key_index)
+            return result
+
+        def switch_key(error, kind):
+            # Every key exhausted or invalid: give up rather than collect another 429 from each
+            if not self.key_manager.usable_indices():
+                return False
+            logger.info("Retrying with next API key...")
+            return self.rotate_key(failed_index=last_key.get("index"))
+
+        try:
+            return self.retry_policy.call(attempt, switch=switch_key, max_switches=max(0, len(self.api_keys) - 1))
+        except Exception as e:
+            logger.error(f"Gemini API Error: {e}")
+            raise
 
-# Initialize singleton
-gemini_client = GeminiClient()
+def __getattr__(name):
+    # Singleton instance, created on first access: constructing it imports the SDK
+    if name == "gemini_client":
+        return GeminiClient()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,162 @@
+"""
+Liveness and readiness checks.
+
+/health/live only says the process is up and its event loop is answering.
+/health/ready says whether this worker should get traffic: the schema
+migrations applied and verified, the RAG index is loaded, the database answers
+within HEALTH_DB_MAX_LATENCY, and (when HEALTH_REQUIRE_LLM=1) the LLM provider
+accepted its last probe.
+
+Probes run in background tasks at their own intervals and only store their
+last result, so the endpoints read cached state and are cheap to poll every
+second. A probe that has not reported for three intervals counts as failed.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from typing import Callable, Dict, Optional
+
+from backend import database
+from backend import metrics
+from backend.startup import startup
+
+logger = logging.getLogger(__name__)
+
+HEALTH_DB_INTERVAL = float(os.getenv("HEALTH_DB_INTERVAL", 5.0))
+HEALTH_DB_MAX_LATENCY = float(os.getenv("HEALTH_DB_MAX_LATENCY", 0.5))
+HEALTH_LLM_INTERVAL = float(os.getenv("HEALTH_LLM_INTERVAL", 60.0))
+HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", 10.0))
+HEALTH_REQUIRE_LLM = os.getenv("HEALTH_REQUIRE_LLM", "0") == "1"
+
+
+class ProbeResult:
+    def __init__(self, ok: bool, latency: float, error: Optional[str] = None, detail: Optional[Dict] = None):
+        self.ok = ok
+        self.latency = latency
+        self.error = error
+        self.detail = detail or {}
+        self.checked_at = time.time()
+
+    def to_dict(self) -> Dict:
+        result = {
+            "ok": self.ok,
+            "latency_ms": round(self.latency * 1000, 1),
+            "age_s": round(time.time() - self.checked_at, 1),
+        }
+        if self.error:
+            result["error"] = self.error
+        result.update(self.detail)
+        return result
+
+
+class Probe:
+    """A blocking check run in a worker thread every `interval` seconds"""
+
+    def __init__(self, name: str, check: Callable[[], Optional[Dict]], interval: float,
+                 max_latency: Optional[float] = None):
+        self.name = name
+        self.check = check
+        self.interval = interval
+        self.max_latency = max_latency
+        self.result: Optional[ProbeResult] = None
+
+    async def run_once(self) -> ProbeResult:
+        start = time.perf_counter()
+        try:
+            detail = await asyncio.wait_for(asyncio.to_thread(self.check), timeout=HEALTH_PROBE_TIMEOUT)
+            latency = time.perf_counter() - start
+            if self.max_latency is not None and latency > self.max_latency:
+                result = ProbeResult(False, latency, f"slower than {self.max_latency}s", detail)
+            else:
+                result = ProbeResult(True, latency, detail=detail)
+        except asyncio.TimeoutError:
+            result = ProbeResult(False, time.perf_counter() - start, f"timed out after {HEALTH_PROBE_TIMEOUT}s")
+        except Exception as e:
+            result = ProbeResult(False, time.perf_counter() - start, f"{type(e).__name__}: {e}")
+
+        if not result.ok and (self.result is None or self.result.ok):
+            logger.warning(f"Health probe {self.name} failing: {result.error}")
+        self.result = result
+        metrics.HEALTH_PROBE_OK.set(1 if result.ok else 0, check=self.name)
+        metrics.HEALTH_PROBE_LATENCY.set(result.latency, check=self.name)
+        return result
+
+    async def loop(self):
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval)
+
+    def status(self) -> Dict:
+        if self.result is None:
+            return {"ok": False, "error": "not checked yet"}
+        status = self.result.to_dict()
+        if time.time() - self.result.checked_at > 3 * self.interval + HEALTH_PROBE_TIMEOUT:
+            status["ok"] = False
+            status["error"] = "stale"
+        return status
+
+
+class HealthMonitor:
+    def __init__(self):
+        self.probes: Dict[str, Probe] = {}
+        # Probes whose failure makes the worker not ready (others are reported only)
+        self.required = set()
+        self.tasks = []
+
+    def add_probe(self, probe: Probe, required: bool = True):
+        self.probes[probe.name] = probe
+        if required:
+            self.required.add(probe.name)
+
+    def start(self):
+        self.tasks = [asyncio.create_task(probe.loop()) for probe in self.probes.values()]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def liveness(self) -> Dict:
+        return {"status": "alive", "uptime_s": round(startup.since_start(), 1)}
+
+    def readiness(self) -> Dict:
+        """Cached state only; never touches the database or the LLM provider"""
+        checks = {
+            "schema": {
+                "ok": startup.schema_error is None,
+                **({"error": startup.schema_error} if startup.schema_error else {}),
+            },
+            "rag_index": {
+                "ok": startup.rag_ready.is_set() and startup.rag_error is None,
+                "loading": not startup.rag_ready.is_set(),
+                **({"error": startup.rag_error} if startup.rag_error else {}),
+            }
+        }
+        checks.update({name: probe.status() for name, probe in self.probes.items()})
+        ready = all(checks[name]["ok"] for name in ("schema", "rag_index", *self.required))
+        return {"status": "ready" if ready else "not_ready", "checks": checks}
+
+
+def check_database() -> Dict:
+    """Read the schema table through the shared read connection"""
+    with database.get_read_connection() as conn:
+        tables = conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table'").fetchone()[0]
+    return {"tables": tables}
+
+
+def check_llm(provider) -> Callable[[], Optional[Dict]]:
+    def check():
+        if not provider.is_configured:
+            raise RuntimeError(f"LLM provider {provider.name} is not configured")
+        return provider.probe()
+    return check
+
+
+def create_monitor(provider) -> HealthMonitor:
+    monitor = HealthMonitor()
+    monitor.add_probe(Probe("database", check_database, HEALTH_DB_INTERVAL, max_latency=HEALTH_DB_MAX_LATENCY))
+    monitor.add_probe(Probe("llm", check_llm(provider), HEALTH_LLM_INTERVAL), required=HEALTH_REQUIRE_LLM)
+    return monitor
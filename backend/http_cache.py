@@ -0,0 +1,118 @@
+"""
+Conditional GET support for the read endpoints.
+
+ETags and Last-Modified are derived from the per-table counters in the
+data_versions table (bumped by triggers on every write), so a revalidation
+that still matches is answered with 304 before any query runs.
+"""
+
+import os
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional, Sequence
+
+from fastapi import Request, Response
+
+from backend import database
+from backend import async_database
+from backend import metrics
+
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", 10))
+HTTP_CACHE_STALE_WHILE_REVALIDATE = int(os.getenv("HTTP_CACHE_STALE_WHILE_REVALIDATE", 60))
+
+# Tables each read endpoint depends on
+NEWS_TABLES = ("news", "news_categories")
+TIPS_TABLES = ("tips",)
+CATEGORY_TABLES = ("news_categories",)
+
+# Cached bodies are served per Content-Encoding (main.cached_json); a 304 repeats the Vary of the 200
+VARY = "Accept-Encoding"
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """SQLite CURRENT_TIMESTAMP ('YYYY-MM-DD HH:MM:SS', UTC) to an aware datetime"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+def make_etag(request: Request, tables: Sequence[str], versions: Dict[str, Dict]) -> str:
+    """Weak ETag over the request (path + query) and the versions of the tables it reads"""
+    parts = [request.url.path, str(request.url.query)]
+    for table in tables:
+        entry = versions.get(table, {})
+        # updated_at keeps ETags distinct if a recreated database restarts the counters
+        parts.append(f"{table}:{entry.get('version')}:{entry.get('updated_at')}")
+    digest = hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Weak comparison: ignore W/ prefixes
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def _not_modified_since(header: str, last_modified: Optional[datetime]) -> bool:
+    if last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified <= since
+
+
+async def resolve_versions() -> Dict[str, Dict]:
+    """data_versions without blocking the event loop: the in-memory copy, else a read on the DB pool"""
+    versions = database.cached_data_versions()
+    if versions is None:
+        versions = await async_database.get_data_versions()
+    return versions
+
+
+def conditional_get(request: Request, response: Response, tables: Sequence[str],
+                    max_age: Optional[int] = None, versions: Optional[Dict[str, Dict]] = None) -> Optional[Response]:
+    """
+    Set ETag, Last-Modified and Cache-Control on response.
+    Returns a 304 response if the client's copy is still current, else None.
+    Pass versions from resolve_versions() when calling from the event loop.
+    """
+    if versions is None:
+        versions = database.get_data_versions()
+    etag = make_etag(request, tables, versions)
+    timestamps = [_parse_timestamp(versions.get(table, {}).get("updated_at")) for table in tables]
+    timestamps = [ts for ts in timestamps if ts]
+    last_modified = max(timestamps) if timestamps else None
+
+    max_age = HTTP_CACHE_MAX_AGE if max_age is None else max_age
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={max_age}, stale-while-revalidate={HTTP_CACHE_STALE_WHILE_REVALIDATE}",
+    }
+    if last_modified:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, etag)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        not_modified = bool(if_modified_since) and _not_modified_since(if_modified_since, last_modified)
+
+    if not_modified:
+        route = request.scope.get("route")
+        metrics.HTTP_NOT_MODIFIED.inc(route=getattr(route, "path", request.url.path))
+        headers["Vary"] = VARY
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
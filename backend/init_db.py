@@ -7,6 +7,11 @@ import sqlite3
 import os
 from datetime import datetime
 
+try:
+    from backend import migrations
+except ImportError:
+    import migrations
+
 # Veritabanı dosya yolu
 DB_PATH = os.path.join(os.path.dirname(__file__), "..", "database.db")
 
@@ -18,6 +23,9 @@ def init_database():
     cursor = conn.cursor()
     
     try:
+        # WAL modu kalıcıdır; backend bağlantıları da bu modu kullanır
+        cursor.execute("PRAGMA journal_mode = WAL")
+        
         # 1. users tablosu
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS users (
@@ -82,6 +90,7 @@ def init_database():
                 user_id INTEGER NOT NULL,
                 user_message TEXT NOT NULL,
                 bot_response TEXT NOT NULL,
+                conversation_id VARCHAR(64),
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 FOREIGN KEY (user_id) REFERENCES users(id)
             )
@@ -101,15 +110,14 @@ def init_database():
         """)
         
         # İndeksler oluştur (performans için)
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_news_category ON news(category_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_search_user ON search_history(user_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_chat_user ON chat_log(user_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_fav_user ON favorite_news(user_id)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_fav_news ON favorite_news(news_id)")
         
         # Değişiklikleri kaydet
         conn.commit()
         
+        # Sürümlü migration'ları uygula (kolonlar ve sorgu indeksleri)
+        applied = migrations.run_migrations(conn)
+        
         print(f"✅ Veritabanı başarıyla oluşturuldu: {DB_PATH}")
         print("📋 Oluşturulan tablolar:")
         print("   - users")
@@ -119,6 +127,7 @@ def init_database():
         print("   - search_history")
         print("   - chat_log")
         print("   - favorite_news")
+        print(f"🔢 Şema sürümü: {migrations.current_version(conn)} ({len(applied)} migration uygulandı)")
         
         # Örnek veri ekleme (opsiyonel - test için)
         add_sample_data(cursor, conn)
@@ -0,0 +1,35 @@
+"""
+Fast JSON encoding for API responses.
+
+Uses orjson when it is installed and falls back to the standard library
+otherwise. Both produce compact UTF-8 output, so cached bodies and ETags do not
+depend on which encoder is available.
+"""
+
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+def dumps(data: Any) -> bytes:
+    """Serialize plain dicts/lists (e.g. DB rows) straight to UTF-8 bytes"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with dumps().
+    Return it directly from an endpoint to skip FastAPI's jsonable_encoder pass;
+    the content must already be JSON-native (dict, list, str, int, float, None).
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
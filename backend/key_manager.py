@@ -0,0 +1,201 @@
+"""
+Per-key health for the Gemini API keys (GEMINI_API_KEY, GEMINI_API_KEY_2, ...).
+
+All keys are probed concurrently with a countTokens request, which does not
+use generation quota: at startup and then on every health probe
+(HEALTH_LLM_INTERVAL). Each key is tracked as
+
+    unknown    not probed yet (treated as usable)
+    valid      last probe or request succeeded
+    exhausted  answered 429; skipped until exhausted_until (a successful probe
+               does not shorten this, since countTokens uses no generation quota)
+    invalid    rejected as an invalid / unauthorized key; skipped until a probe succeeds
+    error      last probe failed for another reason (network, 5xx); still used
+
+Real requests update the same state, so GeminiClient stops sending user
+requests to a key as soon as it is known to be bad instead of failing one
+first.
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+from typing import Dict, List, Optional
+
+from backend import metrics
+from backend.retry_policy import parse_duration
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENDPOINT = "https://generativelanguage.googleapis.com"
+KEY_PROBE_MODEL = os.getenv("KEY_PROBE_MODEL", "gemini-2.5-flash")
+KEY_PROBE_TIMEOUT = float(os.getenv("KEY_PROBE_TIMEOUT", 5.0))
+# How long a key answering 429 is skipped when the error carries no retry delay
+KEY_EXHAUSTED_COOLDOWN = float(os.getenv("KEY_EXHAUSTED_COOLDOWN", 60.0))
+
+
+def mask_key(key: str) -> str:
+    return f"{key[:4]}...{key[-4:]}" if len(key) > 8 else "***"
+
+
+class KeyState:
+    def __init__(self, index: int, key: str):
+        self.index = index
+        self.key = key
+        self.status = "unknown"
+        self.exhausted_until = 0.0
+        self.latency: Optional[float] = None
+        self.last_checked: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def usable(self, now: Optional[float] = None) -> bool:
+        if self.status == "invalid":
+            return False
+        return self.exhausted_until <= (now if now is not None else time.time())
+
+    def to_dict(self) -> Dict:
+        now = time.time()
+        return {
+            "index": self.index,
+            "status": self.status,
+            "usable": self.usable(now),
+            "exhausted_for_s": round(max(0.0, self.exhausted_until - now), 1),
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "last_checked_s": round(now - self.last_checked, 1) if self.last_checked else None,
+            "last_error": self.last_error,
+        }
+
+
+def _retry_delay(response) -> Optional[float]:
+    """Seconds from a Retry-After header or a google.rpc.RetryInfo detail ("17s")"""
+    seconds = parse_duration(response.headers.get("retry-after"))
+    if seconds is not None:
+        return seconds
+    try:
+        details = response.json().get("error", {}).get("details", [])
+    except ValueError:
+        return None
+    for detail in details:
+        seconds = parse_duration(detail.get("retryDelay")) if isinstance(detail, dict) else None
+        if seconds is not None:
+            return seconds
+    return None
+
+
+class KeyManager:
+    def __init__(self, keys: List[str], endpoint: Optional[str] = None, transport=None):
+        self.states = [KeyState(i, key) for i, key in enumerate(keys)]
+        self.endpoint = (endpoint or os.getenv("GEMINI_API_ENDPOINT") or DEFAULT_ENDPOINT).rstrip("/")
+        # httpx transport override (tests)
+        self.transport = transport
+        self.lock = threading.Lock()
+
+    # ---- state updates (from probes and from real requests) ----
+
+    def _set(self, index: int, status: str, error: Optional[str] = None, exhausted_until: float = 0.0,
+             latency: Optional[float] = None, checked: bool = False):
+        with self.lock:
+            state = self.states[index]
+            if status != state.status:
+                log = logger.info if status == "valid" else logger.warning
+                log(f"API key index {index} ({mask_key(state.key)}) is now {status}" + (f": {error}" if error else ""))
+            state.status = status
+            state.last_error = error
+            state.exhausted_until = exhausted_until
+            if latency is not None:
+                state.latency = latency
+            if checked:
+                state.last_checked = time.time()
+        metrics.LLM_KEY_USABLE.set(1 if state.usable() else 0, key=str(index))
+
+    def mark_valid(self, index: int, latency: Optional[float] = None, checked: bool = False):
+        if self.states[index].status != "valid" or self.states[index].exhausted_until or checked:
+            self._set(index, "valid", latency=latency, checked=checked)
+
+    def mark_exhausted(self, index: int, retry_after: Optional[float] = None, error: Optional[str] = None,
+                       checked: bool = False):
+        cooldown = retry_after if retry_after is not None else KEY_EXHAUSTED_COOLDOWN
+        self._set(index, "exhausted", error, exhausted_until=time.time() + cooldown, checked=checked)
+
+    def mark_invalid(self, index: int, error: Optional[str] = None, checked: bool = False):
+        self._set(index, "invalid", error, checked=checked)
+
+    # ---- selection ----
+
+    def is_usable(self, index: int) -> bool:
+        return self.states[index].usable()
+
+    def usable_indices(self) -> List[int]:
+        now = time.time()
+        return [state.index for state in self.states if state.usable(now)]
+
+    def next_usable(self, after: int) -> Optional[int]:
+        """First usable key after `after` in rotation order (may be `after` itself), or None"""
+        now = time.time()
+        count = len(self.states)
+        for offset in range(1, count + 1):
+            index = (after + offset) % count
+            if self.states[index].usable(now):
+                return index
+        return None
+
+    # ---- probing ----
+
+    async def _probe(self, http, state: KeyState):
+        url = f"{self.endpoint}/v1beta/models/{KEY_PROBE_MODEL}:countTokens"
+        body = {"contents": [{"parts": [{"text": "ping"}]}]}
+        start = time.perf_counter()
+        try:
+            response = await http.post(url, json=body, headers={"x-goog-api-key": state.key})
+        except Exception as e:
+            # Network trouble says nothing about the key itself
+            self._probe_failed(state, f"{type(e).__name__}: {e}")
+            return
+        latency = time.perf_counter() - start
+        metrics.LLM_KEY_PROBE_LATENCY.set(latency, key=str(state.index))
+
+        if response.status_code == 200:
+            self._probe_succeeded(state, latency)
+        elif response.status_code == 429:
+            self.mark_exhausted(state.index, _retry_delay(response), "429 from probe", checked=True)
+        elif response.status_code in (401, 403) or (response.status_code == 400 and "API_KEY_INVALID" in response.text):
+            self.mark_invalid(state.index, f"{response.status_code} {response.text[:200]}", checked=True)
+        else:
+            self._probe_failed(state, f"{response.status_code} {response.text[:200]}")
+
+    def _probe_succeeded(self, state: KeyState, latency: float):
+        """
+        The key is accepted, but countTokens uses no generation quota, so a 429
+        cooldown that has not run out yet stays in place
+        """
+        if state.exhausted_until > time.time():
+            with self.lock:
+                state.latency = latency
+                state.last_checked = time.time()
+        else:
+            self.mark_valid(state.index, latency=latency, checked=True)
+
+    def _probe_failed(self, state: KeyState, error: str):
+        """Inconclusive probe: record the error but keep a known invalid / exhausted status"""
+        if state.status in ("invalid", "exhausted"):
+            with self.lock:
+                state.last_error = error
+                state.last_checked = time.time()
+        else:
+            self._set(state.index, "error", error, checked=True)
+
+    async def probe_all(self):
+        """Probe every key concurrently"""
+        import httpx
+        async with httpx.AsyncClient(timeout=KEY_PROBE_TIMEOUT, transport=self.transport) as http:
+            await asyncio.gather(*(self._probe(http, state) for state in self.states))
+
+    def summary(self) -> Dict:
+        """Key states without the keys themselves (served on the public readiness endpoint)"""
+        return {
+            "keys": len(self.states),
+            "usable": len(self.usable_indices()),
+            "states": [state.to_dict() for state in self.states],
+        }
@@ -0,0 +1,280 @@
+"""
+LLM / embedding providers behind a common interface.
+
+The backend talks to `llm_provider` instead of a specific SDK:
+
+    generate_content(model_name, prompt, system_instruction=None) -> object with .text
+    embed_content(model, content, task_type) -> {"embedding": vector or [vectors]}
+    count_tokens(model_name, text) -> int
+
+Select the implementation with LLM_PROVIDER:
+    gemini  (default) Google Gemini through GeminiClient, with key rotation
+    openai  any OpenAI-compatible server (llama.cpp server, vLLM, Ollama, ...)
+            at OPENAI_BASE_URL, e.g. http://localhost:8080/v1
+    fake    deterministic in-process answers and embeddings, no network
+
+Errors from every provider are google.api_core exceptions (TooManyRequests,
+ServiceUnavailable, ...), so quota handling and model fallback work the same
+for all of them.
+"""
+
+import os
+import time
+import asyncio
+import zlib
+import logging
+from contextlib import contextmanager
+from typing import List, Optional
+
+import numpy as np
+from google.api_core import exceptions as google_exceptions
+
+from backend import metrics
+from backend.retry_policy import RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EMBEDDING_MODEL = "models/text-embedding-004"
+DEFAULT_EMBEDDING_DIMENSIONS = 768
+
+
+class GenerationResult:
+    """Provider-neutral generation response; exposes .text like the Gemini SDK response"""
+
+    def __init__(self, text: str, model: str):
+        self.text = text
+        self.model = model
+
+    def __repr__(self):
+        return f"GenerationResult(model={self.model!r}, text={self.text[:40]!r})"
+
+
+@contextmanager
+def _observe(operation: str, model: str):
+    """Latency / error metrics for providers without their own per-key instrumentation"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        metrics.LLM_ERRORS.inc(operation=operation, model=model, key="-", error=type(e).__name__)
+        raise
+    finally:
+        metrics.LLM_REQUEST_DURATION.observe(time.perf_counter() - start, operation=operation, model=model, key="-")
+
+
+class LLMProvider:
+    name = "base"
+    # Whether count_tokens asks the model's tokenizer (worth calibrating against)
+    exact_token_count = False
+
+    @property
+    def is_configured(self) -> bool:
+        return True
+
+    @property
+    def embedding_model(self) -> str:
+        return DEFAULT_EMBEDDING_MODEL
+
+    @property
+    def embedding_dimensions(self) -> Optional[int]:
+        """Length of the embedding vectors, if known without asking the model"""
+        return DEFAULT_EMBEDDING_DIMENSIONS if self.embedding_model == DEFAULT_EMBEDDING_MODEL else None
+
+    def warm_up(self):
+        """Import / connect ahead of the first request (called in the background at startup)"""
+
+    def probe(self) -> dict:
+        """Cheap request proving the backend answers; raises on failure. Used by the health monitor"""
+        return {}
+
+    def generation_models(self, priority: List[str]) -> List[str]:
+        """Models to try in order; providers without Gemini models substitute their own"""
+        return priority
+
+    def generate_content(self, model_name: str, prompt: str, system_instruction: str = None):
+        raise NotImplementedError
+
+    def embed_content(self, model: str, content, task_type: str = "retrieval_document"):
+        raise NotImplementedError
+
+    def count_tokens(self, model_name: str, text: str) -> int:
+        # Rough estimate (~4 characters per token) when there is no tokenizer endpoint
+        return max(1, len(text) // 4)
+
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+    exact_token_count = True
+
+    def __init__(self, client=None):
+        self._client = client
+
+    @property
+    def client(self):
+        # GeminiClient imports the SDK, so it is only built on first use (or by warm_up)
+        if self._client is None:
+            from backend.gemini_client import GeminiClient
+            self._client = GeminiClient()
+        return self._client
+
+    @property
+    def is_configured(self) -> bool:
+        if self._client is not None:
+            return bool(self._client.api_keys)
+        from backend.gemini_client import load_api_keys
+        return bool(load_api_keys())
+
+    def warm_up(self):
+        self.client
+
+    def probe(self) -> dict:
+        # All keys concurrently; runs in a health-probe worker thread, so it gets its own event loop
+        key_manager = self.client.key_manager
+        asyncio.run(key_manager.probe_all())
+        summary = key_manager.summary()
+        if not summary["usable"]:
+            raise RuntimeError(f"None of the {summary['keys']} Gemini API keys is usable")
+        return {"key_index": self.client.current_key_index, **summary}
+
+    def generate_content(self, model_name: str, prompt: str, system_instruction: str = None):
+        return self.client.generate_content(model_name, prompt, system_instruction=system_instruction)
+
+    def embed_content(self, model: str, content, task_type: str = "retrieval_document"):
+        return self.client.embed_content(model=model, content=content, task_type=task_type)
+
+    def count_tokens(self, model_name: str, text: str) -> int:
+        return self.client.count_tokens(model_name, text)
+
+
+class FakeProvider(LLMProvider):
+    """Deterministic offline provider: same input, same answer and embedding."""
+
+    name = "fake"
+
+    def __init__(self, dimensions: int = DEFAULT_EMBEDDING_DIMENSIONS):
+        self.dimensions = dimensions
+
+    @property
+    def embedding_model(self) -> str:
+        return f"fake-embedding-{self.dimensions}"
+
+    @property
+    def embedding_dimensions(self) -> Optional[int]:
+        return self.dimensions
+
+    def generation_models(self, priority: List[str]) -> List[str]:
+        return ["fake"]
+
+    def generate_content(self, model_name: str, prompt: str, system_instruction: str = None):
+        digest = zlib.crc32(prompt.encode("utf-8"))
+        question = prompt.strip().splitlines()[-1][:120] if prompt.strip() else ""
+        text = f"[fake:{digest:08x}] {question}"
+        return GenerationResult(text, model_name)
+
+    def _embed(self, text: str) -> List[float]:
+        rng = np.random.default_rng(zlib.crc32(text.encode("utf-8")))
+        vector = rng.standard_normal(self.dimensions)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_content(self, model: str, content, task_type: str = "retrieval_document"):
+        if isinstance(content, list):
+            return {"embedding": [self._embed(text) for text in content]}
+        return {"embedding": self._embed(content)}
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """Chat completions and embeddings from an OpenAI-compatible HTTP server."""
+
+    name = "openai"
+
+    def __init__(self, base_url: Optional[str] = None, api_key: Optional[str] = None,
+                 models: Optional[List[str]] = None, embedding_model: Optional[str] = None,
+                 embedding_dimensions: Optional[int] = None,
+                 timeout: Optional[float] = None, transport: Optional["httpx.BaseTransport"] = None):
+        import httpx
+        self.base_url = (base_url or os.getenv("OPENAI_BASE_URL", "http://localhost:8080/v1")).rstrip("/")
+        api_key = api_key if api_key is not None else os.getenv("OPENAI_API_KEY", "")
+        if models is None:
+            models = [m.strip() for m in os.getenv("OPENAI_MODELS", os.getenv("OPENAI_MODEL", "local")).split(",")]
+        self.models = [m for m in models if m]
+        if not self.models:
+            raise ValueError("OpenAI-compatible provider needs at least one model: set OPENAI_MODELS, "
+                             "e.g. OPENAI_MODELS=qwen2.5-7b-instruct")
+        self._embedding_model = embedding_model or os.getenv("OPENAI_EMBEDDING_MODEL", self.models[0])
+        if embedding_dimensions is None and os.getenv("OPENAI_EMBEDDING_DIMENSIONS"):
+            embedding_dimensions = int(os.getenv("OPENAI_EMBEDDING_DIMENSIONS"))
+        self._embedding_dimensions = embedding_dimensions
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.http = httpx.Client(
+            base_url=self.base_url,
+            headers=headers,
+            timeout=timeout or float(os.getenv("OPENAI_TIMEOUT", 120)),
+            transport=transport,
+        )
+        # Transient failures (timeouts, 5xx, refused connections) are retried with backoff
+        self.retry_policy = RetryPolicy()
+
+    @property
+    def embedding_model(self) -> str:
+        return self._embedding_model
+
+    @property
+    def embedding_dimensions(self) -> Optional[int]:
+        return self._embedding_dimensions
+
+    def generation_models(self, priority: List[str]) -> List[str]:
+        return self.models
+
+    def probe(self) -> dict:
+        return {"models": len(self._request("GET", "/models").get("data", []))}
+
+    def _request(self, method: str, path: str, payload: Optional[dict] = None) -> dict:
+        import httpx
+        try:
+            response = self.http.request(method, path, json=payload)
+        except httpx.TimeoutException as e:
+            raise google_exceptions.DeadlineExceeded(f"{self.base_url}{path}: {e}")
+        except httpx.TransportError as e:
+            raise google_exceptions.ServiceUnavailable(f"{self.base_url}{path}: {e}")
+        if response.status_code >= 400:
+            raise google_exceptions.from_http_status(
+                response.status_code, f"{self.base_url}{path}: {response.text[:300]}", response=response
+            )
+        return response.json()
+
+    def generate_content(self, model_name: str, prompt: str, system_instruction: str = None):
+        messages = []
+        if system_instruction:
+            messages.append({"role": "system", "content": system_instruction})
+        messages.append({"role": "user", "content": prompt})
+        with _observe("generate", model_name):
+            data = self.retry_policy.call(self._request, "POST", "/chat/completions",
+                                          {"model": model_name, "messages": messages})
+        return GenerationResult(data["choices"][0]["message"]["content"] or "", data.get("model", model_name))
+
+    def embed_content(self, model: str, content, task_type: str = "retrieval_document"):
+        texts = content if isinstance(content, list) else [content]
+        with _observe("embed", model):
+            data = self.retry_policy.call(self._request, "POST", "/embeddings", {"model": model, "input": texts})
+        vectors = [item["embedding"] for item in sorted(data["data"], key=lambda item: item.get("index", 0))]
+        return {"embedding": vectors if isinstance(content, list) else vectors[0]}
+
+
+PROVIDERS = {
+    "gemini": GeminiProvider,
+    "openai": OpenAICompatibleProvider,
+    "fake": FakeProvider,
+}
+
+
+def create_provider(name: Optional[str] = None) -> LLMProvider:
+    name = (name or os.getenv("LLM_PROVIDER", "gemini")).lower()
+    if name not in PROVIDERS:
+        raise ValueError(f"LLM_PROVIDER must be one of: {', '.join(PROVIDERS)}")
+    provider = PROVIDERS[name]()
+    logger.info(f"Using LLM provider '{provider.name}'")
+    return provider
+
+
+# Singleton instance
+llm_provider = create_provider()
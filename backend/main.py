@@ -3,24 +3,41 @@ FastAPI Backend for Filizlen App
 Handles API endpoints and Gemini AI integration
 """
 
-from fastapi import FastAPI, HTTPException
+# Imported first so the "imports" startup phase covers everything below
+from backend.startup import startup
+from fastapi import FastAPI, HTTPException, Request, Response, UploadFile, File, BackgroundTasks, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from typing import Optional, List
 import os
 from dotenv import load_dotenv
 # Load environment variables immediately
 load_dotenv()
 
-import google.generativeai as genai
 from google.api_core import exceptions as google_exceptions
 from backend import database
+from backend import async_database
 from backend.rag_system import rag_system
-from backend.gemini_client import gemini_client
+from backend.llm_providers import llm_provider
+from backend.prompt_builder import prompt_builder
+from backend.conversation_summarizer import conversation_summarizer
+from backend.chat_sessions import chat_sessions, ANONYMOUS_USER_ID
+from backend.db_writer import db_writer
+from backend import migrations
+from backend import http_cache
+from backend.response_cache import response_cache
+from backend.json_codec import dumps, FastJSONResponse
+from backend import compression
+from backend import bulk_import
+from backend import metrics
+from backend import tracing
+from backend.admission import generation_admission, Overloaded
+from backend import rate_limit
+from backend import health
 from contextlib import asynccontextmanager
-
-# Load environment variables (kept for safety, duplicate is harmless)
-load_dotenv()
+import asyncio
+import hmac
 
 SYSTEM_PROMPT = """
 Sen, “Chatbot Destekli Akıllı Tarım Uygulaması” için özel olarak 
@@ -64,17 +81,47 @@ olabilirim.”
 Son kural: Tüm yanıtların yalnızca Chatbot Destekli Akıllı Tarım Uygulaması kapsamında olmalıdır.
 """
 
+# Model priority list for generation fallback
+MODEL_PRIORITY = [
+    'gemini-2.5-flash',
+    'gemini-2.5-pro',
+    'gemini-pro-latest',
+    'gemini-flash-latest',
+    'gemini-2.0-flash',
+    'gemini-1.5-pro-latest',
+    'gemini-1.5-pro'
+]
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Load RAG data on startup
-    print("INFO: Initializing RAG system...")
+    startup.reset()
+    if "imports" not in startup.phases:
+        startup.record("imports", startup.since_start())
+
+    # Apply pending schema migrations and verify the result
     try:
-        rag_system.load_data()
-        print("INFO: RAG system initialized successfully")
+        with startup.phase("migrations"), database.get_db_connection() as conn:
+            applied = migrations.run_migrations(conn)
+            migrations.verify_schema(conn)
+        if applied:
+            print(f"INFO: Applied schema migrations {applied}")
+        print(f"INFO: Database schema at version {migrations.LATEST_VERSION}")
+        metrics.SCHEMA_VERSION.set(migrations.LATEST_VERSION)
     except Exception as e:
-        print(f"WARNING: RAG system initialization failed: {e}")
+        # Keep serving /health/live for diagnosis, but never report ready on an unverified schema
+        startup.schema_error = f"{type(e).__name__}: {e}"
+        print(f"ERROR: Schema migration/verification failed, worker will not become ready: {e}")
+
+    db_writer.start()
+    # RAG index, LLM SDK and calibration load after the server starts accepting connections
+    startup.spawn(deferred_init())
+    health_monitor.start()
+    print(f"INFO: Accepting requests {startup.since_start():.2f}s after start")
     yield
-    # Clean up (if needed)
+    await health_monitor.stop()
+    # Flush queued chat/search logs before exiting (joins the writer thread, so off the event loop)
+    await asyncio.to_thread(db_writer.stop)
+    database.close_all_connections()
 
 
 # Initialize FastAPI app
@@ -86,6 +133,9 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Per-client limits on the Gemini-backed routes (innermost, so 429s still get CORS headers)
+app.add_middleware(rate_limit.RateLimitMiddleware)
+
 # CORS middleware to allow Streamlit frontend to communicate
 app.add_middleware(
     CORSMiddleware,
@@ -95,19 +145,38 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON responses that are not already encoded (cached ones are)
+app.add_middleware(compression.CompressionMiddleware)
+
+# Per-stage spans in a Server-Timing header, plus the admin-armed profiler
+app.add_middleware(tracing.TracingMiddleware)
+
+# Outermost, so latency includes compression and CORS handling
+app.add_middleware(metrics.MetricsMiddleware)
+
+metrics.DATA_VERSION.set_function(
+    lambda: {(table,): entry["version"] for table, entry in database.get_data_versions().items()}
+)
+
 # Configure Gemini API
-# gemini_client handles configuration automatically
-if not gemini_client.api_keys:
+# gemini_client handles configuration automatically; LLM_PROVIDER can select another backend
+if not llm_provider.is_configured:
     print("Warning: No GEMINI_API_KEY found in environment variables")
 
+# Background database / LLM probes behind /health/ready
+health_monitor = health.create_monitor(llm_provider)
+
 # Request/Response Models
 class ChatRequest(BaseModel):
     message: str
+    # With conversation_id the history is kept server-side and conversation_history is ignored
+    conversation_id: Optional[str] = Field(default=None, min_length=1, max_length=64)
     conversation_history: Optional[List[dict]] = []
 
 class ChatResponse(BaseModel):
     response: str
     status: str
+    conversation_id: Optional[str] = None
 
 class HealthResponse(BaseModel):
     status: str
@@ -148,51 +217,88 @@ class CategoryCreate(BaseModel):
 
 
 
+async def deferred_init():
+    """Startup work that is not needed to accept connections"""
+    print("INFO: Initializing RAG system...")
+    try:
+        with startup.phase("rag_index"):
+            await asyncio.to_thread(rag_system.load_data)
+        print("INFO: RAG system initialized successfully")
+    except Exception as e:
+        # Chat still answers, just without retrieved context
+        startup.rag_error = str(e)
+        print(f"WARNING: RAG system initialization failed: {e}")
+    startup.rag_ready.set()
+
+    if llm_provider.is_configured:
+        try:
+            with startup.phase("llm_provider"):
+                await asyncio.to_thread(llm_provider.warm_up)
+        except Exception as e:
+            print(f"WARNING: LLM provider warm-up failed: {e}")
+
+    # Calibrate the local token estimator against the model tokenizer (off the hot path)
+    if (llm_provider.is_configured and llm_provider.exact_token_count
+            and os.getenv("PROMPT_TOKEN_CALIBRATION", "1") == "1"):
+        await calibrate_token_counter()
+
+    print(f"INFO: Startup complete in {startup.since_start():.2f}s: {startup.summary()['phases']}")
+
+async def calibrate_token_counter():
+    """Fit the prompt token estimator to the generation model's tokenizer"""
+    samples = [SYSTEM_PROMPT] + [doc['content'] for doc in rag_system.documents[:5]]
+    try:
+        await asyncio.to_thread(
+            prompt_builder.counter.calibrate,
+            samples,
+            lambda text: llm_provider.count_tokens(MODEL_PRIORITY[0], text)
+        )
+    except Exception as e:
+        print(f"WARNING: Token estimator calibration failed, using default ratio: {e}")
+
 async def generate_with_fallback(prompt: str):
     """
     Attempts to generate content using a prioritized list of models.
-    If a ResourceExhausted (Quota) error occurs (on all keys), it switches to the next model.
+    If a call still fails after key switching and retries (quota on all keys, repeated
+    transient errors), it switches to the next model.
     Uses GeminiClient which handles key rotation internally for each model.
     """
-    # Priority list as requested
-    MODEL_PRIORITY = [
-        'gemini-2.5-flash',
-        'gemini-2.5-pro',
-        'gemini-pro-latest',
-        'gemini-flash-latest',
-        'gemini-2.0-flash',
-        'gemini-1.5-pro-latest',
-        'gemini-1.5-pro'
-    ]
-    
     last_exception = None
 
-    for model_name in MODEL_PRIORITY:
-        try:
-            print(f"INFO: Attempting generation with model: {model_name}")
-            
-            # GeminiClient handles key rotation and model execution
-            # We pass system prompt if the model supports it (we assume new ones do)
-            # Or we can let the client handle it.
-            # Client's generate_content wrapper handles the call.
-            
-            response = gemini_client.generate_content(
-                model_name=model_name,
-                prompt=prompt,
-                system_instruction=SYSTEM_PROMPT
-            )
-            
-            return response
-            
-        except google_exceptions.ResourceExhausted as e:
-            print(f"WARNING: Quota exceeded for {model_name} on ALL keys. Switching to next model...")
-            last_exception = e
-            continue  # Try the next model
-            
-        except Exception as e:
-            print(f"ERROR: Failed with {model_name}: {str(e)}")
-            last_exception = e
-            continue
+    for model_name in llm_provider.generation_models(MODEL_PRIORITY):
+        # One Server-Timing entry per attempted model
+        with tracing.span("llm", description=model_name) as span:
+            try:
+                print(f"INFO: Attempting generation with model: {model_name}")
+
+                # GeminiClient handles key rotation and model execution
+                # We pass system prompt if the model supports it (we assume new ones do)
+                # Or we can let the client handle it.
+                # Client's generate_content wrapper handles the call.
+
+                # Off the event loop, so queued and other requests keep being served
+                response = await asyncio.to_thread(
+                    llm_provider.generate_content,
+                    model_name=model_name,
+                    prompt=prompt,
+                    system_instruction=SYSTEM_PROMPT
+                )
+
+                return response
+
+            except google_exceptions.TooManyRequests as e:
+                print(f"WARNING: Quota exceeded for {model_name} on ALL keys. Switching to next model...")
+                metrics.LLM_MODEL_FALLBACKS.inc(from_model=model_name)
+                span.description = f"{model_name} failed: ResourceExhausted"
+                last_exception = e
+                continue  # Try the next model
+
+            except Exception as e:
+                print(f"ERROR: Failed with {model_name}: {str(e)}")
+                metrics.LLM_MODEL_FALLBACKS.inc(from_model=model_name)
+                span.description = f"{model_name} failed: {type(e).__name__}"
+                last_exception = e
+                continue
 
     # If loop finishes without returning, raise the last exception
     raise last_exception if last_exception else Exception("All models failed to generate content.")
@@ -208,64 +314,76 @@ async def root():
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint"""
-    gemini_status = "configured" if gemini_client.api_keys else "not_configured"
+    llm_status = "configured" if llm_provider.is_configured else "not_configured"
     return {
         "status": "healthy",
-        "message": f"API is running. Gemini API: {gemini_status}"
+        "message": f"API is running. LLM provider {llm_provider.name}: {llm_status}"
     }
 
+@app.get("/health/live")
+async def liveness():
+    """Process is up and the event loop answers; says nothing about dependencies"""
+    return health_monitor.liveness()
+
+@app.get("/health/ready")
+async def readiness():
+    """200 when this worker should receive traffic, 503 while starting or degraded"""
+    result = health_monitor.readiness()
+    return FastJSONResponse(result, status_code=200 if result["status"] == "ready" else 503)
+
+def overloaded_error(error: Overloaded) -> HTTPException:
+    """503 with Retry-After for requests that could not get a generation slot"""
+    return HTTPException(
+        status_code=503,
+        detail="Sistem şu anda çok yoğun. Lütfen birkaç saniye sonra tekrar deneyin.",
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
 @app.post("/api/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     """
     Chat endpoint that processes user messages using Gemini AI with Fallback
     """
-    if not gemini_client.api_keys:
+    if not llm_provider.is_configured:
         raise HTTPException(
             status_code=500,
             detail="Gemini API key not configured. Please set GEMINI_API_KEY in your .env file"
         )
     
+    if not await startup.wait_for_rag():
+        raise HTTPException(
+            status_code=503,
+            detail="Sistem başlatılıyor, lütfen birkaç saniye sonra tekrar deneyin.",
+            headers={"Retry-After": "5"}
+        )
+
     try:
-        # Build conversation context
-        prompt_text = request.message
-        
-        # If there's conversation history, include it for context
-        if request.conversation_history:
-            context = "\n".join([
-                f"User: {msg.get('user', '')}\nAssistant: {msg.get('assistant', '')}"
-                for msg in request.conversation_history[-5:]
-            ])
-            prompt_text = f"{context}\n\nUser: {request.message}\nAssistant:"
-        
         # RAG Retrieval
-        retrieved_docs = rag_system.search(request.message, top_k=3)
-        
-        context_block = ""
+        retrieved_docs = await asyncio.to_thread(rag_system.search, request.message, top_k=3)
         if retrieved_docs:
             print(f"INFO: Retrieved {len(retrieved_docs)} relevant documents")
-            context_block = "\n".join([
-                f"--- BEGIN CONTEXT FROM DATABASE ({doc['type']}) ---\n{doc['content']}\n--- END CONTEXT ---"
-                for doc in retrieved_docs
-            ])
-            
-            # Augment User Message
-            prompt_text = (
-                f"Kullanıcı Sorusu: {request.message}\n\n"
-                f"İlgili Dokümanlar (Context):\n"
-                f"{context_block}\n\n"
-                f"Yönerge: Yukarıdaki dokümanları temel alarak cevapla. Ancak kullanıcı konsepti anlamaya yönelik genel sorular sorarsa (örn: 'nasıl çalışır?') ve dokümanlar yetersizse, genel tarım bilginle konuyu detaylandır. 'Veri tabanımıza göre' ifadesini gereksiz yere tekrarlama."
+
+        history = request.conversation_history
+        if request.conversation_id:
+            with tracing.span("history"):
+                history = await chat_sessions.get_history(request.conversation_id)
+
+        with tracing.span("prompt"):
+            # Older turns are replaced by a rolling summary built in the background
+            summary, recent_history = conversation_summarizer.prepare(history)
+
+            # Assemble history and context within the token budget
+            prompt = prompt_builder.build(
+                message=request.message,
+                history=recent_history,
+                documents=retrieved_docs,
+                summary=summary
             )
-            
-            # If conversation history exists, we need to bridge it carefully
-            if request.conversation_history:
-                 context = "\n".join([
-                    f"User: {msg.get('user', '')}\nAssistant: {msg.get('assistant', '')}"
-                    for msg in request.conversation_history[-5:]
-                ])
-                 prompt_text = f"{context}\n\n{prompt_text}\nAssistant:"
-
-        # Fallback function
-        response = await generate_with_fallback(prompt_text)
+        print(f"INFO: Prompt ~{prompt.tokens} tokens ({len(prompt.documents)} docs, {prompt.history_turns} turns)")
+
+        # Fallback function, behind the concurrency limit
+        async with generation_admission.slot():
+            response = await generate_with_fallback(prompt.text)
         
         # Handle different response formats
         response_text = None
@@ -290,24 +408,33 @@ async def chat(request: ChatRequest):
             response_text = str(response)
             
         print("INFO: RAGAS metrics calculation (Faithfulness, Answer Relevancy) should be triggered here.")
+
+        if request.conversation_id:
+            chat_sessions.append_turn(request.conversation_id, request.message, response_text)
+        db_writer.log_chat(ANONYMOUS_USER_ID, request.message, response_text, request.conversation_id)
         
         return ChatResponse(
             response=response_text,
-            status="success"
+            status="success",
+            conversation_id=request.conversation_id
         )
     
-    except google_exceptions.ResourceExhausted:
+    except Overloaded as e:
+        raise overloaded_error(e)
+    except google_exceptions.TooManyRequests:
         # If even the fallback fails
         return ChatResponse(
             response="Sistem şu anda çok yoğun (Kota limiti aşıldı). Lütfen bir süre sonra tekrar deneyin.",
-            status="error"
+            status="error",
+            conversation_id=request.conversation_id
         )
     except Exception as e:
         import traceback
         print(f"[CHAT ENDPOINT ERROR]\n{traceback.format_exc()}")
         return ChatResponse(
             response="Sistemde beklenmeyen bir hata oluştu. Lütfen bağlantınızı kontrol edin.",
-            status="error"
+            status="error",
+            conversation_id=request.conversation_id
         )
 
 @app.post("/api/generate-text")
@@ -315,7 +442,7 @@ async def generate_text(prompt: str):
     """
     Simple text generation endpoint
     """
-    if not gemini_client.api_keys:
+    if not llm_provider.is_configured:
         raise HTTPException(
             status_code=500,
             detail="Gemini API key not configured"
@@ -323,7 +450,9 @@ async def generate_text(prompt: str):
     
     try:
         # Use gemini-2.5-flash as default for simple generation
-        response = gemini_client.generate_content("gemini-2.5-flash", prompt)
+        async with generation_admission.slot():
+            model_name = llm_provider.generation_models(["gemini-2.5-flash"])[0]
+            response = await asyncio.to_thread(llm_provider.generate_content, model_name, prompt)
         
         # Handle different response formats
         if hasattr(response, 'text'):
@@ -340,36 +469,107 @@ async def generate_text(prompt: str):
             "status": "success"
         }
     
+    except Overloaded as e:
+        raise overloaded_error(e)
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error generating text: {str(e)}"
         )
 
+# ========== RESPONSE CACHE ==========
+
+async def cached_json(request: Request, response: Response, tags, build, versions=None) -> Response:
+    """
+    Serve a read endpoint from response_cache, building and storing the JSON body on a miss.
+    The body is serialized straight to bytes and compressed at most once per encoding.
+    versions comes from http_cache.resolve_versions(), so no lookup blocks the event loop.
+    """
+    key = response_cache.make_key(request.url.path, request.query_params.multi_items())
+    if versions is None:
+        versions = await http_cache.resolve_versions()
+    entry = response_cache.get(key, versions)
+    if entry is None:
+        entry = response_cache.set(key, dumps(await build()), tags, response_cache.current_versions(tags, versions))
+
+    # Keep the ETag/Cache-Control headers set by http_cache
+    headers = dict(response.headers)
+    headers["Vary"] = http_cache.VARY
+    content = entry.body
+    encoding = compression.negotiate(request.headers.get("accept-encoding"), len(entry.body))
+    if encoding:
+        content = entry.encoded.get(encoding)
+        if content is None:
+            content = compression.compress(entry.body, encoding)
+            response_cache.add_encoding(key, entry, encoding, content)
+        headers["Content-Encoding"] = encoding
+    return Response(content=content, media_type="application/json", headers=headers)
+
+@app.get("/api/admission/stats")
+async def admission_stats():
+    """Generation slots in use, queue depth and average service time"""
+    return {"status": "success", "data": generation_admission.stats()}
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Response cache hit/miss/size statistics"""
+    return {"status": "success", "data": response_cache.stats()}
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus text exposition of the in-process metrics"""
+    # Gauge callbacks may read the database (data_version), so render off the event loop
+    content = await asyncio.to_thread(metrics.render)
+    return Response(content=content, media_type=metrics.CONTENT_TYPE)
+
 # ========== NEWS ENDPOINTS ==========
 
+# Largest page the list endpoints serve; follow next_cursor for more
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 100))
+
 @app.get("/api/news")
-async def get_news(limit: Optional[int] = None, category_id: Optional[int] = None):
-    """Tüm haberleri getir"""
+async def get_news(request: Request, response: Response,
+                   limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+                   category_id: Optional[int] = None, cursor: Optional[str] = None,
+                   fields: Optional[str] = None):
+    """Tüm haberleri getir (cursor ile sonraki sayfa, fields ile yalnızca seçilen alanlar)"""
+    versions = await http_cache.resolve_versions()
+    not_modified = http_cache.conditional_get(request, response, http_cache.NEWS_TABLES, versions=versions)
+    if not_modified:
+        return not_modified
+    async def build():
+        page = await async_database.get_news_page(
+            limit=limit, category_id=category_id, cursor=cursor,
+            fields=database.parse_fields(fields, database.NEWS_FIELDS)
+        )
+        news = page["items"]
+        return {"status": "success", "data": news, "count": len(news), "next_cursor": page["next_cursor"]}
     try:
-        news = database.get_all_news(limit=limit, category_id=category_id)
-        return {"status": "success", "data": news, "count": len(news)}
+        return await cached_json(request, response, http_cache.NEWS_TABLES, build, versions)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching news: {str(e)}")
 
 @app.get("/api/news/{news_id}")
-async def get_news_by_id(news_id: int):
+async def get_news_by_id(news_id: int, request: Request, response: Response):
     """ID'ye göre haber getir"""
-    news = database.get_news_by_id(news_id)
-    if not news:
-        raise HTTPException(status_code=404, detail="News not found")
-    return {"status": "success", "data": news}
+    versions = await http_cache.resolve_versions()
+    not_modified = http_cache.conditional_get(request, response, http_cache.NEWS_TABLES, versions=versions)
+    if not_modified:
+        return not_modified
+    async def build():
+        news = await async_database.get_news_by_id(news_id)
+        if not news:
+            raise HTTPException(status_code=404, detail="News not found")
+        return {"status": "success", "data": news}
+    return await cached_json(request, response, http_cache.NEWS_TABLES, build, versions)
 
 @app.post("/api/news")
 async def create_news(news: NewsCreate):
     """Yeni haber ekle"""
     try:
-        news_id = database.add_news(
+        news_id = await async_database.add_news(
             title=news.title,
             summary=news.summary,
             content=news.content,
@@ -377,6 +577,7 @@ async def create_news(news: NewsCreate):
             image_url=news.image_url,
             published_at=news.published_at
         )
+        response_cache.invalidate("news")
         return {"status": "success", "message": "News created", "id": news_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating news: {str(e)}")
@@ -385,7 +586,7 @@ async def create_news(news: NewsCreate):
 async def update_news(news_id: int, news: NewsUpdate):
     """Haber güncelle"""
     try:
-        success = database.update_news(
+        success = await async_database.update_news(
             news_id=news_id,
             title=news.title,
             summary=news.summary,
@@ -396,6 +597,7 @@ async def update_news(news_id: int, news: NewsUpdate):
         )
         if not success:
             raise HTTPException(status_code=404, detail="News not found")
+        response_cache.invalidate("news")
         return {"status": "success", "message": "News updated"}
     except HTTPException:
         raise
@@ -406,9 +608,10 @@ async def update_news(news_id: int, news: NewsUpdate):
 async def delete_news(news_id: int):
     """Haber sil"""
     try:
-        success = database.delete_news(news_id)
+        success = await async_database.delete_news(news_id)
         if not success:
             raise HTTPException(status_code=404, detail="News not found")
+        response_cache.invalidate("news")
         return {"status": "success", "message": "News deleted"}
     except HTTPException:
         raise
@@ -418,31 +621,53 @@ async def delete_news(news_id: int):
 # ========== TIPS ENDPOINTS ==========
 
 @app.get("/api/tips")
-async def get_tips(limit: Optional[int] = None, difficulty: Optional[str] = None):
-    """Tüm tips'leri getir"""
+async def get_tips(request: Request, response: Response,
+                   limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+                   difficulty: Optional[str] = None, cursor: Optional[str] = None,
+                   fields: Optional[str] = None):
+    """Tüm tips'leri getir (cursor ile sonraki sayfa, fields ile yalnızca seçilen alanlar)"""
+    versions = await http_cache.resolve_versions()
+    not_modified = http_cache.conditional_get(request, response, http_cache.TIPS_TABLES, versions=versions)
+    if not_modified:
+        return not_modified
+    async def build():
+        page = await async_database.get_tips_page(
+            limit=limit, difficulty=difficulty, cursor=cursor,
+            fields=database.parse_fields(fields, database.TIPS_FIELDS)
+        )
+        tips = page["items"]
+        return {"status": "success", "data": tips, "count": len(tips), "next_cursor": page["next_cursor"]}
     try:
-        tips = database.get_all_tips(limit=limit, difficulty=difficulty)
-        return {"status": "success", "data": tips, "count": len(tips)}
+        return await cached_json(request, response, http_cache.TIPS_TABLES, build, versions)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching tips: {str(e)}")
 
 @app.get("/api/tips/{tip_id}")
-async def get_tip_by_id(tip_id: int):
+async def get_tip_by_id(tip_id: int, request: Request, response: Response):
     """ID'ye göre tip getir"""
-    tip = database.get_tip_by_id(tip_id)
-    if not tip:
-        raise HTTPException(status_code=404, detail="Tip not found")
-    return {"status": "success", "data": tip}
+    versions = await http_cache.resolve_versions()
+    not_modified = http_cache.conditional_get(request, response, http_cache.TIPS_TABLES, versions=versions)
+    if not_modified:
+        return not_modified
+    async def build():
+        tip = await async_database.get_tip_by_id(tip_id)
+        if not tip:
+            raise HTTPException(status_code=404, detail="Tip not found")
+        return {"status": "success", "data": tip}
+    return await cached_json(request, response, http_cache.TIPS_TABLES, build, versions)
 
 @app.post("/api/tips")
 async def create_tip(tip: TipCreate):
     """Yeni tip ekle"""
     try:
-        tip_id = database.add_tip(
+        tip_id = await async_database.add_tip(
             title=tip.title,
             content=tip.content,
             difficulty=tip.difficulty
         )
+        response_cache.invalidate("tips")
         return {"status": "success", "message": "Tip created", "id": tip_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating tip: {str(e)}")
@@ -451,7 +676,7 @@ async def create_tip(tip: TipCreate):
 async def update_tip(tip_id: int, tip: TipUpdate):
     """Tip güncelle"""
     try:
-        success = database.update_tip(
+        success = await async_database.update_tip(
             tip_id=tip_id,
             title=tip.title,
             content=tip.content,
@@ -459,6 +684,7 @@ async def update_tip(tip_id: int, tip: TipUpdate):
         )
         if not success:
             raise HTTPException(status_code=404, detail="Tip not found")
+        response_cache.invalidate("tips")
         return {"status": "success", "message": "Tip updated"}
     except HTTPException:
         raise
@@ -469,42 +695,170 @@ async def update_tip(tip_id: int, tip: TipUpdate):
 async def delete_tip(tip_id: int):
     """Tip sil"""
     try:
-        success = database.delete_tip(tip_id)
+        success = await async_database.delete_tip(tip_id)
         if not success:
             raise HTTPException(status_code=404, detail="Tip not found")
+        response_cache.invalidate("tips")
         return {"status": "success", "message": "Tip deleted"}
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting tip: {str(e)}")
 
+# ========== ADMIN ==========
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+def is_admin(request: Request) -> bool:
+    """True if the request carries the configured X-Admin-Token"""
+    token = request.headers.get("x-admin-token", "")
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+# ========== BULK IMPORT ENDPOINT ==========
+
+@app.post("/api/import/{kind}")
+async def import_data(kind: str, request: Request, background_tasks: BackgroundTasks,
+                      file: UploadFile = File(...), fmt: Optional[str] = Query(None, alias="format"),
+                      embed: bool = True):
+    """
+    JSONL/CSV dosyasından toplu haber veya tip ekle (X-Admin-Token gerekir).
+    Satırlar parça parça tek transaction'larla eklenir; RAG indekslemesi yanıt döndükten sonra yapılır.
+    Sonraki bir parça hata verirse önceden eklenen satırlar yine raporlanır ve indekslenir.
+    """
+    if not is_admin(request):
+        raise HTTPException(status_code=403, detail="Admin token required")
+    if kind not in bulk_import.KINDS:
+        raise HTTPException(status_code=404, detail="kind must be one of: news, tips")
+    result = bulk_import.ImportResult(kind=kind)
+    error = None
+    try:
+        await async_database.run_import(
+            bulk_import.import_file, kind, file.file, fmt=fmt, filename=file.filename, result=result
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        error = f"Error importing {kind}: {str(e)}"
+    finally:
+        # Chunks committed before a failure are in the database too
+        if result.ids:
+            response_cache.invalidate(kind)
+            if embed:
+                background_tasks.add_task(bulk_import.index_imported, kind, list(result.ids))
+
+    summary = {**result.summary(), "indexing": embed and result.inserted > 0}
+    if error:
+        return FastJSONResponse({"status": "error", "detail": error, **summary}, status_code=500,
+                                background=background_tasks)
+    return {"status": "success", **summary}
+
+# ========== EXPORT ENDPOINTS ==========
+
+# Tables holding user data can only be exported with the admin token
+PROTECTED_EXPORTS = {"chat_log"}
+
+def ndjson_stream(table: str, since_id: Optional[int], compress: bool):
+    """Yield NDJSON bytes batch by batch, optionally gzip-compressed on the fly"""
+    encoder = compression.StreamEncoder("gzip") if compress else None
+    for batch in database.iter_table_rows(table, since_id=since_id):
+        chunk = b"".join(dumps(row) + b"\n" for row in batch)
+        if encoder:
+            chunk = encoder.compress(chunk)
+        if chunk:
+            yield chunk
+    if encoder:
+        yield encoder.finish()
+
+@app.get("/api/export/{table}")
+async def export_table(table: str, request: Request, since_id: Optional[int] = None, gzip: bool = False):
+    """
+    Tabloyu NDJSON olarak akış halinde dışa aktar (news, tips, chat_log).
+    since_id ile yalnızca yeni satırlar alınabilir; gzip=true ile sıkıştırılmış gönderilir.
+    """
+    if table not in database.EXPORT_TABLES:
+        raise HTTPException(status_code=404, detail=f"table must be one of: {', '.join(database.EXPORT_TABLES)}")
+    if table in PROTECTED_EXPORTS and not is_admin(request):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+    filename = f"{table}.ndjson.gz" if gzip else f"{table}.ndjson"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(ndjson_stream(table, since_id, gzip), media_type="application/x-ndjson", headers=headers)
+
+# ========== PROFILING ENDPOINTS ==========
+
+@app.post("/api/admin/profile")
+async def arm_profiler(request: Request, requests: int = 1, path: Optional[str] = "/api/chat"):
+    """Sample stacks for the next `requests` requests under `path` and write .folded files (admin only)"""
+    if not is_admin(request):
+        raise HTTPException(status_code=403, detail="Admin token required")
+    if requests < 0:
+        raise HTTPException(status_code=400, detail="requests must be >= 0")
+    return {"status": "success", "data": tracing.profiler.arm(requests, path or None)}
+
+@app.get("/api/admin/profile")
+async def profiler_status(request: Request):
+    """Profiler state and the most recent profile files (admin only)"""
+    if not is_admin(request):
+        raise HTTPException(status_code=403, detail="Admin token required")
+    return {"status": "success", "data": tracing.profiler.status()}
+
+# ========== SEARCH ENDPOINT ==========
+
+@app.get("/api/search")
+async def search(q: str, type: str = "all", limit: int = 10):
+    """Haber ve tips içinde tam metin arama (BM25 sıralı, vurgulu snippet)"""
+    if type not in ("all", "news", "tips"):
+        raise HTTPException(status_code=400, detail="type must be one of: all, news, tips")
+    limit = max(1, min(limit, 50))
+    try:
+        results = await async_database.search_content(q, kind=type, limit=limit)
+        db_writer.log_search(ANONYMOUS_USER_ID, q[:255])
+        return FastJSONResponse({"status": "success", "data": results, "count": len(results)})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching: {str(e)}")
+
 # ========== CATEGORIES ENDPOINTS ==========
 
 @app.get("/api/categories")
-async def get_categories():
+async def get_categories(request: Request, response: Response):
     """Tüm kategorileri getir"""
-    try:
-        categories = database.get_all_categories()
+    versions = await http_cache.resolve_versions()
+    not_modified = http_cache.conditional_get(request, response, http_cache.CATEGORY_TABLES, versions=versions)
+    if not_modified:
+        return not_modified
+    async def build():
+        categories = await async_database.get_all_categories()
         return {"status": "success", "data": categories, "count": len(categories)}
+    try:
+        return await cached_json(request, response, http_cache.CATEGORY_TABLES, build, versions)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching categories: {str(e)}")
 
 @app.get("/api/categories/{category_id}")
-async def get_category_by_id(category_id: int):
+async def get_category_by_id(category_id: int, request: Request, response: Response):
     """ID'ye göre kategori getir"""
-    category = database.get_category_by_id(category_id)
-    if not category:
-        raise HTTPException(status_code=404, detail="Category not found")
-    return {"status": "success", "data": category}
+    versions = await http_cache.resolve_versions()
+    not_modified = http_cache.conditional_get(request, response, http_cache.CATEGORY_TABLES, versions=versions)
+    if not_modified:
+        return not_modified
+    async def build():
+        category = await async_database.get_category_by_id(category_id)
+        if not category:
+            raise HTTPException(status_code=404, detail="Category not found")
+        return {"status": "success", "data": category}
+    return await cached_json(request, response, http_cache.CATEGORY_TABLES, build, versions)
 
 @app.post("/api/categories")
 async def create_category(category: CategoryCreate):
     """Yeni kategori ekle"""
     try:
-        category_id = database.add_category(
+        category_id = await async_database.add_category(
             name=category.name,
             description=category.description
         )
+        response_cache.invalidate("news_categories")
         return {"status": "success", "message": "Category created", "id": category_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating category: {str(e)}")
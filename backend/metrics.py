@@ -0,0 +1,329 @@
+"""
+In-process metrics registry with a Prometheus text exposition endpoint.
+
+Counters, gauges and histograms live in memory and are rendered by
+render() in the Prometheus text format (version 0.0.4), so /metrics can be
+scraped by Prometheus or simply read with curl. No client library or
+external service is needed.
+
+All metrics used by the backend are declared at the bottom of this module.
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds: sub-millisecond DB/cache hits up to slow LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Starlette appends "; charset=utf-8" to text/* media types
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Monotonically increasing value per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        return self.values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        with self.lock:
+            items = sorted(self.values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(Metric):
+    """Value that can go up and down, or be read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 function: Optional[Callable] = None):
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+        # Returns a number (no labels) or {label tuple: number}
+        self.function = function
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable):
+        self.function = function
+
+    def get(self, **labels) -> float:
+        return self.values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        if self.function is not None:
+            try:
+                value = self.function()
+            except Exception:
+                # A failing callback must not break the whole scrape
+                return
+            items = sorted(value.items()) if isinstance(value, dict) else [((), value)]
+        else:
+            with self.lock:
+                items = sorted(self.values.items())
+        for key, value in items:
+            if value is None:
+                continue
+            key = key if isinstance(key, tuple) else (key,)
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(Metric):
+    """Cumulative bucketed observations (e.g. latencies) per label set."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # key -> [bucket counts..., sum, count]
+        self.values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block, even if it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        state = self.values.get(self._key(labels))
+        return state[-1] if state else 0
+
+    def samples(self):
+        with self.lock:
+            items = sorted((key, list(state)) for key, state in self.values.items())
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(state[-2])}"
+            yield f"{self.name}_count{labels} {state[-1]}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+        self.lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self.lock:
+            existing = self.metrics.get(metric.name)
+            if existing is not None:
+                # Re-imports (e.g. reloads) get the already registered metric
+                return existing
+            self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self.lock:
+            metrics = list(self.metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = (),
+          function: Optional[Callable] = None) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames, function))
+
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = (),
+              buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request count, latency and in-flight requests per route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        method = scope["method"]
+        HTTP_IN_PROGRESS.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_PROGRESS.dec()
+            # FastAPI stores the matched route in the scope; use its template to bound cardinality
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, method=method, route=path)
+            HTTP_REQUESTS.inc(method=method, route=path, status=status["code"])
+
+
+# ========== Backend metrics ==========
+
+# HTTP
+HTTP_REQUESTS = counter("http_requests_total", "HTTP requests by route and status",
+                        ("method", "route", "status"))
+HTTP_REQUEST_DURATION = histogram("http_request_duration_seconds", "HTTP request latency by route",
+                                  ("method", "route"))
+HTTP_IN_PROGRESS = gauge("http_requests_in_progress", "HTTP requests currently being served")
+HTTP_NOT_MODIFIED = counter("http_not_modified_total", "Conditional GETs answered with 304", ("route",))
+
+# RAG
+RAG_SEARCH_DURATION = histogram("rag_search_duration_seconds", "RAG search latency (embed + similarity)")
+RAG_QUERY_EMBED_DURATION = histogram("rag_query_embed_duration_seconds", "Query embedding latency")
+RAG_SEARCH_RESULTS = histogram("rag_search_results", "Documents returned per RAG search",
+                               buckets=(0, 1, 2, 3, 5, 10))
+RAG_INDEX_DOCUMENTS = gauge("rag_index_documents", "Documents in the RAG index")
+RAG_INDEX_VERSION = gauge("rag_index_version", "Incremented whenever the RAG index is (re)loaded or extended")
+
+# Gemini / LLM
+LLM_REQUEST_DURATION = histogram("llm_request_duration_seconds", "Gemini call latency by operation, model and key index",
+                                 ("operation", "model", "key"))
+LLM_ERRORS = counter("llm_errors_total", "Failed Gemini calls by operation, model, key index and error type",
+                     ("operation", "model", "key", "error"))
+LLM_KEY_ROTATIONS = counter("llm_key_rotations_total", "API key rotations")
+LLM_RETRY_DECISIONS = counter("llm_retry_decisions_total", "Failed LLM attempts by error class", ("kind",))
+LLM_RETRY_WAIT = histogram("llm_retry_wait_seconds", "Backoff waits before retrying an LLM call")
+LLM_KEY_USABLE = gauge("llm_key_usable", "1 unless the API key is known to be invalid or exhausted", ("key",))
+LLM_KEY_PROBE_LATENCY = gauge("llm_key_probe_latency_seconds", "Latency of the last key probe", ("key",))
+LLM_MODEL_FALLBACKS = counter("llm_model_fallbacks_total", "Fallbacks to the next model in MODEL_PRIORITY",
+                              ("from_model",))
+
+# Database
+DB_QUERY_DURATION = histogram("db_query_duration_seconds", "Time spent in a database connection block",
+                              ("mode",))
+DB_WRITE_LOCK_WAIT = histogram("db_write_lock_wait_seconds", "Time waiting for the shared write connection")
+DB_CALL_DURATION = histogram("db_call_duration_seconds", "Async database call latency including pool queueing",
+                             ("function",))
+DATA_VERSION = gauge("data_version", "data_versions counter per table", ("table",))
+SCHEMA_VERSION = gauge("schema_version", "Applied schema migration version")
+DB_WRITER_SPILLED = counter("db_writer_spilled_rows_total", "Log rows spilled to disk by the background writer")
+DB_WRITER_DROPPED = counter("db_writer_dropped_rows_total", "Log rows the background writer could neither write nor spill",
+                            ("table",))
+
+# Caches
+RESPONSE_CACHE_REQUESTS = counter("response_cache_requests_total", "Response cache lookups", ("result",))
+RESPONSE_CACHE_ENTRIES = gauge("response_cache_entries", "Entries in the response cache")
+RESPONSE_CACHE_BYTES = gauge("response_cache_bytes", "Bytes held by the response cache")
+CHAT_SESSION_REQUESTS = counter("chat_session_cache_requests_total", "Chat session LRU lookups", ("result",))
+
+# Admission control
+ADMISSION_ACTIVE = gauge("admission_active", "Requests holding a generation slot")
+ADMISSION_QUEUE_DEPTH = gauge("admission_queue_depth", "Requests waiting for a generation slot")
+ADMISSION_WAIT = histogram("admission_wait_seconds", "Time spent waiting for a generation slot")
+ADMISSION_REJECTIONS = counter("admission_rejections_total", "Requests rejected with 503", ("reason",))
+
+# Rate limiting
+RATE_LIMITED = counter("rate_limited_total", "Requests rejected with 429", ("route",))
+RATE_LIMIT_CLIENTS = gauge("rate_limit_clients", "Client counters held by the rate limiter")
+
+# Startup
+STARTUP_PHASE_SECONDS = gauge("startup_phase_seconds", "Duration of each startup phase", ("phase",))
+
+# Health probes
+HEALTH_PROBE_OK = gauge("health_probe_ok", "1 if the last background health probe passed", ("check",))
+HEALTH_PROBE_LATENCY = gauge("health_probe_latency_seconds", "Latency of the last background health probe", ("check",))
@@ -0,0 +1,213 @@
+"""
+Versioned schema migrations.
+
+Applied migrations are recorded in the schema_version table. Every migration
+is idempotent, so running them against a database that already has some of
+the changes (e.g. from an older init_db.py) is safe. The backend runs pending
+migrations and verifies the schema on startup, so existing deployments pick up
+new columns and indexes without a manual rebuild.
+"""
+
+import re
+import sqlite3
+from typing import Callable, List, Tuple, Union
+
+
+def creates(**objects: List[str]):
+    """
+    Declare what a callable migration creates, e.g. index=[...], trigger=[...] or
+    column=["table.column"], so verify_schema checks it like the SQL migrations.
+    """
+    def decorate(func):
+        func.creates = {kind.upper(): names for kind, names in objects.items()}
+        return func
+    return decorate
+
+
+@creates(column=["chat_log.conversation_id"], index=["idx_chat_conversation"])
+def _add_chat_conversation_id(cursor: sqlite3.Cursor):
+    cursor.execute("PRAGMA table_info(chat_log)")
+    columns = [row[1] for row in cursor.fetchall()]
+    if "conversation_id" not in columns:
+        cursor.execute("ALTER TABLE chat_log ADD COLUMN conversation_id VARCHAR(64)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_chat_conversation ON chat_log(conversation_id, id)")
+
+
+def _fts_statements(table: str, columns: List[str]) -> List[str]:
+    """External-content FTS5 index over table plus the triggers keeping it in sync"""
+    fts = f"{table}_fts"
+    cols = ", ".join(columns)
+    new_values = ", ".join(f"new.{c}" for c in columns)
+    old_values = ", ".join(f"old.{c}" for c in columns)
+    return [
+        # remove_diacritics folds ç/ş/ğ/ö/ü; prefix indexes speed up suffix-stripped (prefix) queries
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {cols}, content='{table}', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values});
+        END""",
+        # Index rows that existed before the triggers
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+VERSIONED_TABLES = ["news", "tips", "news_categories"]
+
+
+def _data_version_statements() -> List[str]:
+    """Per-table change counters bumped by triggers, used for HTTP ETags"""
+    statements = [
+        """CREATE TABLE IF NOT EXISTS data_versions (
+            table_name VARCHAR(64) PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""",
+    ]
+    for table in VERSIONED_TABLES:
+        statements.append(f"INSERT OR IGNORE INTO data_versions (table_name) VALUES ('{table}')")
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            statements.append(
+                f"""CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()} AFTER {event} ON {table} BEGIN
+                    UPDATE data_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+                    WHERE table_name = '{table}';
+                END"""
+            )
+    return statements
+
+
+# (version, name, SQL statements or a callable taking a cursor)
+Migration = Tuple[int, str, Union[List[str], Callable[[sqlite3.Cursor], None]]]
+
+MIGRATIONS: List[Migration] = [
+    (1, "chat_log.conversation_id for server-side sessions", _add_chat_conversation_id),
+    (2, "keyset pagination indexes for news and tips", [
+        # SQLite appends the rowid (id) to every index entry, so (published_at)
+        # also serves ORDER BY published_at DESC, id DESC
+        "CREATE INDEX IF NOT EXISTS idx_news_published ON news(published_at)",
+        "CREATE INDEX IF NOT EXISTS idx_news_category_published ON news(category_id, published_at)",
+        "CREATE INDEX IF NOT EXISTS idx_tips_created ON tips(created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_tips_difficulty_created ON tips(difficulty, created_at)",
+        # Superseded by idx_news_category_published
+        "DROP INDEX IF EXISTS idx_news_category",
+    ]),
+    (3, "per-user history indexes", [
+        "CREATE INDEX IF NOT EXISTS idx_chat_user_created ON chat_log(user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_search_user_created ON search_history(user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_fav_user_created ON favorite_news(user_id, created_at)",
+        # Superseded by the composite indexes above
+        "DROP INDEX IF EXISTS idx_chat_user",
+        "DROP INDEX IF EXISTS idx_search_user",
+        "DROP INDEX IF EXISTS idx_fav_user",
+    ]),
+    (4, "FTS5 full-text search over news and tips",
+        _fts_statements("news", ["title", "summary", "content"])
+        + _fts_statements("tips", ["title", "content"])),
+    (5, "data version counters for conditional GET", _data_version_statements()),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+class SchemaError(Exception):
+    """Raised when the database schema does not match the migrations"""
+
+
+def _ensure_version_table(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.commit()
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    """Highest applied migration version (0 for a database without schema_version)"""
+    try:
+        row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return row[0] or 0
+
+
+def run_migrations(conn: sqlite3.Connection) -> List[int]:
+    """Apply pending migrations, each in its own transaction. Returns applied versions."""
+    _ensure_version_table(conn)
+    applied = []
+    for version, name, steps in MIGRATIONS:
+        # BEGIN IMMEDIATE serializes concurrent workers starting at the same time
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM schema_version WHERE version = ?", (version,)).fetchone():
+                conn.rollback()
+                continue
+            cursor = conn.cursor()
+            if callable(steps):
+                steps(cursor)
+            else:
+                for statement in steps:
+                    cursor.execute(statement)
+            cursor.execute("INSERT INTO schema_version (version, name) VALUES (?, ?)", (version, name))
+            conn.commit()
+            applied.append(version)
+        except Exception:
+            conn.rollback()
+            raise
+    return applied
+
+
+def _expected_objects(kind: str) -> List[str]:
+    """Index or trigger names (or table.column for COLUMN) the migrations create and do not drop later"""
+    created, dropped = [], set()
+    for version, _, steps in MIGRATIONS:
+        if callable(steps):
+            if not hasattr(steps, "creates"):
+                raise SchemaError(f"Migration {version} does not declare what it creates (use @creates)")
+            created.extend(steps.creates.get(kind, []))
+            continue
+        for statement in steps:
+            match = re.match(rf"CREATE {kind} IF NOT EXISTS (\w+)", statement)
+            if match:
+                created.append(match.group(1))
+            match = re.match(rf"DROP {kind} IF EXISTS (\w+)", statement)
+            if match:
+                dropped.add(match.group(1))
+    return [name for name in created if name not in dropped]
+
+
+def _existing_columns(conn: sqlite3.Connection, names: List[str]) -> set:
+    columns = set()
+    for table in {name.split(".")[0] for name in names}:
+        columns.update(f"{table}.{row[1]}" for row in conn.execute(f"PRAGMA table_info({table})"))
+    return columns
+
+
+def verify_schema(conn: sqlite3.Connection):
+    """Raise SchemaError if migrations are missing or expected columns/indexes/triggers are absent"""
+    version = current_version(conn)
+    if version < LATEST_VERSION:
+        raise SchemaError(f"Schema version {version} is behind latest {LATEST_VERSION}")
+
+    expected_columns = _expected_objects("COLUMN")
+    missing = [name for name in expected_columns if name not in _existing_columns(conn, expected_columns)]
+    if missing:
+        raise SchemaError(f"Missing columns: {', '.join(missing)}")
+
+    for kind in ("INDEX", "TRIGGER"):
+        existing = {row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = ?", (kind.lower(),)
+        )}
+        missing = [name for name in _expected_objects(kind) if name not in existing]
+        if missing:
+            raise SchemaError(f"Missing {kind.lower()}s: {', '.join(missing)}")
@@ -0,0 +1,188 @@
+"""
+Prompt assembly with token budgeting for the chat endpoint.
+
+Packs conversation history (newest-first) and retrieved documents (best score
+first) into a fixed token budget so prompt size stays predictable.
+"""
+
+import os
+import math
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Gemini's tokenizer averages roughly 3 characters per token on Turkish text
+DEFAULT_CHARS_PER_TOKEN = 3.0
+MIN_CHARS_PER_TOKEN = 1.5
+MAX_CHARS_PER_TOKEN = 6.0
+
+INSTRUCTION = (
+    "Yönerge: Yukarıdaki dokümanları temel alarak cevapla. Ancak kullanıcı konsepti anlamaya "
+    "yönelik genel sorular sorarsa (örn: 'nasıl çalışır?') ve dokümanlar yetersizse, genel tarım "
+    "bilginle konuyu detaylandır. 'Veri tabanımıza göre' ifadesini gereksiz yere tekrarlama."
+)
+
+
+class TokenCounter:
+    """Local token estimator, optionally calibrated against the model's count_tokens."""
+
+    def __init__(self, chars_per_token: float = DEFAULT_CHARS_PER_TOKEN):
+        self.chars_per_token = chars_per_token
+        self.calibrated = False
+
+    def count(self, text: str) -> int:
+        """Estimate the number of tokens in text"""
+        if not text:
+            return 0
+        return int(math.ceil(len(text) / self.chars_per_token))
+
+    def calibrate(self, samples: List[str], remote_count: Callable[[str], int]) -> float:
+        """
+        Fit chars_per_token to the model tokenizer using a few sample texts.
+        remote_count is called once per sample, so keep this off the hot path.
+        """
+        total_chars = 0
+        total_tokens = 0
+        for sample in samples:
+            if not sample:
+                continue
+            tokens = remote_count(sample)
+            if tokens:
+                total_chars += len(sample)
+                total_tokens += tokens
+
+        if total_tokens:
+            ratio = total_chars / total_tokens
+            self.chars_per_token = min(max(ratio, MIN_CHARS_PER_TOKEN), MAX_CHARS_PER_TOKEN)
+            self.calibrated = True
+            logger.info(f"Token estimator calibrated: {self.chars_per_token:.2f} chars/token")
+        return self.chars_per_token
+
+
+@dataclass
+class BuiltPrompt:
+    text: str
+    tokens: int
+    documents: List[Dict] = field(default_factory=list)
+    history_turns: int = 0
+
+
+def format_turn(turn: Dict) -> str:
+    """Format a single {'user': ..., 'assistant': ...} history turn, skipping empty sides"""
+    lines = []
+    if turn.get('user'):
+        lines.append(f"User: {turn['user']}")
+    if turn.get('assistant'):
+        lines.append(f"Assistant: {turn['assistant']}")
+    return "\n".join(lines)
+
+
+def format_document(doc: Dict) -> str:
+    return (
+        f"--- BEGIN CONTEXT FROM DATABASE ({doc['type']}) ---\n"
+        f"{doc['content']}\n"
+        f"--- END CONTEXT ---"
+    )
+
+
+class PromptBuilder:
+    """Builds the chat prompt within a configurable token budget."""
+
+    def __init__(self, counter: Optional[TokenCounter] = None, budget: Optional[int] = None,
+                 max_history_turns: Optional[int] = None, history_share: Optional[float] = None,
+                 min_document_tokens: int = 64):
+        self.counter = counter or TokenCounter()
+        self.budget = budget or int(os.getenv("PROMPT_TOKEN_BUDGET", 2000))
+        self.max_history_turns = max_history_turns or int(os.getenv("PROMPT_HISTORY_TURNS", 5))
+        # Share of the free budget history may claim before documents are packed
+        self.history_share = history_share if history_share is not None else float(
+            os.getenv("PROMPT_HISTORY_SHARE", 0.35)
+        )
+        self.min_document_tokens = min_document_tokens
+
+    def _pack_history(self, history: List[Dict], budget: int) -> List[str]:
+        """Keep the newest turns that fit in budget, returned in chronological order"""
+        packed = []
+        used = 0
+        for turn in reversed(history[-self.max_history_turns:]):
+            text = format_turn(turn)
+            if not text:
+                continue
+            tokens = self.counter.count(text) + 1
+            if used + tokens > budget:
+                break
+            packed.append(text)
+            used += tokens
+        packed.reverse()
+        return packed
+
+    def _pack_documents(self, documents: List[Dict], budget: int) -> List[Dict]:
+        """Pack documents by descending score, truncating the last one if worthwhile"""
+        packed = []
+        used = 0
+        ranked = sorted(documents, key=lambda d: d.get('score', 0.0), reverse=True)
+        for doc in ranked:
+            text = format_document(doc)
+            tokens = self.counter.count(text) + 1
+            remaining = budget - used
+            if tokens <= remaining:
+                packed.append(doc)
+                used += tokens
+                continue
+            if remaining >= self.min_document_tokens:
+                overhead = self.counter.count(format_document({**doc, 'content': ''})) + 1
+                max_chars = int((remaining - overhead) * self.counter.chars_per_token)
+                if max_chars > 0:
+                    packed.append({**doc, 'content': doc['content'][:max_chars].rstrip() + " ..."})
+            break
+        return packed
+
+    def build(self, message: str, history: Optional[List[Dict]] = None,
+              documents: Optional[List[Dict]] = None, summary: Optional[str] = None) -> BuiltPrompt:
+        """Assemble the final prompt text for a chat turn, optionally led by a conversation summary"""
+        history = history or []
+        documents = documents or []
+
+        if documents:
+            fixed = f"Kullanıcı Sorusu: {message}\n\nİlgili Dokümanlar (Context):\n\n\n{INSTRUCTION}\nAssistant:"
+        else:
+            fixed = f"User: {message}\nAssistant:"
+        if summary:
+            summary_text = f"Önceki konuşmanın özeti: {summary}"
+            fixed = f"{summary_text}\n{fixed}"
+        free = max(self.budget - self.counter.count(fixed), 0)
+
+        history_budget = int(free * self.history_share) if documents else free
+        history_parts = self._pack_history(history, history_budget)
+        history_tokens = sum(self.counter.count(part) + 1 for part in history_parts)
+        packed_docs = self._pack_documents(documents, free - history_tokens)
+
+        context = "\n".join(([summary_text] if summary else []) + history_parts)
+
+        if packed_docs:
+            context_block = "\n".join(format_document(doc) for doc in packed_docs)
+            prompt_text = (
+                f"Kullanıcı Sorusu: {message}\n\n"
+                f"İlgili Dokümanlar (Context):\n"
+                f"{context_block}\n\n"
+                f"{INSTRUCTION}"
+            )
+            if context:
+                prompt_text = f"{context}\n\n{prompt_text}\nAssistant:"
+        elif context:
+            prompt_text = f"{context}\n\nUser: {message}\nAssistant:"
+        else:
+            prompt_text = message
+
+        return BuiltPrompt(
+            text=prompt_text,
+            tokens=self.counter.count(prompt_text),
+            documents=packed_docs,
+            history_turns=len(history_parts)
+        )
+
+
+# Singleton instance
+prompt_builder = PromptBuilder()
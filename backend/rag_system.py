@@ -3,9 +3,9 @@ import os
 import json
 import pickle
 import numpy as np
-import google.generativeai as genai
 from typing import List, Dict, Any
 import logging
+import threading
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -14,25 +14,45 @@ logger = logging.getLogger(__name__)
 # Try to import database, handling potential path issues
 try:
     from backend import database
+    from backend import metrics
+    from backend import tracing
 except ImportError:
     import database
+    import metrics
+    import tracing
 
 class LightweightRAG:
     def __init__(self):
         self.documents = []  # Stores metadata and text
         self.embeddings = None # Stores numpy array of embeddings
-        # GeminiClient handles API keys and configuration
-        from backend.gemini_client import gemini_client
-        self.client = gemini_client
-        
-        self.embedding_model = "models/text-embedding-004" 
+        # LLM_PROVIDER selects Gemini (default), an OpenAI-compatible server or the fake provider
+        from backend.llm_providers import llm_provider
+        self.client = llm_provider
+
+        self.embedding_model = llm_provider.embedding_model
+        # Stored with the cache: vectors from another provider/model are not comparable
+        self.embedding_fingerprint = f"{llm_provider.name}:{self.embedding_model}"
         self.cache_file = os.path.join(os.path.dirname(__file__), "rag_cache.pkl")
+        # batchEmbedContents accepts up to 100 texts per call
+        self.batch_size = int(os.getenv("RAG_EMBED_BATCH_SIZE", 20))
+        # Serializes incremental additions (bulk imports) against each other
+        self.update_lock = threading.Lock()
+        # Bumped whenever the index is loaded, rebuilt or extended
+        self.version = 0
+
+    def embedding_dimensions(self) -> int:
+        """Vector length of the index: as reported by the provider, else from the loaded embeddings"""
+        if self.client.embedding_dimensions:
+            return self.client.embedding_dimensions
+        if self.embeddings is not None and self.embeddings.ndim == 2 and self.embeddings.shape[1]:
+            return self.embeddings.shape[1]
+        raise ValueError(f"Embedding size of {self.embedding_fingerprint} is unknown "
+                         "(set OPENAI_EMBEDDING_DIMENSIONS)")
 
     def _get_embedding(self, text: str) -> np.ndarray:
         """Get embedding for a single text"""
         try:
-            # text-embedding-004 supports 768 dimensions
-            # Use GeminiClient for retry logic
+            # Use the provider for retry logic
             result = self.client.embed_content(
                 model=self.embedding_model,
                 content=text,
@@ -41,7 +61,101 @@ class LightweightRAG:
             return np.array(result['embedding'])
         except Exception as e:
             logger.error(f"Embedding error: {e}")
-            return np.zeros(768) # Return zero vector on failure
+            return np.zeros(self.embedding_dimensions()) # Return zero vector on failure
+
+    @staticmethod
+    def _news_document(item: Dict) -> Dict:
+        text = f"News Title: {item['title']}\nSummary: {item['summary']}\nContent: {item['content']}"
+        return {
+            "id": f"news_{item['id']}",
+            "type": "news",
+            "content": text,
+            "metadata": item
+        }
+
+    @staticmethod
+    def _tip_document(item: Dict) -> Dict:
+        text = f"Tip Title: {item['title']}\nDifficulty: {item.get('difficulty', 'General')}\nContent: {item['content']}"
+        return {
+            "id": f"tip_{item['id']}",
+            "type": "tip",
+            "content": text,
+            "metadata": item
+        }
+
+    def _embed_documents(self, docs: List[Dict]) -> List:
+        """Embed document texts in batches, falling back to one call per text on failure"""
+        embeddings_list = []
+        batch_texts = [d['content'] for d in docs]
+        for i in range(0, len(batch_texts), self.batch_size):
+            batch = batch_texts[i:i+self.batch_size]
+            try:
+                # Proper batch embedding call
+                result = self.client.embed_content(
+                    model=self.embedding_model,
+                    content=batch,
+                    task_type="retrieval_document"
+                )
+                # Helper: embed_content returns dict, if batch it returns 'embedding' as list of lists
+                # BUT the python library behavior varies slightly by version. 
+                # Ideally 'embedding' key contains the list.
+                if 'embedding' in result:
+                    batch_embeddings = result['embedding']
+                    embeddings_list.extend(batch_embeddings)
+                else:
+                    # Fallback if structure is different
+                    logger.error("Unexpected embedding result format")
+            except Exception as e:
+                logger.error(f"Batch embedding failed: {e}. Falling back to single.")
+                # Fallback to single
+                for text in batch:
+                    embeddings_list.append(self._get_embedding(text))
+        return embeddings_list
+
+    def save_cache(self):
+        try:
+            with open(self.cache_file, 'wb') as f:
+                pickle.dump({
+                    'documents': self.documents,
+                    'embeddings': self.embeddings,
+                    'embedding_fingerprint': self.embedding_fingerprint
+                }, f)
+        except Exception as e:
+            logger.error(f"Could not save cache: {e}")
+
+    def add_documents(self, news_items: List[Dict] = None, tip_items: List[Dict] = None,
+                      save: bool = True) -> int:
+        """
+        Embed newly inserted news/tips and append them to the index without a full rebuild.
+        Pass save=False when adding several chunks and call save_cache() once at the end.
+        """
+        docs = [self._news_document(item) for item in news_items or []]
+        docs += [self._tip_document(item) for item in tip_items or []]
+        if not docs:
+            return 0
+
+        embeddings_list = self._embed_documents(docs)
+        if len(embeddings_list) != len(docs):
+            logger.error("Mismatch in docs and embeddings counts! Skipping incremental update.")
+            return 0
+
+        with self.update_lock:
+            new_embeddings = np.array(embeddings_list)
+            if self.embeddings is None or len(self.documents) == 0:
+                embeddings = new_embeddings
+                documents = docs
+            else:
+                embeddings = np.vstack([self.embeddings, new_embeddings])
+                documents = self.documents + docs
+            # Documents first: a concurrent search never indexes past the end of the list
+            self.documents = documents
+            self.embeddings = embeddings
+            self.version += 1
+            if save:
+                self.save_cache()
+
+        logger.info(f"Added {len(docs)} documents to the RAG index.")
+        return len(docs)
 
     def load_data(self, force_refresh: bool = False):
         """Load data from SQLite and build index"""
@@ -50,10 +164,16 @@ class LightweightRAG:
             try:
                 with open(self.cache_file, 'rb') as f:
                     data = pickle.load(f)
+                # Caches written before the fingerprint was stored hold Gemini embeddings
+                fingerprint = data.get('embedding_fingerprint', "gemini:models/text-embedding-004")
+                if fingerprint != self.embedding_fingerprint:
+                    logger.info(f"Cache embeddings are from {fingerprint}, rebuilding for {self.embedding_fingerprint}.")
+                else:
                     self.documents = data['documents']
                     self.embeddings = data['embeddings']
-                logger.info(f"Loaded {len(self.documents)} documents from cache.")
-                return
+                    self.version += 1
+                    logger.info(f"Loaded {len(self.documents)} documents from cache.")
+                    return
             except Exception as e:
                 logger.warning(f"Failed to load cache: {e}")
 
@@ -64,28 +184,14 @@ class LightweightRAG:
         # Fetch News
         try:
             news_items = database.get_all_news()
-            for item in news_items:
-                text = f"News Title: {item['title']}\nSummary: {item['summary']}\nContent: {item['content']}"
-                all_docs.append({
-                    "id": f"news_{item['id']}",
-                    "type": "news",
-                    "content": text,
-                    "metadata": item
-                })
+            all_docs.extend(self._news_document(item) for item in news_items)
         except Exception as e:
             logger.error(f"Error fetching news: {e}")
 
         # Fetch Tips
         try:
             tips_items = database.get_all_tips()
-            for item in tips_items:
-                text = f"Tip Title: {item['title']}\nDifficulty: {item.get('difficulty', 'General')}\nContent: {item['content']}"
-                all_docs.append({
-                    "id": f"tip_{item['id']}",
-                    "type": "tip",
-                    "content": text,
-                    "metadata": item
-                })
+            all_docs.extend(self._tip_document(item) for item in tips_items)
         except Exception as e:
             logger.error(f"Error fetching tips: {e}")
 
@@ -93,39 +199,10 @@ class LightweightRAG:
             logger.warning("No documents found in database.")
             return
 
-        # 3. Create Embeddings (Batching if possible, but loop for safety)
-        # Note: Gemini API has rate limits. simple loop is fine for small DB.
-        embeddings_list = []
+        # 3. Create Embeddings (Gemini accepts batches)
+        # Note: Gemini API has rate limits; RAG_EMBED_BATCH_SIZE texts per call.
         logger.info(f"Embedding {len(all_docs)} documents...")
-        
-        batch_texts = [d['content'] for d in all_docs]
-        
-        # Batch processing (Gemini accepts batches)
-        # Check API limits, usually 100 per call is safe for text-embedding-004
-        BATCH_SIZE = 20 
-        for i in range(0, len(batch_texts), BATCH_SIZE):
-            batch = batch_texts[i:i+BATCH_SIZE]
-            try:
-                # Proper batch embedding call
-                result = self.client.embed_content(
-                    model=self.embedding_model,
-                    content=batch,
-                    task_type="retrieval_document"
-                )
-                # Helper: embed_content returns dict, if batch it returns 'embedding' as list of lists
-                # BUT the python library behavior varies slightly by version. 
-                # Ideally 'embedding' key contains the list.
-                if 'embedding' in result:
-                    batch_embeddings = result['embedding']
-                    embeddings_list.extend(batch_embeddings)
-                else:
-                    # Fallback if structure is different
-                    logger.error("Unexpected embedding result format")
-            except Exception as e:
-                logger.error(f"Batch embedding failed: {e}. Falling back to single.")
-                # Fallback to single
-                for text in batch:
-                    embeddings_list.append(self._get_embedding(text))
+        embeddings_list = self._embed_documents(all_docs)
 
         # 4. Finalize
         self.documents = all_docs
@@ -133,19 +210,14 @@ class LightweightRAG:
         if len(embeddings_list) != len(all_docs):
             logger.error("Mismatch in docs and embeddings counts!")
             # Fallback re-construct to be safe
-            self.embeddings = np.array([np.zeros(768)])
+            dimensions = len(embeddings_list[0]) if embeddings_list else self.embedding_dimensions()
+            self.embeddings = np.array([np.zeros(dimensions)])
         else:
             self.embeddings = np.array(embeddings_list)
+        self.version += 1
 
         # 5. Save Cache
-        try:
-            with open(self.cache_file, 'wb') as f:
-                pickle.dump({
-                    'documents': self.documents,
-                    'embeddings': self.embeddings
-                }, f)
-        except Exception as e:
-            logger.error(f"Could not save cache: {e}")
+        self.save_cache()
             
         logger.info("RAG Index build completed.")
 
@@ -154,13 +226,20 @@ class LightweightRAG:
         if self.embeddings is None or len(self.documents) == 0:
             return []
 
+        with metrics.RAG_SEARCH_DURATION.time(), tracing.span("rag_search"):
+            results = self._search(query, top_k)
+        metrics.RAG_SEARCH_RESULTS.observe(len(results))
+        return results
+
+    def _search(self, query: str, top_k: int) -> List[Dict]:
         try:
             # Embed query
-            query_content = self.client.embed_content(
-                model=self.embedding_model,
-                content=query,
-                task_type="retrieval_query"
-            )
+            with metrics.RAG_QUERY_EMBED_DURATION.time(), tracing.span("rag_embed"):
+                query_content = self.client.embed_content(
+                    model=self.embedding_model,
+                    content=query,
+                    task_type="retrieval_query"
+                )
             query_vec = np.array(query_content['embedding'])
             
             # Simple Cosine Similarity: (A . B) / (|A| * |B|)
@@ -204,3 +283,6 @@ class LightweightRAG:
 
 # Singleton instance
 rag_system = LightweightRAG()
+
+metrics.RAG_INDEX_DOCUMENTS.set_function(lambda: len(rag_system.documents))
+metrics.RAG_INDEX_VERSION.set_function(lambda: rag_system.version)
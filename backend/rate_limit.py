@@ -0,0 +1,226 @@
+"""
+Per-client rate limiting for the routes that spend Gemini quota.
+
+Each (route, client) pair gets a sliding-window counter, approximated from
+two fixed windows: the estimate is previous * (1 - elapsed / window) + current.
+That is three numbers per client, one dict lookup per request, and no
+timestamps kept per request. Counters older than two windows are swept every
+RATE_LIMIT_SWEEP_INTERVAL seconds.
+
+Clients are identified by an X-API-Key / Bearer token when it is one of
+RATE_LIMIT_TOKENS (or ADMIN_TOKEN), otherwise by IP address. Unknown tokens
+are ignored, so a client cannot get a fresh counter by sending random keys.
+X-Forwarded-For (set by nginx, and by the Streamlit frontend with the address
+of the browser it serves) is only trusted when the direct peer is in
+RATE_LIMIT_TRUSTED_PROXIES. Nothing the browser chooses, such as a session id,
+selects the counter, so reloading the page does not reset the limit.
+
+Limits are configured per path with RATE_LIMITS, e.g.
+    RATE_LIMITS="/api/chat=20/60,/api/generate-text=10/60"
+(20 requests per 60 seconds). Other paths are not limited.
+"""
+
+import os
+import hmac
+import math
+import time
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from backend import metrics
+from backend.json_codec import dumps
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATE_LIMITS = "/api/chat=20/60,/api/generate-text=10/60"
+RATE_LIMIT_SWEEP_INTERVAL = float(os.getenv("RATE_LIMIT_SWEEP_INTERVAL", 60))
+RATE_LIMIT_TRUSTED_PROXIES = {
+    address.strip()
+    for address in os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "127.0.0.1,::1").split(",")
+    if address.strip()
+}
+# Tokens that get their own counter; any other token is rate limited by address
+RATE_LIMIT_TOKENS = [
+    token.strip()
+    for token in os.getenv("RATE_LIMIT_TOKENS", "").split(",") + [os.getenv("ADMIN_TOKEN", "")]
+    if token.strip()
+]
+
+
+def parse_limits(spec: str) -> Dict[str, Tuple[int, float]]:
+    """'/api/chat=20/60,...' -> {'/api/chat': (20, 60.0)}"""
+    limits = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            path, rule = item.split("=", 1)
+            count, seconds = rule.split("/", 1)
+            limits[path.strip()] = (int(count), float(seconds))
+        except ValueError:
+            raise ValueError(f"Invalid RATE_LIMITS entry '{item}', expected PATH=COUNT/SECONDS")
+    return limits
+
+
+class SlidingWindow:
+    """Approximate sliding-window counter per key: [window index, previous count, current count]."""
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self.counters: Dict[str, List] = {}
+
+    def hit(self, key: str, now: float) -> Tuple[bool, int, int]:
+        """Count one request; returns (allowed, remaining, retry_after seconds)"""
+        index = int(now // self.window)
+        counter = self.counters.get(key)
+        if counter is None:
+            counter = self.counters[key] = [index, 0, 0]
+        elif counter[0] != index:
+            # Roll over: the old current window becomes previous, or both expire
+            counter[1] = counter[2] if counter[0] == index - 1 else 0
+            counter[2] = 0
+            counter[0] = index
+
+        elapsed = now - index * self.window
+        estimate = counter[1] * (1 - elapsed / self.window) + counter[2]
+        if estimate + 1 > self.limit:
+            return False, 0, self._retry_after(counter, elapsed)
+        counter[2] += 1
+        return True, max(0, int(self.limit - estimate - 1)), 0
+
+    def _retry_after(self, counter: List, elapsed: float) -> int:
+        previous, current = counter[1], counter[2]
+        if current + 1 <= self.limit and previous:
+            # Enough of the previous window slides out later in this window
+            at = self.window * (1 - (self.limit - current - 1) / previous)
+            wait = at - elapsed
+        else:
+            # Only possible in the next window, once part of this one has slid out
+            at = self.window * (1 - (self.limit - 1) / current) if current else 0
+            wait = (self.window - elapsed) + max(0.0, at)
+        return max(1, math.ceil(wait))
+
+    def sweep(self, now: float) -> int:
+        """Drop counters whose both windows have expired"""
+        index = int(now // self.window)
+        stale = [key for key, counter in self.counters.items() if counter[0] < index - 1]
+        for key in stale:
+            del self.counters[key]
+        return len(stale)
+
+
+class RateLimiter:
+    def __init__(self, limits: Optional[Dict[str, Tuple[int, float]]] = None,
+                 sweep_interval: float = RATE_LIMIT_SWEEP_INTERVAL):
+        if limits is None:
+            limits = parse_limits(os.getenv("RATE_LIMITS", DEFAULT_RATE_LIMITS))
+        self.windows = {path: SlidingWindow(count, seconds) for path, (count, seconds) in limits.items()}
+        self.sweep_interval = sweep_interval
+        self.last_sweep = time.monotonic()
+        self.lock = threading.Lock()
+
+    def check(self, path: str, key: str) -> Optional[Tuple[bool, int, int, int]]:
+        """None if path is not limited, else (allowed, limit, remaining, retry_after)"""
+        window = self.windows.get(path)
+        if window is None:
+            return None
+        now = time.monotonic()
+        with self.lock:
+            if now - self.last_sweep >= self.sweep_interval:
+                self.last_sweep = now
+                for w in self.windows.values():
+                    w.sweep(now)
+            allowed, remaining, retry_after = window.hit(key, now)
+        return allowed, window.limit, remaining, retry_after
+
+    def tracked_clients(self) -> int:
+        return sum(len(window.counters) for window in self.windows.values())
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _known_token(token: str) -> bool:
+    return any(hmac.compare_digest(token.encode(), known.encode()) for known in RATE_LIMIT_TOKENS)
+
+
+def client_key(scope) -> str:
+    """Configured token if the client sent one, else the client IP as seen through trusted proxies"""
+    token = _header(scope, b"x-api-key")
+    authorization = _header(scope, b"authorization")
+    if not token and authorization and authorization.lower().startswith("bearer "):
+        token = authorization[7:].strip()
+    if token and _known_token(token):
+        # Keep a digest, not the token itself
+        return "token:" + hashlib.sha1(token.encode()).hexdigest()[:16]
+
+    peer = scope.get("client")[0] if scope.get("client") else "unknown"
+    if peer not in RATE_LIMIT_TRUSTED_PROXIES:
+        return "ip:" + peer
+
+    forwarded_for = _header(scope, b"x-forwarded-for")
+    if forwarded_for:
+        # nginx appends the address it saw; skip our own proxies from the right
+        for address in reversed([a.strip() for a in forwarded_for.split(",") if a.strip()]):
+            if address not in RATE_LIMIT_TRUSTED_PROXIES:
+                return "ip:" + address
+    return "ip:" + peer
+
+
+class RateLimitMiddleware:
+    """ASGI middleware answering 429 with Retry-After once a client exceeds its route limit."""
+
+    def __init__(self, app, limiter: Optional["RateLimiter"] = None):
+        self.app = app
+        self.limiter = limiter or rate_limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        result = self.limiter.check(scope["path"], client_key(scope))
+        if result is None:
+            await self.app(scope, receive, send)
+            return
+
+        allowed, limit, remaining, retry_after = result
+        rate_headers = [
+            (b"x-ratelimit-limit", str(limit).encode()),
+            (b"x-ratelimit-remaining", str(remaining).encode()),
+        ]
+        if not allowed:
+            metrics.RATE_LIMITED.inc(route=scope["path"])
+            body = dumps({"detail": "Çok fazla istek gönderdiniz. Lütfen biraz bekleyip tekrar deneyin."})
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(retry_after).encode()),
+                ] + rate_headers,
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + rate_headers}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+# Singleton instance
+rate_limiter = RateLimiter()
+
+metrics.RATE_LIMIT_CLIENTS.set_function(rate_limiter.tracked_clients)
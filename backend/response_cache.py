@@ -0,0 +1,174 @@
+"""
+In-process cache of serialized JSON responses for the read endpoints.
+
+Entries are keyed on path + query parameters and hold the encoded body, so a
+hit skips both the query and the Row -> dict -> JSON conversion (and, once a
+compressed variant has been built, the compression too). Each entry is
+tagged with the tables it was built from: writers invalidate their table's tag
+right after committing, and entries also record the data_versions counters they
+were built at, so writes made by other processes are picked up too.
+"""
+
+import os
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Sequence, Set, Tuple
+
+from backend import database
+from backend import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    body: bytes
+    tags: Tuple[str, ...]
+    versions: Tuple
+    # Compressed variants of body, filled lazily per Content-Encoding
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(v) for v in self.encoded.values())
+
+
+class ResponseCache:
+    """Bounded LRU of pre-serialized responses with tag-based invalidation."""
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries or int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 512))
+        self.max_bytes = max_bytes or int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+        self.enabled = os.getenv("RESPONSE_CACHE_ENABLED", "1") == "1"
+        self.entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.by_tag: Dict[str, Set[str]] = {}
+        self.size = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(path: str, params: Sequence[Tuple[str, str]]) -> str:
+        """Cache key independent of query parameter order"""
+        query = "&".join(f"{k}={v}" for k, v in sorted(params))
+        return f"{path}?{query}"
+
+    @staticmethod
+    def current_versions(tags: Sequence[str], versions: Optional[Dict[str, Dict]] = None) -> Tuple:
+        """
+        data_versions counters for tags; take this before building a body to store.
+        versions is a get_data_versions() result already fetched off the event loop.
+        """
+        if versions is None:
+            versions = database.get_data_versions()
+        return tuple(versions.get(tag, {}).get("version") for tag in tags)
+
+    def get(self, key: str, versions: Optional[Dict[str, Dict]] = None) -> Optional[CacheEntry]:
+        """Return the cached entry, or None if absent or built from older data"""
+        if not self.enabled:
+            return None
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is not None and entry.versions == self.current_versions(entry.tags, versions):
+            with self.lock:
+                if key in self.entries:
+                    self.entries.move_to_end(key)
+                self.hits += 1
+            metrics.RESPONSE_CACHE_REQUESTS.inc(result="hit")
+            return entry
+        with self.lock:
+            self.misses += 1
+        metrics.RESPONSE_CACHE_REQUESTS.inc(result="miss")
+        return None
+
+    def set(self, key: str, body: bytes, tags: Sequence[str], versions: Optional[Tuple] = None) -> CacheEntry:
+        """
+        Store a serialized body tagged with the tables it was built from.
+        Pass the versions read before building it, so a write that lands
+        in between leaves the entry stale rather than wrongly current.
+        """
+        if versions is None:
+            versions = self.current_versions(tags)
+        entry = CacheEntry(body=body, tags=tuple(tags), versions=versions)
+        if not self.enabled or len(body) > self.max_bytes:
+            return entry
+        with self.lock:
+            self._remove(key)
+            self.entries[key] = entry
+            self.size += len(body)
+            for tag in entry.tags:
+                self.by_tag.setdefault(tag, set()).add(key)
+            while self.entries and (len(self.entries) > self.max_entries or self.size > self.max_bytes):
+                oldest = next(iter(self.entries))
+                self._remove(oldest)
+                self.evictions += 1
+        return entry
+
+    def add_encoding(self, key: str, entry: CacheEntry, encoding: str, content: bytes):
+        """Attach a compressed variant to entry, counting it against the size limit"""
+        with self.lock:
+            entry.encoded[encoding] = content
+            if self.entries.get(key) is entry:
+                self.size += len(content)
+                while self.entries and self.size > self.max_bytes:
+                    self._remove(next(iter(self.entries)))
+                    self.evictions += 1
+
+    def invalidate(self, *tags: str) -> int:
+        """Drop every entry tagged with any of tags; returns the number removed"""
+        removed = 0
+        with self.lock:
+            for tag in tags:
+                for key in list(self.by_tag.get(tag, ())):
+                    self._remove(key)
+                    removed += 1
+            self.invalidations += removed
+        if removed:
+            logger.debug(f"Invalidated {removed} cached responses for {', '.join(tags)}")
+        return removed
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.by_tag.clear()
+            self.size = 0
+
+    def _remove(self, key: str):
+        """Remove key from the LRU and tag index (caller holds the lock)"""
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        self.size -= entry.size
+        for tag in entry.tags:
+            keys = self.by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.by_tag[tag]
+
+    def stats(self) -> Dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self.entries),
+                "bytes": self.size,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+            }
+
+
+# Singleton instance
+response_cache = ResponseCache()
+
+metrics.RESPONSE_CACHE_ENTRIES.set_function(lambda: len(response_cache.entries))
+metrics.RESPONSE_CACHE_BYTES.set_function(lambda: response_cache.size)
@@ -0,0 +1,204 @@
+"""
+Retry decisions for LLM calls: which errors are worth retrying, and how long to wait.
+
+Errors are classified as
+
+    quota        429 / ResourceExhausted: switch key; otherwise wait only if the
+                 server says how long (Retry-After / RetryInfo) and it fits the budget
+    invalid_key  PermissionDenied / Unauthenticated: switch key, never wait
+    transient    DeadlineExceeded, ServiceUnavailable, InternalServerError,
+                 BadGateway, GatewayTimeout, Aborted, connection errors:
+                 retry the same call after exponential backoff with full jitter
+    fatal        everything else (bad request, safety block, SDK RetryError, ...)
+
+Each call gets its own budget: at most RETRY_MAX_RETRIES waits, and no wait
+that would end more than RETRY_BUDGET_SECONDS after the call started. Key
+switches are immediate and limited by the caller (one per key).
+
+The policy is synchronous by default (GeminiClient runs in worker threads,
+so sleeping there does not block the event loop); call_async uses
+asyncio.sleep for callers on the event loop.
+"""
+
+import os
+import time
+import random
+import asyncio
+import logging
+from typing import Callable, Optional
+
+from google.api_core import exceptions as google_exceptions
+
+from backend import metrics
+
+logger = logging.getLogger(__name__)
+
+RETRY_MAX_RETRIES = int(os.getenv("RETRY_MAX_RETRIES", 2))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", 0.5))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", 8.0))
+RETRY_BUDGET_SECONDS = float(os.getenv("RETRY_BUDGET_SECONDS", 10.0))
+
+QUOTA = "quota"
+INVALID_KEY = "invalid_key"
+TRANSIENT = "transient"
+FATAL = "fatal"
+
+_TRANSIENT_ERRORS = (
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.InternalServerError,
+    google_exceptions.BadGateway,
+    google_exceptions.GatewayTimeout,
+    google_exceptions.Aborted,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+def _network_errors() -> tuple:
+    """Connection errors of the HTTP libraries under the SDKs (not subclasses of ConnectionError)"""
+    errors = []
+    try:
+        import requests
+        errors += [requests.exceptions.ConnectionError, requests.exceptions.Timeout]
+    except ImportError:
+        pass
+    try:
+        import httpx
+        errors += [httpx.TransportError]
+    except ImportError:
+        pass
+    return tuple(errors)
+
+
+def classify(error: BaseException) -> str:
+    if isinstance(error, google_exceptions.TooManyRequests):
+        return QUOTA
+    if isinstance(error, (google_exceptions.PermissionDenied, google_exceptions.Unauthenticated)):
+        return INVALID_KEY
+    if isinstance(error, _TRANSIENT_ERRORS) or isinstance(error, _network_errors()):
+        return TRANSIENT
+    return FATAL
+
+
+def parse_duration(value) -> Optional[float]:
+    """Seconds from "17s" / "0.5s" (RetryInfo JSON) or a plain number (Retry-After)"""
+    if value is None:
+        return None
+    text = str(value).strip()
+    if text.endswith("s"):
+        text = text[:-1]
+    try:
+        seconds = float(text)
+    except ValueError:
+        return None
+    return seconds if seconds >= 0 else None
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Server-requested delay from a Retry-After header or a google.rpc.RetryInfo detail"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is not None:
+        seconds = parse_duration(headers.get("retry-after"))
+        if seconds is not None:
+            return seconds
+
+    for detail in getattr(error, "details", None) or []:
+        if isinstance(detail, dict):
+            seconds = parse_duration(detail.get("retryDelay"))
+        else:
+            # gRPC: google.rpc.RetryInfo message with a Duration
+            delay = getattr(detail, "retry_delay", None)
+            seconds = delay.seconds + delay.nanos / 1e9 if delay is not None else None
+        if seconds is not None:
+            return seconds
+    return None
+
+
+class RetryBudget:
+    """Retry state for one call"""
+
+    def __init__(self, policy: "RetryPolicy", max_switches: int = 0):
+        self.policy = policy
+        self.max_switches = max_switches
+        self.retries = 0
+        self.switches = 0
+        self.started = time.monotonic()
+
+    def next_delay(self, error: BaseException, switch: Optional[Callable[[BaseException, str], bool]] = None) -> Optional[float]:
+        """
+        Seconds to wait before the next attempt (0 after switching key), or None to give up.
+        switch(error, kind) is asked first for quota / invalid key errors and returns
+        True if it moved the call to another key.
+        """
+        kind = classify(error)
+        metrics.LLM_RETRY_DECISIONS.inc(kind=kind)
+
+        if kind in (QUOTA, INVALID_KEY) and switch is not None and self.switches < self.max_switches:
+            if switch(error, kind):
+                self.switches += 1
+                return 0.0
+
+        if kind not in (QUOTA, TRANSIENT) or self.retries >= self.policy.max_retries:
+            return None
+
+        delay = retry_after(error)
+        if delay is None:
+            if kind == QUOTA:
+                # No key left and no hint when quota returns: waiting blindly only burns the budget
+                return None
+            delay = self.policy.backoff(self.retries)
+
+        if time.monotonic() - self.started + delay > self.policy.budget_seconds:
+            logger.info(f"Not retrying {type(error).__name__}: a {delay:.1f}s wait exceeds the retry budget")
+            return None
+        self.retries += 1
+        return delay
+
+
+class RetryPolicy:
+    def __init__(self, max_retries: int = RETRY_MAX_RETRIES, base_delay: float = RETRY_BASE_DELAY,
+                 max_delay: float = RETRY_MAX_DELAY, budget_seconds: float = RETRY_BUDGET_SECONDS,
+                 sleep: Callable[[float], None] = time.sleep, rng: Optional[random.Random] = None):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget_seconds = budget_seconds
+        self.sleep = sleep
+        self.random = rng or random.Random()
+
+    def backoff(self, retry: int) -> float:
+        """Full jitter: uniform in [0, min(max_delay, base_delay * 2^retry)]"""
+        return self.random.uniform(0, min(self.max_delay, self.base_delay * (2 ** retry)))
+
+    def budget(self, max_switches: int = 0) -> RetryBudget:
+        return RetryBudget(self, max_switches)
+
+    def call(self, func, *args, switch=None, max_switches: int = 0, **kwargs):
+        budget = self.budget(max_switches)
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                delay = budget.next_delay(e, switch)
+                if delay is None:
+                    raise
+                if delay:
+                    logger.warning(f"{type(e).__name__}, retrying in {delay:.2f}s: {e}")
+                    metrics.LLM_RETRY_WAIT.observe(delay)
+                    self.sleep(delay)
+
+    async def call_async(self, func, *args, switch=None, max_switches: int = 0, **kwargs):
+        budget = self.budget(max_switches)
+        while True:
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                delay = budget.next_delay(e, switch)
+                if delay is None:
+                    raise
+                if delay:
+                    logger.warning(f"{type(e).__name__}, retrying in {delay:.2f}s: {e}")
+                    metrics.LLM_RETRY_WAIT.observe(delay)
+                    await asyncio.sleep(delay)
@@ -0,0 +1,86 @@
+"""
+Startup phase timings and the readiness gate for deferred initialization.
+
+backend.main imports this module first, so "imports" covers loading the
+application modules. Slow work that is not needed to accept connections (RAG
+index load or rebuild, LLM SDK import and configuration, token estimator
+calibration) runs in the background after the server is up. Endpoints that
+need the RAG index wait on rag_ready for a short while and otherwise answer
+503 until it is set.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from contextlib import contextmanager
+from typing import Dict, Optional, Set
+
+from backend import metrics
+
+logger = logging.getLogger(__name__)
+
+# How long a chat request waits for the RAG index before a 503
+STARTUP_RAG_WAIT = float(os.getenv("STARTUP_RAG_WAIT", 5.0))
+
+
+class Startup:
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.rag_error: Optional[str] = None
+        self.rag_ready = asyncio.Event()
+        # Set when migrations or schema verification failed; the worker is then never ready
+        self.schema_error: Optional[str] = None
+        # Background tasks are referenced here so they are not garbage collected
+        self.tasks: Set[asyncio.Task] = set()
+
+    def reset(self):
+        """Called at the start of every lifespan (a new event loop in tests and reloads)"""
+        self.rag_error = None
+        self.rag_ready = asyncio.Event()
+        self.schema_error = None
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float):
+        self.phases[name] = seconds
+        metrics.STARTUP_PHASE_SECONDS.set(seconds, phase=name)
+        logger.info(f"Startup phase {name}: {seconds:.3f}s")
+
+    def since_start(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def spawn(self, coroutine) -> asyncio.Task:
+        task = asyncio.create_task(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def wait_for_rag(self, timeout: float = STARTUP_RAG_WAIT) -> bool:
+        """True once the RAG index is loaded; False if it is still loading after timeout"""
+        if self.rag_ready.is_set():
+            return True
+        try:
+            await asyncio.wait_for(self.rag_ready.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def summary(self) -> Dict:
+        return {
+            "phases": {name: round(seconds, 3) for name, seconds in self.phases.items()},
+            "rag_ready": self.rag_ready.is_set(),
+            "rag_error": self.rag_error,
+            "schema_error": self.schema_error,
+        }
+
+
+# Singleton instance
+startup = Startup()
@@ -1,6 +1,7 @@
 import os
 import sys
 import logging
+import asyncio
 
 # Add parent directory to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -22,6 +23,13 @@ def test_live_keys():
     
     keys = gemini_client.api_keys
     print(f"Found {len(keys)} keys in environment.")
+
+    # Probe all keys at once (countTokens, no generation quota used)
+    print("\n[0] Probing all keys concurrently...")
+    asyncio.run(gemini_client.key_manager.probe_all())
+    for state in gemini_client.key_manager.summary()["states"]:
+        icon = "✅" if state["status"] == "valid" else "❌"
+        print(f"{icon} Key {state['index'] + 1}: {state['status']} ({state['latency_ms']} ms) {state['last_error'] or ''}")
     
     if len(keys) < 2:
         print("⚠️  Warning: Less than 2 keys found. Add GEMINI_API_KEY_2 to .env to test rotation.")
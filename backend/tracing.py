@@ -0,0 +1,258 @@
+"""
+Per-request stage timing and an on-demand sampling profiler.
+
+TracingMiddleware starts a Trace for every HTTP request and keeps it in a
+context variable, so any code on the request path (including threads started
+with asyncio.to_thread, which copy the context) can record stages with
+
+    with tracing.span("rag_embed"):
+        ...
+
+The recorded spans are returned in a Server-Timing header, which browser dev
+tools and curl -v show directly, and requests slower than TRACE_SLOW_MS are
+logged with their breakdown.
+
+The profiler is armed by an admin for the next N requests. While one of those
+requests runs, a background thread samples the Python stacks every
+PROFILE_INTERVAL_MS and the result is written to PROFILE_DIR in the collapsed
+("folded") format that flamegraph.pl and speedscope read.
+"""
+
+import os
+import re
+import sys
+import time
+import asyncio
+import logging
+import threading
+from collections import Counter
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", 3000))
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(os.path.dirname(__file__), "..", "profiles"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", 5))
+# Upper bound for a single arm request
+PROFILE_MAX_REQUESTS = 100
+
+
+class Span:
+    __slots__ = ("name", "duration", "description")
+
+    def __init__(self, name: str, duration: float, description: Optional[str] = None):
+        self.name = name
+        self.duration = duration
+        self.description = description
+
+    def server_timing(self) -> str:
+        entry = self.name
+        if self.description:
+            description = self.description.replace("\\", "").replace('"', "'")
+            entry += f';desc="{description}"'
+        return entry + f";dur={self.duration * 1000:.1f}"
+
+
+class Trace:
+    """Spans recorded while serving one request"""
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.start = time.perf_counter()
+        self.spans: List[Span] = []
+        self.lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self.lock:
+            self.spans.append(span)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def server_timing(self) -> str:
+        with self.lock:
+            entries = [span.server_timing() for span in self.spans]
+        entries.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(entries)
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+class _SpanHandle:
+    """Yielded by span() so the block can set the description after the fact"""
+    __slots__ = ("description",)
+
+    def __init__(self, description: Optional[str]):
+        self.description = description
+
+
+@contextmanager
+def span(name: str, description: Optional[str] = None):
+    """Record the duration of the with-block on the current request's trace (no-op outside a request)"""
+    trace = _current_trace.get()
+    handle = _SpanHandle(description)
+    if trace is None:
+        yield handle
+        return
+    start = time.perf_counter()
+    try:
+        yield handle
+    finally:
+        trace.add(Span(name, time.perf_counter() - start, handle.description))
+
+
+# ========== Sampling profiler ==========
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+class SamplingProfiler:
+    """Samples all Python thread stacks while an armed request is in flight."""
+
+    def __init__(self, directory: str = PROFILE_DIR, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.directory = directory
+        self.interval = interval_ms / 1000
+        self.lock = threading.Lock()
+        self.remaining = 0
+        self.path_prefix: Optional[str] = None
+        self.active = False
+        self.files: List[str] = []
+
+    def arm(self, requests: int, path_prefix: Optional[str] = None) -> Dict:
+        with self.lock:
+            self.remaining = max(0, min(requests, PROFILE_MAX_REQUESTS))
+            self.path_prefix = path_prefix
+        return self.status()
+
+    def status(self) -> Dict:
+        with self.lock:
+            return {
+                "remaining": self.remaining,
+                "path_prefix": self.path_prefix,
+                "active": self.active,
+                "directory": os.path.abspath(self.directory),
+                "interval_ms": self.interval * 1000,
+                "files": list(self.files[-20:]),
+            }
+
+    def claim(self, path: str) -> bool:
+        """True if this request should be profiled; one profiled request at a time"""
+        with self.lock:
+            if self.remaining <= 0 or self.active:
+                return False
+            if self.path_prefix and not path.startswith(self.path_prefix):
+                return False
+            self.remaining -= 1
+            self.active = True
+            return True
+
+    @asynccontextmanager
+    async def profile(self, method: str, path: str):
+        """Sample stacks for the duration of the async with-block and write them to a .folded file"""
+        stacks: Counter = Counter()
+        stop = threading.Event()
+        sampler_id = []
+
+        def sample():
+            sampler_id.append(threading.get_ident())
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            # Take the first sample right away so even very short requests show up
+            while True:
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == sampler_id[0]:
+                        continue
+                    labels = []
+                    while frame is not None:
+                        labels.append(_frame_label(frame))
+                        frame = frame.f_back
+                    if thread_id not in names:
+                        names = {thread.ident: thread.name for thread in threading.enumerate()}
+                    labels.append(names.get(thread_id, str(thread_id)))
+                    stacks[";".join(reversed(labels))] += 1
+                if stop.wait(self.interval):
+                    break
+
+        sampler = threading.Thread(target=sample, name="trace-profiler", daemon=True)
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            # Joining the sampler can take a full interval and the write touches the disk:
+            # neither belongs on the event loop
+            await asyncio.to_thread(self._finish, sampler, method, path, stacks, time.perf_counter() - start)
+
+    def _finish(self, sampler: threading.Thread, method: str, path: str, stacks: Counter, seconds: float):
+        try:
+            sampler.join()
+            filename = self._write(method, path, stacks, seconds)
+            logger.info(f"Profiled {method} {path}: {sum(stacks.values())} samples -> {filename}")
+        except OSError as e:
+            logger.warning(f"Could not write profile for {method} {path}: {e}")
+        finally:
+            with self.lock:
+                self.active = False
+
+    def _write(self, method: str, path: str, stacks: Counter, seconds: float) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_") or "root"
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        filename = os.path.join(self.directory, f"{stamp}-{method.lower()}-{slug}-{seconds * 1000:.0f}ms.folded")
+        with open(filename, "w", encoding="utf-8") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        with self.lock:
+            self.files.append(os.path.basename(filename))
+        return filename
+
+
+# Singleton instance
+profiler = SamplingProfiler()
+
+
+class TracingMiddleware:
+    """ASGI middleware: trace each request, add Server-Timing, run the profiler when armed."""
+
+    def __init__(self, app, sampler: Optional[SamplingProfiler] = None):
+        self.app = app
+        self.profiler = sampler or profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(scope["method"], scope["path"])
+        token = _current_trace.set(trace)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", trace.server_timing().encode("latin-1", "replace")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            if self.profiler.claim(trace.path):
+                async with self.profiler.profile(trace.method, trace.path):
+                    await self.app(scope, receive, send_wrapper)
+            else:
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_trace.reset(token)
+            elapsed_ms = trace.elapsed() * 1000
+            if elapsed_ms >= TRACE_SLOW_MS:
+                logger.warning(f"Slow request {trace.method} {trace.path} ({elapsed_ms:.0f} ms): "
+                               f"{trace.server_timing()}")
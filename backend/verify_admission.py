@@ -0,0 +1,122 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+import os
+import sys
+
+# Add parent directory to path to import backend
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.admission import AdmissionController, Overloaded
+
+
+class Holder:
+    """Runs a request that keeps its slot until release() is called"""
+
+    def __init__(self, controller: AdmissionController):
+        self.controller = controller
+        self.admitted = asyncio.Event()
+        self.done = asyncio.Event()
+        self.task = asyncio.create_task(self.run())
+
+    async def run(self):
+        async with self.controller.slot():
+            self.admitted.set()
+            await self.done.wait()
+
+    async def release(self):
+        self.done.set()
+        await self.task
+
+
+async def settle():
+    """Let the tasks created so far run up to their next suspension point"""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestAdmission(unittest.TestCase):
+    def run_async(self, test):
+        asyncio.run(test())
+
+    def test_slots_then_queue_then_reject(self):
+        async def test():
+            controller = AdmissionController(max_concurrent=2, max_queue=1, max_wait=5.0)
+            first, second = Holder(controller), Holder(controller)
+            await settle()
+            self.assertTrue(first.admitted.is_set() and second.admitted.is_set())
+            self.assertEqual(controller.active, 2)
+
+            queued = Holder(controller)
+            await settle()
+            self.assertFalse(queued.admitted.is_set())
+            self.assertEqual(controller.waiting, 1)
+
+            # Queue is full: rejected at once, without waiting for max_wait
+            with self.assertRaises(Overloaded) as raised:
+                async with controller.slot():
+                    pass
+            self.assertEqual(raised.exception.reason, "queue_full")
+            # (1 waiting + 2 active + this one) * 1.0s average / 2 slots
+            self.assertEqual(raised.exception.retry_after, 2)
+
+            # A freed slot goes to the queued request
+            await first.release()
+            await asyncio.wait_for(queued.admitted.wait(), timeout=1)
+            self.assertEqual((controller.active, controller.waiting), (2, 0))
+            await second.release()
+            await queued.release()
+            self.assertEqual(controller.active, 0)
+        self.run_async(test)
+
+    def test_queued_request_times_out(self):
+        async def test():
+            controller = AdmissionController(max_concurrent=1, max_queue=4, max_wait=0.05)
+            holder = Holder(controller)
+            await settle()
+            with self.assertRaises(Overloaded) as raised:
+                async with controller.slot():
+                    pass
+            self.assertEqual(raised.exception.reason, "timeout")
+            self.assertEqual(controller.waiting, 0)
+            await holder.release()
+            # The timed-out waiter did not keep a slot
+            async with controller.slot():
+                self.assertEqual(controller.active, 1)
+        self.run_async(test)
+
+    def test_retry_after_is_at_least_one_second(self):
+        controller = AdmissionController(max_concurrent=4, max_queue=0)
+        controller.avg_service_time = 0.01
+        self.assertEqual(controller.retry_after(), 1)
+        controller.avg_service_time = 3.0
+        controller.active, controller.waiting = 4, 3
+        self.assertEqual(controller.retry_after(), 6)
+
+    def test_avg_service_time_is_an_ema(self):
+        async def test():
+            controller = AdmissionController(max_concurrent=1)
+            with patch("backend.admission.time.perf_counter", side_effect=[0.0, 0.5]):
+                async with controller.slot():
+                    pass
+            self.assertAlmostEqual(controller.avg_service_time, 0.9)
+            # A failing request still releases its slot and counts its time
+            with patch("backend.admission.time.perf_counter", side_effect=[10.0, 12.0]):
+                with self.assertRaises(RuntimeError):
+                    async with controller.slot():
+                        raise RuntimeError("LLM error")
+            self.assertAlmostEqual(controller.avg_service_time, 1.12)
+            self.assertEqual(controller.active, 0)
+            self.assertFalse(controller.semaphore.locked())
+        self.run_async(test)
+
+    def test_stats(self):
+        controller = AdmissionController(max_concurrent=3, max_queue=5, max_wait=1.5)
+        self.assertEqual(controller.stats(), {
+            "active": 0, "waiting": 0, "max_concurrent": 3, "max_queue": 5,
+            "max_wait": 1.5, "avg_service_time": 1.0,
+        })
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import io
+import unittest
+from unittest.mock import patch
+import os
+import sys
+
+# Add parent directory to path to import backend
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend import bulk_import
+from backend.bulk_import import import_file, iter_records, validate_news, validate_tip
+
+CATEGORIES = [{"id": 1, "name": "Tarım"}, {"id": 2, "name": "Hava"}]
+
+
+class FakeTable:
+    """Records each bulk insert call and hands out sequential ids"""
+
+    def __init__(self):
+        self.chunks = []
+        self.next_id = 1
+
+    def __call__(self, rows):
+        self.chunks.append(list(rows))
+        ids = list(range(self.next_id, self.next_id + len(rows)))
+        self.next_id += len(rows)
+        return ids
+
+
+class TestValidation(unittest.TestCase):
+    def test_news(self):
+        row = validate_news({"title": " Başlık ", "content": "İçerik", "category_id": "2",
+                             "published_at": "2024-05-01T10:00:00Z"}, {1, 2})
+        self.assertEqual(row["title"], "Başlık")
+        self.assertEqual(row["category_id"], 2)
+        self.assertEqual(row["published_at"], "2024-05-01 10:00:00")
+        self.assertIsNone(row["summary"])
+
+    def test_news_errors(self):
+        valid = {"title": "Başlık", "content": "İçerik", "category_id": 1}
+        cases = [
+            ({"category_id": "abc"}, "must be an integer"),
+            ({"category_id": 9}, "unknown category_id 9"),
+            ({"title": "  "}, "'title' is required"),
+            ({"title": "x" * 256}, "longer than 255"),
+            ({"published_at": "dün"}, "not an ISO date"),
+        ]
+        for change, message in cases:
+            with self.assertRaisesRegex(ValueError, message):
+                validate_news({**valid, **change}, {1, 2})
+
+    def test_tip(self):
+        row = validate_tip({"title": "İpucu", "content": "Sulama", "difficulty": "",
+                            "created_at": "2024-05-01"})
+        self.assertIsNone(row["difficulty"])
+        self.assertEqual(row["created_at"], "2024-05-01 00:00:00")
+        with self.assertRaisesRegex(ValueError, "'content' is required"):
+            validate_tip({"title": "İpucu"})
+
+
+class TestParsing(unittest.TestCase):
+    def records(self, data: bytes, fmt: str):
+        return list(iter_records(io.BytesIO(data), fmt))
+
+    def test_csv(self):
+        data = '\ufefftitle,content\n"Başlık, virgüllü","iki\nsatır"\nİkinci,içerik\n'.encode("utf-8")
+        records = self.records(data, "csv")
+        # The BOM is not part of the first column name, and line numbers are physical lines
+        self.assertEqual(records[0], (3, {"title": "Başlık, virgüllü", "content": "iki\nsatır"}))
+        self.assertEqual(records[1], (4, {"title": "İkinci", "content": "içerik"}))
+
+    def test_jsonl_errors_are_per_line(self):
+        data = b'{"title": "a"}\n\nnot json\n[1]\n\xff\xfe{"title": "b"}\n{"title": "c"}'
+        records = self.records(data, "jsonl")
+        self.assertEqual([line for line, _ in records], [1, 3, 4, 5, 6])
+        self.assertEqual(records[0][1], {"title": "a"})
+        self.assertTrue(records[1][1].startswith("invalid JSON"))
+        self.assertEqual(records[2][1], [1])
+        self.assertEqual(records[3][1], "invalid UTF-8 at byte 0")
+        self.assertEqual(records[4][1], {"title": "c"})
+
+    def test_csv_decode_error_skips_only_that_row(self):
+        data = "title,content\nA,1\n".encode("utf-8") + b"B,\xff\n" + "C,3\n".encode("utf-8")
+        records = self.records(data, "csv")
+        self.assertEqual(records, [(2, {"title": "A", "content": "1"}),
+                                   (3, "invalid UTF-8 at byte 2"),
+                                   (4, {"title": "C", "content": "3"})])
+
+    def test_detect_format(self):
+        self.assertEqual(bulk_import.detect_format("Haberler.CSV"), "csv")
+        self.assertEqual(bulk_import.detect_format("news.jsonl"), "jsonl")
+        self.assertEqual(bulk_import.detect_format(None), "jsonl")
+
+
+class TestImport(unittest.TestCase):
+    def setUp(self):
+        self.table = FakeTable()
+        patchers = [
+            patch("backend.database.get_all_categories", return_value=CATEGORIES),
+            patch("backend.database.bulk_insert_news", side_effect=self.table),
+            patch("backend.database.bulk_insert_tips", side_effect=self.table),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_rows_are_inserted_in_chunks(self):
+        lines = [f'{{"title": "Haber {i}", "content": "içerik", "category_id": 1}}' for i in range(7)]
+        lines.insert(3, '{"title": "Eksik"}')
+        result = import_file("news", io.BytesIO("\n".join(lines).encode("utf-8")), chunk_size=3)
+        self.assertEqual([len(chunk) for chunk in self.table.chunks], [3, 3, 1])
+        self.assertEqual(result.ids, list(range(1, 8)))
+        self.assertEqual((result.inserted, result.skipped), (7, 1))
+        self.assertEqual(len(result.errors), 1)
+        self.assertTrue(result.errors[0].startswith("line 4:"))
+
+    def test_decode_error_after_a_committed_chunk(self):
+        data = b"title,content\n" + b"".join(f"Tip {i},c\n".encode() for i in range(4)) + b"\xff,c\nSon,c\n"
+        result = import_file("tips", io.BytesIO(data), filename="tips.csv", chunk_size=2)
+        # Every inserted row is reported, so the caller can invalidate and index it
+        self.assertEqual(result.ids, [1, 2, 3, 4, 5])
+        self.assertEqual(result.errors, ["line 6: invalid UTF-8 at byte 0"])
+
+    def test_committed_ids_survive_a_failing_chunk(self):
+        def insert(rows):
+            if self.table.chunks:
+                raise RuntimeError("disk I/O error")
+            return self.table(rows)
+
+        data = "\n".join(f'{{"title": "İpucu {i}", "content": "c"}}' for i in range(5)).encode("utf-8")
+        result = bulk_import.ImportResult(kind="tips")
+        with patch("backend.database.bulk_insert_tips", side_effect=insert):
+            with self.assertRaises(RuntimeError):
+                import_file("tips", io.BytesIO(data), chunk_size=2, result=result)
+        self.assertEqual(result.ids, [1, 2])
+        self.assertEqual(result.inserted, 2)
+
+    def test_error_list_is_capped(self):
+        data = b"\n".join([b"{"] * (bulk_import.MAX_REPORTED_ERRORS + 5))
+        result = import_file("tips", io.BytesIO(data))
+        self.assertEqual(result.skipped, bulk_import.MAX_REPORTED_ERRORS + 5)
+        self.assertEqual(len(result.errors), bulk_import.MAX_REPORTED_ERRORS)
+
+    def test_unknown_kind_and_format(self):
+        with self.assertRaises(ValueError):
+            import_file("users", io.BytesIO(b""))
+        with self.assertRaises(ValueError):
+            import_file("tips", io.BytesIO(b""), fmt="xml")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+import os
+import sys
+
+# Add parent directory to path to import backend
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.chat_sessions import SessionStore, merge_pending
+from backend.db_writer import db_writer
+
+
+class TestSessionStore(unittest.TestCase):
+    def setUp(self):
+        # chat_log contents per conversation
+        self.rows = {
+            "a": [{"user_message": "soru 1", "bot_response": "cevap 1"}],
+            "b": [{"user_message": "b soru", "bot_response": "b cevap"}],
+        }
+        self.loads = []
+
+        async def get_conversation_turns(conversation_id, limit=None):
+            self.loads.append(conversation_id)
+            return list(self.rows.get(conversation_id, []))
+
+        self.patcher = patch('backend.async_database.get_conversation_turns', get_conversation_turns)
+        self.patcher.start()
+        self.store = SessionStore(max_sessions=1, max_turns=10)
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_miss_then_hit(self):
+        first = asyncio.run(self.store.get_history("a"))
+        second = asyncio.run(self.store.get_history("a"))
+        self.assertEqual(first, [{"user": "soru 1", "assistant": "cevap 1"}])
+        self.assertEqual(second, first)
+        self.assertEqual(self.loads, ["a"])
+
+    def test_append_extends_cached_history(self):
+        asyncio.run(self.store.get_history("a"))
+        self.store.append_turn("a", "soru 2", "cevap 2")
+        history = asyncio.run(self.store.get_history("a"))
+        self.assertEqual([turn["user"] for turn in history], ["soru 1", "soru 2"])
+        self.assertEqual(self.loads, ["a"])
+
+    def test_append_after_eviction_reloads_full_history(self):
+        asyncio.run(self.store.get_history("a"))
+        # Another conversation evicts "a" while its answer is being generated
+        asyncio.run(self.store.get_history("b"))
+        self.store.append_turn("a", "soru 2", "cevap 2")
+        self.assertNotIn("a", self.store.sessions)
+
+        # db_writer has persisted the turn by the next request
+        self.rows["a"].append({"user_message": "soru 2", "bot_response": "cevap 2"})
+        history = asyncio.run(self.store.get_history("a"))
+        self.assertEqual([turn["user"] for turn in history], ["soru 1", "soru 2"])
+        self.assertEqual(self.loads, ["a", "b", "a"])
+
+    def test_reload_includes_unflushed_turns(self):
+        pending = [("soru 1", "cevap 1"), ("soru 2", "cevap 2")]
+        with patch.object(db_writer, "pending_turns", return_value=pending):
+            history = asyncio.run(self.store.get_history("a"))
+        # "soru 1" is in chat_log already and is not repeated
+        self.assertEqual([turn["user"] for turn in history], ["soru 1", "soru 2"])
+
+    def test_merge_pending(self):
+        def turns(*names):
+            return [{"user": name, "assistant": name.upper()} for name in names]
+        self.assertEqual(merge_pending(turns("a", "b"), turns("c")), turns("a", "b", "c"))
+        self.assertEqual(merge_pending(turns("a", "b"), turns("a", "b", "c")), turns("a", "b", "c"))
+        self.assertEqual(merge_pending(turns("a", "b"), turns("b", "c")), turns("a", "b", "c"))
+        self.assertEqual(merge_pending(turns(), turns("a")), turns("a"))
+
+
+if __name__ == '__main__':
+    unittest.main()
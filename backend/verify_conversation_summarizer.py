@@ -0,0 +1,90 @@
+import asyncio
+import unittest
+import os
+import sys
+
+# Add parent directory to path to import backend
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.conversation_summarizer import ConversationSummarizer
+
+
+def make_history(count, start=0):
+    return [{"user": f"soru {i}", "assistant": f"cevap {i}"} for i in range(start, start + count)]
+
+
+class FakeSummarizer(ConversationSummarizer):
+    """Records summarize calls instead of asking the LLM"""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("history_limit", 5)
+        kwargs.setdefault("keep_recent", 3)
+        kwargs.setdefault("chunk_size", 2)
+        super().__init__(**kwargs)
+        self.calls = []
+
+    def summarize(self, previous_summary, turns):
+        self.calls.append((previous_summary, [turn["user"] for turn in turns]))
+        return f"özet {turns[-1]['user']}"
+
+
+class TestConversationSummarizer(unittest.TestCase):
+    def test_threshold_cannot_exceed_history_limit(self):
+        with self.assertRaises(ValueError):
+            ConversationSummarizer(threshold=8, history_limit=5)
+        self.assertEqual(ConversationSummarizer(history_limit=5).threshold, 4)
+
+    def test_short_history_untouched(self):
+        summarizer = FakeSummarizer()
+        history = make_history(4)
+        self.assertEqual(summarizer.prepare(history), (None, history))
+
+    def test_prefix_digests_are_chunk_aligned_and_stable(self):
+        summarizer = FakeSummarizer()
+        digests = summarizer._prefix_digests(make_history(7), 6)
+        self.assertEqual([turns for turns, _ in digests], [2, 4, 6])
+        # A different conversation with the same first turns shares their digests
+        other = make_history(4) + [{"user": "başka", "assistant": ""}] * 2
+        self.assertEqual(summarizer._prefix_digests(other, 4), digests[:2])
+        self.assertNotEqual(summarizer._prefix_digests(other, 6)[2], digests[2])
+
+    def test_summary_is_scheduled_then_reused(self):
+        summarizer = FakeSummarizer()
+
+        async def run():
+            history = make_history(5)
+            summary, recent = summarizer.prepare(history)
+            self.assertIsNone(summary)
+            self.assertEqual(recent, history)
+            await asyncio.gather(*summarizer.pending.values())
+
+            summary, recent = summarizer.prepare(history)
+            self.assertEqual(summary, "özet soru 1")
+            self.assertEqual([turn["user"] for turn in recent], ["soru 2", "soru 3", "soru 4"])
+
+            # Two more turns extend the cached summary instead of starting over
+            summarizer.prepare(make_history(7))
+            await asyncio.gather(*summarizer.pending.values())
+
+        asyncio.run(run())
+        self.assertEqual(summarizer.calls, [(None, ["soru 0", "soru 1"]), ("özet soru 1", ["soru 2", "soru 3"])])
+
+    def test_concurrent_summaries_are_bounded(self):
+        summarizer = FakeSummarizer(max_concurrent=1)
+
+        async def run():
+            summarizer.prepare(make_history(5))
+            summarizer.prepare(make_history(5, start=100))
+            self.assertEqual(len(summarizer.pending), 1)
+            await asyncio.gather(*summarizer.pending.values())
+            # The slot is free again, so the skipped conversation is summarized on its next turn
+            summarizer.prepare(make_history(5, start=100))
+            self.assertEqual(len(summarizer.pending), 1)
+            await asyncio.gather(*summarizer.pending.values())
+
+        asyncio.run(run())
+        self.assertEqual(len(summarizer.calls), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+# Add parent directory to path to import backend
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend import metrics
+from backend.db_writer import BackgroundWriter
+
+
+class TestBackgroundWriter(unittest.TestCase):
+    def setUp(self):
+        self.batches = []
+        self.fail = False
+
+        def add_log_batch(chat_rows, search_rows):
+            if self.fail:
+                raise RuntimeError("database is locked")
+            self.batches.append((list(chat_rows), list(search_rows)))
+            return len(chat_rows) + len(search_rows)
+
+        self.patcher = patch('backend.database.add_log_batch', add_log_batch)
+        self.patcher.start()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.spill_path = os.path.join(self.tmp.name, "spill.jsonl")
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.tmp.cleanup()
+
+    def wait_for(self, condition, timeout=2.0):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            self.assertLess(time.monotonic(), deadline, "timed out")
+            time.sleep(0.01)
+
+    def written(self):
+        return [row for chat_rows, search_rows in self.batches for row in chat_rows + search_rows]
+
+    def test_rows_are_batched(self):
+        writer = BackgroundWriter(flush_interval_ms=50, batch_size=3, spill_path="")
+        for i in range(7):
+            writer.log_chat(0, f"soru {i}", f"cevap {i}", "conv")
+        writer.log_search(0, "domates")
+        writer.start()
+        writer.stop()
+
+        self.assertEqual(len(self.written()), 8)
+        self.assertTrue(all(len(c) + len(s) <= 3 for c, s in self.batches))
+        self.assertEqual(self.batches[-1][1], [(0, "domates")])
+        self.assertEqual(writer.stats["written"], 8)
+        self.assertEqual(writer.stats["enqueued"], 8)
+
+    def test_full_queue_spills_and_replays(self):
+        writer = BackgroundWriter(flush_interval_ms=50, max_queue=2, spill_path=self.spill_path)
+        results = [writer.log_chat(0, f"soru {i}", "cevap", "conv") for i in range(4)]
+        self.assertEqual(results, [True, True, False, False])
+        with open(self.spill_path, encoding="utf-8") as f:
+            spilled = [json.loads(line) for line in f]
+        self.assertEqual([item["row"][1] for item in spilled], ["soru 2", "soru 3"])
+
+        # The next start replays the spill file before draining the queue
+        writer.start()
+        writer.stop()
+        self.assertEqual(sorted(row[1] for row in self.written()), ["soru 0", "soru 1", "soru 2", "soru 3"])
+        self.assertFalse(os.path.exists(self.spill_path))
+
+    def test_failed_write_is_spilled(self):
+        writer = BackgroundWriter(flush_interval_ms=50, spill_path=self.spill_path)
+        self.fail = True
+        writer.log_chat(0, "soru", "cevap", "conv")
+        writer.start()
+        writer.stop()
+        self.assertEqual(writer.stats["failed"], 1)
+        self.assertEqual(writer.stats["spilled"], 1)
+
+        self.fail = False
+        writer.start()
+        writer.stop()
+        self.assertEqual([row[1] for row in self.written()], ["soru"])
+
+    def test_rows_dropped_without_spill_path(self):
+        writer = BackgroundWriter(max_queue=1, spill_path="")
+        before = metrics.DB_WRITER_DROPPED.get(table="search_history")
+        writer.log_search(0, "a")
+        with self.assertLogs("backend.db_writer", level="ERROR"):
+            writer.log_search(0, "b")
+        self.assertEqual(writer.stats["dropped"], 1)
+        self.assertEqual(metrics.DB_WRITER_DROPPED.get(table="search_history"), before + 1)
+
+    def test_spills_next_to_the_database_by_default(self):
+        with patch('backend.database.DB_PATH', os.path.join(self.tmp.name, "database.db")), \
+                patch.dict(os.environ, {}, clear=False):
+            os.environ.pop("DB_WRITER_SPILL_PATH", None)
+            writer = BackgroundWriter(max_queue=1)
+        self.assertEqual(writer.spill_path, os.path.join(self.tmp.name, "log_spill.jsonl"))
+        writer.log_chat(0, "soru 1", "cevap", "conv")
+        writer.log_chat(0, "soru 2", "cevap", "conv")
+        self.assertEqual(writer.stats["spilled"], 1)
+        self.assertEqual(writer.stats["dropped"], 0)
+
+    def test_spill_is_replayed_once_writes_succeed_again(self):
+        writer = BackgroundWriter(flush_interval_ms=20, spill_path=self.spill_path)
+        self.fail = True
+        writer.start()
+        writer.log_chat(0, "soru 1", "cevap", "conv")
+        self.wait_for(lambda: writer.stats["spilled"] == 1)
+        self.fail = False
+        writer.log_chat(0, "soru 2", "cevap", "conv")
+        self.wait_for(lambda: not os.path.exists(self.spill_path))
+        writer.stop()
+        self.assertEqual(sorted(row[1] for row in self.written()), ["soru 1", "soru 2"])
+
+    def test_pending_turns_until_written(self):
+        writer = BackgroundWriter(flush_interval_ms=20, max_queue=1, spill_path=self.spill_path)
+        writer.log_chat(0, "soru 1", "cevap 1", "conv")
+        # Queue full: spilled, but still pending
+        writer.log_chat(0, "soru 2", "cevap 2", "conv")
+        writer.log_chat(0, "başka", "cevap", "other")
+        writer.log_search(0, "domates")
+        self.assertEqual(writer.pending_turns("conv"), [("soru 1", "cevap 1"), ("soru 2", "cevap 2")])
+
+        self.fail = True
+        writer.start()
+        writer.stop()
+        self.assertEqual(len(writer.pending_turns("conv")), 2)
+
+        self.fail = False
+        writer.start()
+        writer.stop()
+        self.assertEqual(writer.pending_turns("conv"), [])
+        self.assertEqual(writer.unflushed, {})
+
+    def test_stats_are_consistent_across_threads(self):
+        writer = BackgroundWriter(max_queue=100000, spill_path="")
+        threads = [threading.Thread(target=lambda: [writer.log_search(0, "q") for _ in range(2000)]) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(writer.stats["enqueued"], 16000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,4 @@
+import threading
 import unittest
 from unittest.mock import MagicMock, patch
 import os
@@ -25,33 +26,100 @@ class TestGeminiClient(unittest.TestCase):
     def tearDown(self):
         self.env_patcher.stop()
 
+    def key_of(self, client, key_index):
+        return client.get_client(key_index)._transport._credentials.token
+
     @patch('google.generativeai.configure')
     def test_initialization(self, mock_configure):
         client = GeminiClient()
         self.assertEqual(len(client.api_keys), 3)
         self.assertEqual(client.api_keys[0], "fake_key_1")
-        # Should configure with first key
-        mock_configure.assert_called_with(api_key="fake_key_1")
+        # The first key's client is ready; the process-wide configuration is left alone
+        self.assertEqual(list(client.key_clients), [0])
+        self.assertEqual(self.key_of(client, 0), "fake_key_1")
+        mock_configure.assert_not_called()
 
-    @patch('google.generativeai.configure')
-    def test_rotate_key(self, mock_configure):
+    def test_rotate_key(self):
         client = GeminiClient()
         
         # Rotate 1 -> 2
         success = client.rotate_key()
         self.assertTrue(success)
         self.assertEqual(client.current_key_index, 1)
-        mock_configure.assert_called_with(api_key="fake_key_2")
         
         # Rotate 2 -> 3
         client.rotate_key()
         self.assertEqual(client.current_key_index, 2)
-        mock_configure.assert_called_with(api_key="fake_key_3")
         
         # Rotate 3 -> 1 (Cycle)
         client.rotate_key()
         self.assertEqual(client.current_key_index, 0)
-        mock_configure.assert_called_with(api_key="fake_key_1")
+        self.assertEqual([self.key_of(client, i) for i in range(3)], ["fake_key_1", "fake_key_2", "fake_key_3"])
+
+    def test_rotation_after_another_thread_already_rotated(self):
+        client = GeminiClient()
+        client.rotate_key()
+        # A request that failed on key 0 does not skip key 1, which another request moved to
+        self.assertTrue(client.rotate_key(failed_index=0))
+        self.assertEqual(client.current_key_index, 1)
+        client.rotate_key(failed_index=1)
+        self.assertEqual(client.current_key_index, 2)
+
+    def test_concurrent_construction(self):
+        start = threading.Barrier(8)
+        clients = []
+
+        def build():
+            start.wait()
+            clients.append(GeminiClient())
+
+        with patch.object(GeminiClient, '_load_api_keys', wraps=GeminiClient._load_api_keys,
+                          autospec=True) as load:
+            threads = [threading.Thread(target=build) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len({id(client) for client in clients}), 1)
+        load.assert_called_once()
+
+    @patch('google.generativeai.GenerativeModel')
+    def test_models_are_pinned_to_their_key(self, mock_model_class):
+        mock_model_class.side_effect = lambda *args, **kwargs: MagicMock()
+        client = GeminiClient()
+        first = client.get_model("model-name")
+        client.rotate_key()
+        second = client.get_model("model-name")
+        self.assertIsNot(first, second)
+        self.assertIs(first._client, client.get_client(0))
+        self.assertIs(second._client, client.get_client(1))
+        self.assertIs(client.get_model("model-name", key_index=0), first)
+
+    @patch('google.generativeai.GenerativeModel')
+    def test_error_is_charged_to_the_key_that_served_it(self, mock_model_class):
+        models = {}
+
+        def make_model(*args, **kwargs):
+            model = MagicMock()
+            models[len(models)] = model
+            return model
+
+        mock_model_class.side_effect = make_model
+        client = GeminiClient()
+
+        def quota_after_rotation(prompt):
+            # Another request rotates while this one is still waiting on key 0
+            client.rotate_key()
+            raise google_exceptions.ResourceExhausted("Quota exceeded")
+
+        client.get_model("model-name", key_index=0).generate_content.side_effect = quota_after_rotation
+        client.get_model("model-name", key_index=1).generate_content.return_value = "Success Response"
+
+        self.assertEqual(client.generate_content("model-name", "prompt"), "Success Response")
+        self.assertFalse(client.key_manager.is_usable(0))
+        self.assertEqual(client.key_manager.states[1].status, "valid")
+        # The failed request did not push the client past the key the other request chose
+        self.assertEqual(client.current_key_index, 1)
 
     @patch('google.generativeai.GenerativeModel')
     def test_execution_fallback(self, mock_model_class):
@@ -78,6 +146,24 @@ class TestGeminiClient(unittest.TestCase):
             self.assertEqual(mock_rotate.call_count, 2)
             self.assertEqual(client.current_key_index, 2) # Should be on key 3 (index 2)
 
+    @patch('google.generativeai.GenerativeModel')
+    def test_skips_keys_known_to_be_bad(self, mock_model_class):
+        mock_model = MagicMock()
+        mock_model_class.return_value = mock_model
+        mock_model.generate_content.return_value = "Success Response"
+
+        client = GeminiClient()
+        # Found exhausted / invalid by a background probe
+        client.key_manager.mark_exhausted(0, retry_after=60)
+        client.key_manager.mark_invalid(1)
+
+        response = client.generate_content("model-name", "prompt")
+
+        self.assertEqual(response, "Success Response")
+        self.assertEqual(mock_model.generate_content.call_count, 1)
+        self.assertEqual(client.current_key_index, 2)
+        self.assertIs(mock_model_class.return_value._client, client.get_client(2))
+
     @patch('google.generativeai.GenerativeModel')
     def test_all_keys_fail(self, mock_model_class):
          mock_model = MagicMock()
@@ -0,0 +1,180 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import shutil
+import tempfile
+
+# Add parent directory to path to import backend
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import Request, Response
+
+from backend import database
+from backend import http_cache
+from backend import migrations
+from backend.response_cache import ResponseCache
+
+REPO_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'database.db')
+
+VERSIONS = {
+    "news": {"version": 3, "updated_at": "2024-05-01 10:00:00"},
+    "news_categories": {"version": 1, "updated_at": "2024-04-01 08:00:00"},
+    "tips": {"version": 7, "updated_at": "2024-05-02 12:30:00"},
+}
+
+
+def make_request(path="/api/news", query="", headers=None):
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": query.encode(),
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+    })
+
+
+class TestConditionalGet(unittest.TestCase):
+    def get(self, versions=VERSIONS, **kwargs):
+        response = Response()
+        result = http_cache.conditional_get(make_request(**kwargs), response, http_cache.NEWS_TABLES,
+                                            versions=versions)
+        return result, response
+
+    def test_sets_validators(self):
+        result, response = self.get()
+        self.assertIsNone(result)
+        self.assertTrue(response.headers["etag"].startswith('W/"'))
+        # Newest of the tables the endpoint reads
+        self.assertEqual(response.headers["last-modified"], "Wed, 01 May 2024 10:00:00 GMT")
+        self.assertIn("max-age=", response.headers["cache-control"])
+
+    def test_etag_depends_on_query_and_versions(self):
+        etag = self.get()[1].headers["etag"]
+        self.assertEqual(self.get()[1].headers["etag"], etag)
+        self.assertNotEqual(self.get(query="limit=5")[1].headers["etag"], etag)
+        bumped = dict(VERSIONS, news={"version": 4, "updated_at": "2024-05-01 10:00:00"})
+        self.assertNotEqual(self.get(versions=bumped)[1].headers["etag"], etag)
+        # tips is not read by the news endpoints
+        other = dict(VERSIONS, tips={"version": 8, "updated_at": "2024-05-03 00:00:00"})
+        self.assertEqual(self.get(versions=other)[1].headers["etag"], etag)
+
+    def test_matching_etag_gives_304(self):
+        etag = self.get()[1].headers["etag"]
+        for header in (etag, etag.removeprefix("W/"), f'"other", {etag}', "*"):
+            result, response = self.get(headers={"If-None-Match": header})
+            self.assertEqual(result.status_code, 304)
+            self.assertEqual(result.headers["etag"], etag)
+            # Same Vary as the 200, so caches keep the encodings apart
+            self.assertEqual(result.headers["vary"], "Accept-Encoding")
+            self.assertNotIn("etag", response.headers)
+        result, _ = self.get(headers={"If-None-Match": '"other"'})
+        self.assertIsNone(result)
+
+    def test_if_modified_since(self):
+        result, _ = self.get(headers={"If-Modified-Since": "Wed, 01 May 2024 10:00:00 GMT"})
+        self.assertEqual(result.status_code, 304)
+        result, _ = self.get(headers={"If-Modified-Since": "Wed, 01 May 2024 09:59:59 GMT"})
+        self.assertIsNone(result)
+        result, _ = self.get(headers={"If-Modified-Since": "not a date"})
+        self.assertIsNone(result)
+
+    def test_if_none_match_takes_precedence(self):
+        result, _ = self.get(headers={"If-None-Match": '"other"',
+                                      "If-Modified-Since": "Thu, 01 Jan 2099 00:00:00 GMT"})
+        self.assertIsNone(result)
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = ResponseCache(max_entries=3, max_bytes=1000)
+        self.cache.enabled = True
+
+    def store(self, key, body=b"{}", tags=("news",), versions=VERSIONS):
+        return self.cache.set(key, body, tags, self.cache.current_versions(tags, versions))
+
+    def test_make_key_ignores_parameter_order(self):
+        self.assertEqual(ResponseCache.make_key("/api/news", [("a", "1"), ("b", "2")]),
+                         ResponseCache.make_key("/api/news", [("b", "2"), ("a", "1")]))
+
+    def test_hit_and_stale_on_version_change(self):
+        entry = self.store("k", b'{"a": 1}')
+        self.assertIs(self.cache.get("k", VERSIONS), entry)
+        bumped = dict(VERSIONS, news={"version": 4, "updated_at": None})
+        self.assertIsNone(self.cache.get("k", bumped))
+        # Versions of tables the entry was not built from do not matter
+        other = dict(VERSIONS, tips={"version": 8, "updated_at": None})
+        self.assertIs(self.cache.get("k", other), entry)
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 1))
+
+    def test_invalidate_by_tag(self):
+        self.store("news", tags=("news", "news_categories"))
+        self.store("tips", tags=("tips",))
+        self.assertEqual(self.cache.invalidate("news_categories"), 1)
+        self.assertIsNone(self.cache.get("news", VERSIONS))
+        self.assertIsNotNone(self.cache.get("tips", VERSIONS))
+        self.assertNotIn("news", self.cache.by_tag)
+
+    def test_lru_eviction(self):
+        for key in ("a", "b", "c"):
+            self.store(key)
+        self.cache.get("a", VERSIONS)
+        self.store("d")
+        self.assertEqual(list(self.cache.entries), ["c", "a", "d"])
+        self.assertEqual(self.cache.evictions, 1)
+
+    def test_size_limit_counts_encodings(self):
+        self.store("big", b"x" * 2000)
+        self.assertNotIn("big", self.cache.entries)
+        entry = self.store("a", b"x" * 400)
+        self.store("b", b"x" * 400)
+        self.cache.add_encoding("a", entry, "gzip", b"y" * 100)
+        self.assertEqual(self.cache.size, 900)
+        self.cache.add_encoding("b", self.cache.entries["b"], "gzip", b"y" * 200)
+        self.assertEqual(list(self.cache.entries), ["b"])
+        self.assertEqual(self.cache.size, 600)
+
+
+class TestDataVersions(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.original_path = database.DB_PATH
+        database.DB_PATH = os.path.join(self.tmp_dir, "test.db")
+        shutil.copy(REPO_DB, database.DB_PATH)
+        database.close_all_connections()
+        with database.get_db_connection() as conn:
+            migrations.run_migrations(conn)
+
+    def tearDown(self):
+        database.close_all_connections()
+        database.DB_PATH = self.original_path
+        shutil.rmtree(self.tmp_dir)
+
+    def test_unversioned_writes_keep_cached_versions(self):
+        versions = database.get_data_versions()
+        database.add_log_batch([(1, "soru", "cevap", None)], [(1, "domates")])
+        database.add_search_history(1, "biber")
+        self.assertIs(database.cached_data_versions(), versions)
+
+    def test_versioned_writes_refresh_versions(self):
+        before = database.get_data_versions()["tips"]["version"]
+        database.add_tip("başlık", "içerik")
+        self.assertIsNone(database.cached_data_versions())
+        self.assertEqual(database.get_data_versions()["tips"]["version"], before + 1)
+
+    def test_resolve_versions_reads_off_the_event_loop(self):
+        async def reader():
+            return {"news": {"version": 99, "updated_at": None}}
+
+        with patch("backend.async_database.get_data_versions", side_effect=reader) as read:
+            versions = database.get_data_versions()
+            self.assertIs(asyncio.run(http_cache.resolve_versions()), versions)
+            read.assert_not_called()
+            database.add_tip("başlık", "içerik")
+            self.assertEqual(asyncio.run(http_cache.resolve_versions())["news"]["version"], 99)
+            read.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
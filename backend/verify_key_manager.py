@@ -0,0 +1,80 @@
+import asyncio
+import time
+import unittest
+import os
+import sys
+
+import httpx
+
+# Add parent directory to path to import backend
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.key_manager import KeyManager
+
+
+class TestKeyManager(unittest.TestCase):
+    def make_manager(self, responses):
+        """responses: api key -> httpx.Response (or exception) for the countTokens probe"""
+        self.seen = []
+
+        def handler(request):
+            key = request.headers["x-goog-api-key"]
+            self.seen.append((key, request.url.path))
+            result = responses[key]
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        return KeyManager(list(responses), endpoint="http://gemini.local", transport=httpx.MockTransport(handler))
+
+    def test_probe_classifies_keys(self):
+        manager = self.make_manager({
+            "good": httpx.Response(200, json={"totalTokens": 1}),
+            "quota": httpx.Response(429, json={"error": {"code": 429, "details": [
+                {"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "30s"}]}}),
+            "bad": httpx.Response(400, json={"error": {"code": 400, "details": [{"reason": "API_KEY_INVALID"}]}}),
+            "flaky": httpx.ConnectError("connection refused"),
+        })
+        asyncio.run(manager.probe_all())
+
+        self.assertEqual([state.status for state in manager.states], ["valid", "exhausted", "invalid", "error"])
+        self.assertAlmostEqual(manager.states[1].exhausted_until - time.time(), 30, delta=2)
+        self.assertEqual(manager.usable_indices(), [0, 3])
+        self.assertTrue(all(path == "/v1beta/models/gemini-2.5-flash:countTokens" for _, path in self.seen))
+        self.assertNotIn("good", str(manager.summary()))
+
+    def test_next_usable_skips_bad_keys(self):
+        manager = KeyManager(["a", "b", "c"], endpoint="http://gemini.local")
+        manager.mark_exhausted(1, retry_after=60)
+        self.assertEqual(manager.next_usable(0), 2)
+        manager.mark_invalid(2)
+        self.assertEqual(manager.next_usable(0), 0)
+        manager.mark_exhausted(0, retry_after=60)
+        self.assertIsNone(manager.next_usable(0))
+
+    def test_inconclusive_probe_keeps_invalid(self):
+        manager = self.make_manager({"bad": httpx.Response(503, text="unavailable")})
+        manager.mark_invalid(0, "403")
+        asyncio.run(manager.probe_all())
+        self.assertEqual(manager.states[0].status, "invalid")
+        self.assertIn("503", manager.states[0].last_error)
+
+    def test_successful_probe_keeps_quota_cooldown(self):
+        manager = self.make_manager({"quota": httpx.Response(200, json={"totalTokens": 1}),
+                                     "bad": httpx.Response(200, json={"totalTokens": 1})})
+        manager.mark_exhausted(0, retry_after=60)
+        manager.mark_invalid(1, "403")
+        asyncio.run(manager.probe_all())
+        self.assertEqual(manager.states[0].status, "exhausted")
+        self.assertFalse(manager.is_usable(0))
+        self.assertIsNotNone(manager.states[0].last_checked)
+        # Invalid keys come back, and an exhausted key does once its cooldown is over
+        self.assertEqual(manager.states[1].status, "valid")
+        manager.states[0].exhausted_until = time.time() - 1
+        asyncio.run(manager.probe_all())
+        self.assertEqual(manager.states[0].status, "valid")
+        self.assertTrue(manager.is_usable(0))
+
+
+if __name__ == '__main__':
+    unittest.main()
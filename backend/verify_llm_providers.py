@@ -0,0 +1,131 @@
+import json
+import unittest
+from unittest.mock import patch
+import os
+import sys
+
+import httpx
+import numpy as np
+
+# Add parent directory to path to import backend
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.llm_providers import FakeProvider, GeminiProvider, OpenAICompatibleProvider, create_provider
+from backend.rag_system import LightweightRAG
+from google.api_core import exceptions as google_exceptions
+
+
+class TestFakeProvider(unittest.TestCase):
+    def test_deterministic(self):
+        provider = FakeProvider()
+        first = provider.generate_content("fake", "Domates nasıl sulanır?")
+        second = provider.generate_content("fake", "Domates nasıl sulanır?")
+        self.assertEqual(first.text, second.text)
+        self.assertIn("Domates nasıl sulanır?", first.text)
+
+        single = provider.embed_content(provider.embedding_model, "buğday")["embedding"]
+        batch = provider.embed_content(provider.embedding_model, ["buğday", "arpa"])["embedding"]
+        self.assertEqual(len(single), 768)
+        self.assertEqual(batch[0], single)
+        self.assertNotEqual(batch[0], batch[1])
+
+    def test_replaces_gemini_models(self):
+        self.assertEqual(FakeProvider().generation_models(["gemini-2.5-flash", "gemini-2.5-pro"]), ["fake"])
+
+    def test_unknown_provider(self):
+        with self.assertRaises(ValueError):
+            create_provider("nope")
+
+
+class TestOpenAICompatibleProvider(unittest.TestCase):
+    def make_provider(self, handler):
+        return OpenAICompatibleProvider(
+            base_url="http://llm.local/v1", api_key="secret", models=["qwen", "llama"],
+            embedding_model="nomic-embed", transport=httpx.MockTransport(handler)
+        )
+
+    def test_chat_completion(self):
+        seen = {}
+
+        def handler(request):
+            seen["url"] = str(request.url)
+            seen["auth"] = request.headers.get("authorization")
+            seen["body"] = json.loads(request.content)
+            return httpx.Response(200, json={
+                "model": "qwen",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "Sabah erken sulayın."}}],
+            })
+
+        provider = self.make_provider(handler)
+        result = provider.generate_content("qwen", "Ne zaman sulamalıyım?", system_instruction="Tarım asistanısın.")
+        self.assertEqual(result.text, "Sabah erken sulayın.")
+        self.assertEqual(seen["url"], "http://llm.local/v1/chat/completions")
+        self.assertEqual(seen["auth"], "Bearer secret")
+        self.assertEqual([m["role"] for m in seen["body"]["messages"]], ["system", "user"])
+        self.assertEqual(provider.generation_models(["gemini-2.5-flash"]), ["qwen", "llama"])
+
+    def test_embeddings_keep_input_order(self):
+        def handler(request):
+            texts = json.loads(request.content)["input"]
+            data = [{"index": i, "embedding": [float(i), 1.0]} for i in range(len(texts))]
+            return httpx.Response(200, json={"data": list(reversed(data))})
+
+        provider = self.make_provider(handler)
+        self.assertEqual(provider.embed_content("nomic-embed", ["a", "b"])["embedding"], [[0.0, 1.0], [1.0, 1.0]])
+        self.assertEqual(provider.embed_content("nomic-embed", "a")["embedding"], [0.0, 1.0])
+
+    def test_errors_map_to_google_exceptions(self):
+        provider = self.make_provider(lambda request: httpx.Response(429, json={"error": "busy"}))
+        with self.assertRaises(google_exceptions.TooManyRequests):
+            provider.generate_content("qwen", "x")
+
+        def refuse(request):
+            raise httpx.ConnectError("connection refused")
+
+        with self.assertRaises(google_exceptions.ServiceUnavailable):
+            self.make_provider(refuse).generate_content("qwen", "x")
+
+    def test_models_are_required(self):
+        with self.assertRaisesRegex(ValueError, "OPENAI_MODELS"):
+            OpenAICompatibleProvider(models=[])
+        with patch.dict(os.environ, {"OPENAI_MODELS": " , "}):
+            with self.assertRaisesRegex(ValueError, "OPENAI_MODELS"):
+                OpenAICompatibleProvider()
+
+    def test_embedding_dimensions(self):
+        self.assertIsNone(self.make_provider(None).embedding_dimensions)
+        with patch.dict(os.environ, {"OPENAI_EMBEDDING_DIMENSIONS": "384"}):
+            self.assertEqual(self.make_provider(None).embedding_dimensions, 384)
+
+
+class TestEmbeddingDimensions(unittest.TestCase):
+    def make_rag(self, provider):
+        rag = LightweightRAG()
+        rag.client = provider
+        return rag
+
+    def test_provider_dimensions(self):
+        self.assertEqual(GeminiProvider(client=object()).embedding_dimensions, 768)
+        self.assertEqual(FakeProvider(dimensions=64).embedding_dimensions, 64)
+
+    def test_failed_embedding_matches_the_provider(self):
+        provider = FakeProvider(dimensions=64)
+        rag = self.make_rag(provider)
+        with patch.object(provider, "embed_content", side_effect=google_exceptions.ServiceUnavailable("down")):
+            vector = rag._get_embedding("buğday")
+        self.assertEqual(vector.shape, (64,))
+        self.assertFalse(vector.any())
+
+    def test_failed_embedding_matches_the_index(self):
+        provider = OpenAICompatibleProvider(models=["qwen"], transport=httpx.MockTransport(
+            lambda request: httpx.Response(500, json={"error": "down"})))
+        provider.retry_policy.max_retries = 0
+        rag = self.make_rag(provider)
+        with self.assertRaisesRegex(ValueError, "OPENAI_EMBEDDING_DIMENSIONS"):
+            rag._get_embedding("buğday")
+        rag.embeddings = np.ones((3, 384))
+        self.assertEqual(rag._get_embedding("buğday").shape, (384,))
+
+
+if __name__ == '__main__':
+    unittest.main()
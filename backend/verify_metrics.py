@@ -0,0 +1,94 @@
+import unittest
+import os
+import sys
+
+# Add parent directory to path to import backend
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend import metrics
+from backend.metrics import Counter, Gauge, Histogram, Registry
+
+
+class TestExposition(unittest.TestCase):
+    def test_counter(self):
+        counter = Counter("requests_total", "Requests", ("route", "status"))
+        counter.inc(route="/api/news", status=200)
+        counter.inc(2.5, route="/api/chat", status=429)
+        self.assertEqual(counter.get(route="/api/news", status="200"), 1)
+        self.assertEqual(counter.render().splitlines(), [
+            "# HELP requests_total Requests",
+            "# TYPE requests_total counter",
+            'requests_total{route="/api/chat",status="429"} 2.5',
+            'requests_total{route="/api/news",status="200"} 1',
+        ])
+
+    def test_label_escaping(self):
+        counter = Counter("odd_total", "Odd labels", ("value",))
+        counter.inc(value='a "quoted" \\path\\\nnext')
+        self.assertEqual(list(counter.samples()), ['odd_total{value="a \\"quoted\\" \\\\path\\\\\\nnext"} 1'])
+
+    def test_labels_must_match(self):
+        counter = Counter("labelled_total", "Labelled", ("route",))
+        with self.assertRaises(ValueError):
+            counter.inc()
+        with self.assertRaises(ValueError):
+            counter.inc(route="/", status=200)
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram("latency_seconds", "Latency", ("mode",), buckets=(0.1, 1.0, 0.5))
+        for value in (0.05, 0.1, 0.3, 0.7, 5.0):
+            histogram.observe(value, mode="read")
+        self.assertEqual(histogram.count(mode="read"), 5)
+        self.assertEqual(list(histogram.samples()), [
+            'latency_seconds_bucket{mode="read",le="0.1"} 2',
+            'latency_seconds_bucket{mode="read",le="0.5"} 3',
+            'latency_seconds_bucket{mode="read",le="1"} 4',
+            'latency_seconds_bucket{mode="read",le="+Inf"} 5',
+            'latency_seconds_sum{mode="read"} 6.15',
+            'latency_seconds_count{mode="read"} 5',
+        ])
+
+    def test_histogram_time_records_failures(self):
+        histogram = Histogram("block_seconds", "Block")
+        with self.assertRaises(RuntimeError):
+            with histogram.time():
+                raise RuntimeError("boom")
+        self.assertEqual(histogram.count(), 1)
+
+    def test_gauge_values_and_callbacks(self):
+        gauge = Gauge("in_progress", "In progress")
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+        self.assertEqual(list(gauge.samples()), ["in_progress 1"])
+
+        per_table = Gauge("data_version", "Versions", ("table",))
+        per_table.set_function(lambda: {("tips",): 7, ("news",): 3, ("empty",): None})
+        self.assertEqual(list(per_table.samples()), ['data_version{table="news"} 3', 'data_version{table="tips"} 7'])
+
+        def broken():
+            raise RuntimeError("database is locked")
+        per_table.set_function(broken)
+        self.assertEqual(list(per_table.samples()), [])
+
+    def test_registry(self):
+        registry = Registry()
+        first = registry.register(Counter("hits_total", "Hits"))
+        # Re-declaring (e.g. on reload) returns the registered metric
+        self.assertIs(registry.register(Counter("hits_total", "Hits")), first)
+        registry.register(Gauge("up", "Up", function=lambda: 1))
+        first.inc()
+        self.assertEqual(registry.render(),
+                         "# HELP hits_total Hits\n# TYPE hits_total counter\nhits_total 1\n"
+                         "# HELP up Up\n# TYPE up gauge\nup 1\n")
+
+    def test_backend_metrics_render(self):
+        text = metrics.render()
+        self.assertTrue(text.endswith("\n"))
+        self.assertIn("# TYPE http_request_duration_seconds histogram", text)
+        names = [line.split()[2] for line in text.splitlines() if line.startswith("# TYPE")]
+        self.assertEqual(len(names), len(set(names)))
+
+
+if __name__ == '__main__':
+    unittest.main()
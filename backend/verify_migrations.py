@@ -0,0 +1,111 @@
+import unittest
+import os
+import sys
+import shutil
+import sqlite3
+import tempfile
+
+# Add parent directory to path to import backend
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend import migrations
+
+class TestMigrations(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.conn = sqlite3.connect(os.path.join(self.tmp_dir, "test.db"))
+        # Schema as created by the original init_db.py
+        self.conn.executescript("""
+            CREATE TABLE tips (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, content TEXT,
+                               difficulty TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+            CREATE TABLE news (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, summary TEXT, content TEXT,
+                               category_id INTEGER, published_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+            CREATE TABLE news_categories (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, description TEXT);
+            CREATE TABLE search_history (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, query TEXT,
+                                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+            CREATE TABLE chat_log (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, user_message TEXT,
+                                   bot_response TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+            CREATE TABLE favorite_news (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, news_id INTEGER,
+                                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+            CREATE INDEX idx_news_category ON news(category_id);
+            CREATE INDEX idx_chat_user ON chat_log(user_id);
+        """)
+
+    def tearDown(self):
+        self.conn.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_upgrades_existing_database(self):
+        self.assertEqual(migrations.current_version(self.conn), 0)
+        with self.assertRaises(migrations.SchemaError):
+            migrations.verify_schema(self.conn)
+
+        applied = migrations.run_migrations(self.conn)
+
+        self.assertEqual(applied, [m[0] for m in migrations.MIGRATIONS])
+        self.assertEqual(migrations.current_version(self.conn), migrations.LATEST_VERSION)
+        migrations.verify_schema(self.conn)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(chat_log)")]
+        self.assertIn("conversation_id", columns)
+
+    def test_missing_objects_of_callable_migrations(self):
+        migrations.run_migrations(self.conn)
+        self.conn.execute("DROP INDEX idx_chat_conversation")
+        with self.assertRaisesRegex(migrations.SchemaError, "idx_chat_conversation"):
+            migrations.verify_schema(self.conn)
+        self.conn.execute("ALTER TABLE chat_log DROP COLUMN conversation_id")
+        with self.assertRaisesRegex(migrations.SchemaError, "chat_log.conversation_id"):
+            migrations.verify_schema(self.conn)
+
+    def test_callable_migrations_must_declare_objects(self):
+        def undeclared(cursor):
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_tips_title ON tips(title)")
+
+        original = migrations.MIGRATIONS
+        migrations.MIGRATIONS = original + [(99, "undeclared", undeclared)]
+        try:
+            with self.assertRaisesRegex(migrations.SchemaError, "Migration 99"):
+                migrations._expected_objects("INDEX")
+        finally:
+            migrations.MIGRATIONS = original
+
+    def test_rerun_is_noop(self):
+        migrations.run_migrations(self.conn)
+        self.assertEqual(migrations.run_migrations(self.conn), [])
+
+    def test_news_ordering_uses_index(self):
+        migrations.run_migrations(self.conn)
+        plan = " ".join(row[3] for row in self.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM news ORDER BY published_at DESC, id DESC LIMIT 20"
+        ))
+        self.assertIn("idx_news_published", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_fts_index_follows_table_changes(self):
+        self.conn.execute("INSERT INTO news (title, summary, content) VALUES ('Eski haber', 'Domates', 'x')")
+        self.conn.commit()
+        migrations.run_migrations(self.conn)
+        search = "SELECT rowid FROM news_fts WHERE news_fts MATCH ?"
+
+        # Rows that existed before the migration are indexed by the rebuild
+        self.assertEqual(len(self.conn.execute(search, ('"domates"*',)).fetchall()), 1)
+
+        self.conn.execute("UPDATE news SET summary = 'Biber' WHERE id = 1")
+        self.assertEqual(self.conn.execute(search, ('"domates"*',)).fetchall(), [])
+        self.assertEqual(len(self.conn.execute(search, ('"biber"*',)).fetchall()), 1)
+
+        self.conn.execute("DELETE FROM news WHERE id = 1")
+        self.assertEqual(self.conn.execute(search, ('"biber"*',)).fetchall(), [])
+
+    def test_writes_bump_data_versions(self):
+        migrations.run_migrations(self.conn)
+        version = "SELECT version FROM data_versions WHERE table_name = ?"
+        self.assertEqual(self.conn.execute(version, ("news",)).fetchone()[0], 0)
+
+        self.conn.execute("INSERT INTO news (title) VALUES ('a')")
+        self.conn.execute("UPDATE news SET title = 'b'")
+        self.assertEqual(self.conn.execute(version, ("news",)).fetchone()[0], 2)
+        self.assertEqual(self.conn.execute(version, ("tips",)).fetchone()[0], 0)
+
+if __name__ == '__main__':
+    unittest.main()
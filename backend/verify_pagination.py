@@ -0,0 +1,102 @@
+import base64
+import json
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+# Add parent directory to path to import backend
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend import database
+from backend import migrations
+
+REPO_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'database.db')
+
+# Three rows share a timestamp, so the page boundaries fall inside ties
+NEWS_DATES = ["2024-05-03 09:00:00", "2024-05-02 09:00:00", "2024-05-02 09:00:00",
+              "2024-05-02 09:00:00", "2024-05-01 09:00:00"]
+
+
+def raw_cursor(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+
+class TestKeysetPagination(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.original_path = database.DB_PATH
+        database.DB_PATH = os.path.join(self.tmp_dir, "test.db")
+        shutil.copy(REPO_DB, database.DB_PATH)
+        database.close_all_connections()
+        with database.get_db_connection() as conn:
+            migrations.run_migrations(conn)
+
+        # Own category / difficulty, so rows already in the database do not interfere
+        self.category_id = database.add_category("Sayfalama testi")
+        self.news_ids = database.bulk_insert_news([
+            {"title": f"Haber {i}", "content": "içerik", "category_id": self.category_id, "published_at": date}
+            for i, date in enumerate(NEWS_DATES)
+        ])
+        self.tip_ids = database.bulk_insert_tips([
+            {"title": f"İpucu {i}", "content": "içerik", "difficulty": "sayfalama",
+             "created_at": "2024-05-01 09:00:00"}
+            for i in range(4)
+        ])
+
+    def tearDown(self):
+        database.close_all_connections()
+        database.DB_PATH = self.original_path
+        shutil.rmtree(self.tmp_dir)
+
+    def walk(self, fetch, limit, **filters):
+        pages, cursor = [], None
+        while True:
+            page = fetch(limit=limit, cursor=cursor, **filters)
+            pages.append([item["id"] for item in page["items"]])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return pages
+
+    def test_news_pages_cover_ties_once(self):
+        expected = [self.news_ids[0], *reversed(self.news_ids[1:4]), self.news_ids[4]]
+        self.assertEqual(self.walk(database.get_news_page, 2, category_id=self.category_id),
+                         [expected[0:2], expected[2:4], expected[4:]])
+        unpaged = database.get_news_page(category_id=self.category_id)
+        self.assertEqual([item["id"] for item in unpaged["items"]], expected)
+        self.assertIsNone(unpaged["next_cursor"])
+
+    def test_last_full_page_has_no_cursor(self):
+        # 4 rows in pages of 2: the second page is the last one
+        pages = self.walk(database.get_tips_page, 2, difficulty="sayfalama")
+        self.assertEqual(pages, [self.tip_ids[:1:-1], self.tip_ids[1::-1]])
+
+    def test_cursor_with_selected_fields(self):
+        page = database.get_news_page(limit=1, category_id=self.category_id, fields=["title"])
+        self.assertEqual(set(page["items"][0]), {"id", "published_at", "title"})
+        following = database.get_news_page(limit=1, category_id=self.category_id,
+                                           cursor=page["next_cursor"], fields=["title"])
+        self.assertEqual(following["items"][0]["id"], self.news_ids[3])
+
+    def test_cursor_round_trip(self):
+        cursor = database.encode_cursor("2024-05-02 09:00:00", 42)
+        self.assertEqual(database.decode_cursor(cursor), ("2024-05-02 09:00:00", 42))
+        self.assertNotIn("=", cursor)
+
+    def test_bad_cursors(self):
+        for cursor in ("!!!", raw_cursor([1]), raw_cursor(["a", "b"]), raw_cursor([["a"], 1]),
+                       raw_cursor({"a": 1}), base64.urlsafe_b64encode(b"\xff").decode()):
+            with self.assertRaises(ValueError, msg=cursor):
+                database.get_news_page(limit=2, cursor=cursor)
+
+    def test_bad_limits(self):
+        for limit in (0, -1, -5):
+            with self.assertRaises(ValueError):
+                database.get_news_page(limit=limit)
+            with self.assertRaises(ValueError):
+                database.get_tips_page(limit=limit)
+
+
+if __name__ == '__main__':
+    unittest.main()
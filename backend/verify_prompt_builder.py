@@ -0,0 +1,43 @@
+import unittest
+import os
+import sys
+
+# Add parent directory to path to import backend
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.prompt_builder import PromptBuilder, TokenCounter
+
+class TestPromptBuilder(unittest.TestCase):
+    def setUp(self):
+        self.builder = PromptBuilder(counter=TokenCounter(chars_per_token=4.0), budget=300)
+
+    def test_message_only(self):
+        prompt = self.builder.build("Domates ne zaman ekilir?")
+        self.assertEqual(prompt.text, "Domates ne zaman ekilir?")
+
+    def test_history_newest_first(self):
+        history = [{"user": f"soru {i} " + "x" * 400, "assistant": ""} for i in range(5)]
+        prompt = self.builder.build("son soru", history=history)
+        # Only the newest turns fit, and they stay in chronological order
+        self.assertIn("soru 4", prompt.text)
+        self.assertNotIn("soru 0", prompt.text)
+        self.assertLess(prompt.text.index("soru 3"), prompt.text.index("soru 4"))
+        self.assertNotIn("Assistant: \n", prompt.text)
+
+    def test_documents_packed_by_score(self):
+        docs = [
+            {"type": "news", "content": "dusuk " * 150, "score": 0.4},
+            {"type": "tip", "content": "yuksek", "score": 0.9},
+        ]
+        prompt = self.builder.build("soru", documents=docs)
+        self.assertEqual(prompt.documents[0]["content"], "yuksek")
+        self.assertLessEqual(prompt.tokens, 300)
+
+    def test_calibration(self):
+        counter = TokenCounter()
+        counter.calibrate(["a" * 100], lambda text: 25)
+        self.assertTrue(counter.calibrated)
+        self.assertEqual(counter.chars_per_token, 4.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+import os
+import sys
+
+# Add parent directory to path to import backend
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend import rate_limit
+from backend.rate_limit import RateLimiter, RateLimitMiddleware, SlidingWindow, client_key, parse_limits
+
+
+def make_scope(peer="203.0.113.5", path="/api/chat", headers=None):
+    return {
+        "type": "http",
+        "path": path,
+        "client": (peer, 51234),
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+    }
+
+
+class TestParseLimits(unittest.TestCase):
+    def test_parse(self):
+        self.assertEqual(parse_limits(" /api/chat=20/60 , /api/generate-text=10/0.5,"),
+                         {"/api/chat": (20, 60.0), "/api/generate-text": (10, 0.5)})
+        self.assertEqual(parse_limits(""), {})
+
+    def test_invalid(self):
+        for spec in ("/api/chat", "/api/chat=20", "/api/chat=x/60"):
+            with self.assertRaises(ValueError):
+                parse_limits(spec)
+
+
+class TestSlidingWindow(unittest.TestCase):
+    def test_limit_within_a_window(self):
+        window = SlidingWindow(limit=2, window=10)
+        self.assertEqual(window.hit("a", 0.0), (True, 1, 0))
+        self.assertEqual(window.hit("a", 1.0), (True, 0, 0))
+        allowed, remaining, retry_after = window.hit("a", 2.0)
+        self.assertFalse(allowed)
+        self.assertEqual(remaining, 0)
+        # Half of the first window has to slide out: 5s into the next one
+        self.assertEqual(retry_after, 13)
+        # Rejected requests are not counted, and other clients are independent
+        self.assertEqual(window.counters["a"], [0, 0, 2])
+        self.assertTrue(window.hit("b", 2.0)[0])
+
+    def test_previous_window_slides_out(self):
+        window = SlidingWindow(limit=2, window=10)
+        window.hit("a", 8.0)
+        window.hit("a", 9.0)
+        self.assertFalse(window.hit("a", 14.0)[0])
+        self.assertTrue(window.hit("a", 15.0)[0])
+        # Two windows later the old counts are gone entirely
+        self.assertEqual(window.hit("a", 31.0), (True, 1, 0))
+
+    def test_retry_after_is_accurate(self):
+        window = SlidingWindow(limit=3, window=10)
+        for t in (0.0, 1.0, 2.0):
+            window.hit("a", t)
+        retry_after = window.hit("a", 3.0)[2]
+        self.assertFalse(window.hit("a", 3.0 + retry_after - 1)[0])
+        self.assertTrue(window.hit("a", 3.0 + retry_after)[0])
+
+    def test_sweep(self):
+        window = SlidingWindow(limit=5, window=10)
+        window.hit("old", 0.0)
+        window.hit("recent", 15.0)
+        self.assertEqual(window.sweep(25.0), 1)
+        self.assertEqual(list(window.counters), ["recent"])
+
+
+class TestClientKey(unittest.TestCase):
+    def setUp(self):
+        patcher = patch.object(rate_limit, "RATE_LIMIT_TOKENS", ["partner-key", "admin-secret"])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_forged_tokens_fall_back_to_the_address(self):
+        keys = {client_key(make_scope(headers={"X-API-Key": f"random-{i}"})) for i in range(5)}
+        keys.add(client_key(make_scope(headers={"Authorization": "Bearer made-up"})))
+        self.assertEqual(keys, {"ip:203.0.113.5"})
+
+    def test_configured_tokens_get_their_own_counter(self):
+        by_header = client_key(make_scope(headers={"X-API-Key": "partner-key"}))
+        by_bearer = client_key(make_scope(peer="198.51.100.7", headers={"Authorization": "bearer partner-key"}))
+        self.assertTrue(by_header.startswith("token:"))
+        self.assertNotIn("partner-key", by_header)
+        self.assertEqual(by_header, by_bearer)
+        self.assertNotEqual(client_key(make_scope(headers={"X-API-Key": "admin-secret"})), by_header)
+
+    def test_untrusted_peer_cannot_set_forwarding_headers(self):
+        scope = make_scope(headers={"X-Forwarded-For": "1.1.1.1"})
+        self.assertEqual(client_key(scope), "ip:203.0.113.5")
+
+    def test_trusted_proxy(self):
+        self.assertEqual(client_key(make_scope(peer="127.0.0.1")), "ip:127.0.0.1")
+        # A session id chosen by the browser does not select the bucket
+        self.assertEqual(client_key(make_scope(peer="127.0.0.1", headers={"X-Client-Id": "session-1"})),
+                         "ip:127.0.0.1")
+        # The rightmost address not belonging to our proxies; anything left of it is client-supplied
+        scope = make_scope(peer="127.0.0.1", headers={"X-Forwarded-For": "6.6.6.6, 9.9.9.9, ::1"})
+        self.assertEqual(client_key(scope), "ip:9.9.9.9")
+        scope = make_scope(peer="::1", headers={"X-Forwarded-For": "127.0.0.1"})
+        self.assertEqual(client_key(scope), "ip:::1")
+
+    def test_no_client(self):
+        scope = make_scope()
+        del scope["client"]
+        self.assertEqual(client_key(scope), "ip:unknown")
+
+
+class TestMiddleware(unittest.TestCase):
+    def call(self, middleware, scope):
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b""}
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(middleware(scope, receive, send))
+        return messages[0]["status"], dict(messages[0]["headers"])
+
+    def test_limited_route(self):
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"{}"})
+
+        middleware = RateLimitMiddleware(app, RateLimiter({"/api/chat": (1, 60)}))
+        status, headers = self.call(middleware, make_scope())
+        self.assertEqual(status, 200)
+        self.assertEqual((headers[b"x-ratelimit-limit"], headers[b"x-ratelimit-remaining"]), (b"1", b"0"))
+
+        status, headers = self.call(middleware, make_scope(headers={"X-API-Key": "forged"}))
+        self.assertEqual(status, 429)
+        self.assertGreaterEqual(int(headers[b"retry-after"]), 1)
+
+        # Other clients and unlimited paths are unaffected
+        self.assertEqual(self.call(middleware, make_scope(peer="198.51.100.7"))[0], 200)
+        status, headers = self.call(middleware, make_scope(path="/api/news"))
+        self.assertEqual(status, 200)
+        self.assertNotIn(b"x-ratelimit-limit", headers)
+
+    def test_sessions_from_one_client_share_a_bucket(self):
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"{}"})
+
+        middleware = RateLimitMiddleware(app, RateLimiter({"/api/chat": (1, 60)}))
+        # The frontend forwards the browser's address; a reload starts a new session id
+        first = make_scope(peer="127.0.0.1", headers={"X-Forwarded-For": "198.51.100.7", "X-Client-Id": "tab-1"})
+        reload = make_scope(peer="127.0.0.1", headers={"X-Forwarded-For": "198.51.100.7", "X-Client-Id": "tab-2"})
+        other = make_scope(peer="127.0.0.1", headers={"X-Forwarded-For": "198.51.100.8"})
+        self.assertEqual(self.call(middleware, first)[0], 200)
+        self.assertEqual(self.call(middleware, reload)[0], 429)
+        self.assertEqual(self.call(middleware, other)[0], 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
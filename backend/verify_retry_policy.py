@@ -0,0 +1,140 @@
+import asyncio
+import random
+import unittest
+from unittest.mock import patch
+import os
+import sys
+
+# Add parent directory to path to import backend
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.gemini_client import GeminiClient
+from backend.retry_policy import RetryPolicy, classify, retry_after, QUOTA, INVALID_KEY, TRANSIENT, FATAL
+from google.api_core import exceptions as google_exceptions
+
+
+class FakeResponse:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+class FakeCall:
+    """Stands in for a Gemini SDK call: raises or returns the scripted outcomes in order"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.keys = []
+
+    def __call__(self, key_index):
+        self.keys.append(key_index)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+class TestClassification(unittest.TestCase):
+    def test_classify(self):
+        self.assertEqual(classify(google_exceptions.ResourceExhausted("quota")), QUOTA)
+        self.assertEqual(classify(google_exceptions.TooManyRequests("quota")), QUOTA)
+        self.assertEqual(classify(google_exceptions.PermissionDenied("bad key")), INVALID_KEY)
+        for error in (google_exceptions.DeadlineExceeded("slow"), google_exceptions.ServiceUnavailable("down"),
+                      google_exceptions.InternalServerError("oops"), ConnectionResetError()):
+            self.assertEqual(classify(error), TRANSIENT)
+        self.assertEqual(classify(google_exceptions.InvalidArgument("bad prompt")), FATAL)
+        self.assertEqual(classify(ValueError("blocked")), FATAL)
+
+    def test_retry_after(self):
+        header = google_exceptions.TooManyRequests("quota", response=FakeResponse({"retry-after": "3"}))
+        self.assertEqual(retry_after(header), 3.0)
+        info = google_exceptions.TooManyRequests("quota", details=[
+            {"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "1.5s"}])
+        self.assertEqual(retry_after(info), 1.5)
+        self.assertIsNone(retry_after(google_exceptions.TooManyRequests("quota")))
+
+    def test_full_jitter_bounds(self):
+        policy = RetryPolicy(base_delay=0.5, max_delay=4.0, rng=random.Random(1))
+        for retry, cap in [(0, 0.5), (1, 1.0), (2, 2.0), (5, 4.0)]:
+            delays = [policy.backoff(retry) for _ in range(200)]
+            self.assertTrue(all(0 <= d <= cap for d in delays))
+            self.assertGreater(max(delays), cap * 0.8)
+
+
+class TestGeminiClientRetries(unittest.TestCase):
+    def setUp(self):
+        GeminiClient._instance = None
+        self.env_patcher = patch.dict(os.environ, {"GEMINI_API_KEY": "fake_key_1", "GEMINI_API_KEY_2": "fake_key_2"})
+        self.env_patcher.start()
+
+        self.sleeps = []
+        self.client = GeminiClient()
+        self.client.retry_policy = RetryPolicy(max_retries=2, base_delay=0.5, max_delay=4.0, budget_seconds=10,
+                                               sleep=self.sleeps.append, rng=random.Random(0))
+
+    def tearDown(self):
+        self.env_patcher.stop()
+
+    def test_transient_errors_retry_same_key_with_backoff(self):
+        call = FakeCall(google_exceptions.DeadlineExceeded("slow"),
+                        google_exceptions.ServiceUnavailable("down"), "ok")
+        self.assertEqual(self.client._execute_with_retry(call), "ok")
+        self.assertEqual(call.keys, [0, 0, 0])
+        self.assertEqual(len(self.sleeps), 2)
+        self.assertLessEqual(self.sleeps[0], 0.5)
+        self.assertLessEqual(self.sleeps[1], 1.0)
+
+    def test_retries_are_capped(self):
+        call = FakeCall(*[google_exceptions.InternalServerError("oops")] * 3)
+        with self.assertRaises(google_exceptions.InternalServerError):
+            self.client._execute_with_retry(call)
+        self.assertEqual(len(call.keys), 3)
+
+    def test_fatal_errors_are_not_retried(self):
+        call = FakeCall(google_exceptions.InvalidArgument("bad prompt"), "ok")
+        with self.assertRaises(google_exceptions.InvalidArgument):
+            self.client._execute_with_retry(call)
+        self.assertEqual(len(call.keys), 1)
+        self.assertEqual(self.sleeps, [])
+
+    def test_quota_switches_key_without_waiting(self):
+        call = FakeCall(google_exceptions.ResourceExhausted("quota"), "ok")
+        self.assertEqual(self.client._execute_with_retry(call), "ok")
+        self.assertEqual(call.keys, [0, 1])
+        self.assertEqual(self.sleeps, [])
+
+    def test_retry_after_is_honoured_when_no_key_is_left(self):
+        quota = google_exceptions.TooManyRequests("quota", response=FakeResponse({"retry-after": "2"}))
+        call = FakeCall(quota, quota, "ok")
+        self.assertEqual(self.client._execute_with_retry(call), "ok")
+        self.assertEqual(call.keys, [0, 1, 1])
+        self.assertEqual(self.sleeps, [2.0])
+
+    def test_retry_after_beyond_budget_gives_up(self):
+        quota = google_exceptions.TooManyRequests("quota", response=FakeResponse({"retry-after": "60"}))
+        call = FakeCall(quota, quota, "ok")
+        with self.assertRaises(google_exceptions.TooManyRequests):
+            self.client._execute_with_retry(call)
+        self.assertEqual(call.keys, [0, 1])
+        self.assertEqual(self.sleeps, [])
+        # The server's delay becomes the key's cooldown
+        self.assertGreater(self.client.key_manager.states[0].exhausted_until, 0)
+        self.assertEqual(self.client.key_manager.usable_indices(), [])
+
+
+class TestAsyncRetries(unittest.TestCase):
+    def test_call_async(self):
+        outcomes = [google_exceptions.ServiceUnavailable("down"), "ok"]
+
+        async def flaky():
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        policy = RetryPolicy(base_delay=0.01, max_delay=0.01)
+        self.assertEqual(asyncio.run(policy.call_async(flaky)), "ok")
+        self.assertEqual(outcomes, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
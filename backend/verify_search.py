@@ -0,0 +1,51 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+# Add parent directory to path to import backend
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend import database
+from backend import migrations
+
+REPO_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'database.db')
+
+
+class TestSearchContent(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.original_path = database.DB_PATH
+        database.DB_PATH = os.path.join(self.tmp_dir, "test.db")
+        shutil.copy(REPO_DB, database.DB_PATH)
+        database.close_all_connections()
+        with database.get_db_connection() as conn:
+            migrations.run_migrations(conn)
+
+        # A word that appears nowhere else, so only these rows match
+        for i in range(3):
+            database.add_news(f"zeytinkarası haber {i}", "özet", "zeytinkarası " * (i + 1), 1)
+        database.add_tip("zeytinkarası ipucu", "zeytinkarası bakımı")
+
+    def tearDown(self):
+        database.close_all_connections()
+        database.DB_PATH = self.original_path
+        shutil.rmtree(self.tmp_dir)
+
+    def test_tables_are_interleaved_by_rank(self):
+        results = database.search_content("zeytinkarası", limit=10)
+        self.assertEqual([r["type"] for r in results], ["news", "tip", "news", "news"])
+        self.assertEqual([r["rank"] for r in results], [1, 1, 2, 3])
+        # Within a table the BM25 order is kept
+        news_scores = [r["score"] for r in results if r["type"] == "news"]
+        self.assertEqual(news_scores, sorted(news_scores, reverse=True))
+
+    def test_limit_and_kind(self):
+        self.assertEqual(len(database.search_content("zeytinkarası", limit=2)), 2)
+        self.assertEqual({r["type"] for r in database.search_content("zeytinkarası", kind="tips")}, {"tip"})
+        self.assertEqual(database.search_content("   "), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import shutil
+import tempfile
+
+# Add parent directory to path to import backend
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi.testclient import TestClient
+
+from backend import tracing
+from backend.tracing import SamplingProfiler, TracingMiddleware
+
+
+async def app(scope, receive, send):
+    # Long enough for several samples at a 1 ms interval
+    await asyncio.sleep(0.02)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+class TestSamplingProfiler(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.profiler = SamplingProfiler(directory=self.tmp_dir, interval_ms=1)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def call(self, middleware, path="/api/chat"):
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b""}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {"type": "http", "method": "POST", "path": path, "headers": []}
+        asyncio.run(middleware(scope, receive, send))
+        return dict(messages[0]["headers"])
+
+    def test_armed_request_writes_a_profile(self):
+        self.profiler.arm(1, "/api/chat")
+        headers = self.call(TracingMiddleware(app, self.profiler))
+        self.assertIn(b"server-timing", headers)
+
+        status = self.profiler.status()
+        self.assertEqual((status["remaining"], status["active"]), (0, False))
+        self.assertEqual(len(status["files"]), 1)
+        self.assertEqual(os.listdir(self.tmp_dir), status["files"])
+        self.assertRegex(status["files"][0], r"-post-api_chat-\d+ms\.folded$")
+        with open(os.path.join(self.tmp_dir, status["files"][0]), encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertTrue(lines)
+        for line in lines:
+            stack, count = line.rsplit(" ", 1)
+            self.assertTrue(stack)
+            self.assertGreater(int(count), 0)
+
+        # Not armed any more, and other paths were never selected
+        self.call(TracingMiddleware(app, self.profiler))
+        self.assertEqual(len(os.listdir(self.tmp_dir)), 1)
+
+    def test_other_paths_are_not_profiled(self):
+        self.profiler.arm(1, "/api/chat")
+        self.call(TracingMiddleware(app, self.profiler), path="/api/news")
+        self.assertEqual(os.listdir(self.tmp_dir), [])
+        self.assertEqual(self.profiler.status()["remaining"], 1)
+
+    def test_join_and_write_run_off_the_event_loop(self):
+        threads = []
+        write = self.profiler._write
+
+        def recording_write(*args):
+            threads.append(threading.current_thread())
+            return write(*args)
+
+        async def test():
+            self.assertTrue(self.profiler.arm(1) and self.profiler.claim("/api/chat"))
+            async with self.profiler.profile("GET", "/api/chat"):
+                await asyncio.sleep(0.01)
+
+        with patch.object(self.profiler, "_write", side_effect=recording_write):
+            asyncio.run(test())
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.main_thread())
+        self.assertFalse(self.profiler.status()["active"])
+
+    def test_write_error_releases_the_profiler(self):
+        async def test():
+            self.profiler.arm(2)
+            self.profiler.claim("/api/chat")
+            async with self.profiler.profile("GET", "/api/chat"):
+                pass
+
+        with patch.object(self.profiler, "_write", side_effect=OSError("read-only file system")):
+            asyncio.run(test())
+        self.assertFalse(self.profiler.status()["active"])
+        self.assertTrue(self.profiler.claim("/api/chat"))
+
+
+class TestProfileEndpoint(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        from backend import main
+        cls.main = main
+        # No lifespan: the endpoints under test do not need the RAG index or the database
+        cls.client = TestClient(main.app)
+
+    def setUp(self):
+        patcher = patch.object(self.main, "ADMIN_TOKEN", "s3cret")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(tracing.profiler.arm, 0)
+
+    def test_non_admin_callers_are_rejected(self):
+        for headers in ({}, {"X-Admin-Token": "wrong"}):
+            self.assertEqual(self.client.post("/api/admin/profile?requests=3", headers=headers).status_code, 403)
+            self.assertEqual(self.client.get("/api/admin/profile", headers=headers).status_code, 403)
+        self.assertEqual(tracing.profiler.status()["remaining"], 0)
+
+    def test_unset_admin_token_rejects_everyone(self):
+        with patch.object(self.main, "ADMIN_TOKEN", None):
+            response = self.client.post("/api/admin/profile", headers={"X-Admin-Token": ""})
+        self.assertEqual(response.status_code, 403)
+
+    def test_admin_arms_the_profiler(self):
+        response = self.client.post("/api/admin/profile?requests=2&path=/api/tips",
+                                    headers={"X-Admin-Token": "s3cret"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"]["remaining"], 2)
+        self.assertEqual(response.json()["data"]["path_prefix"], "/api/tips")
+
+
+if __name__ == '__main__':
+    unittest.main()
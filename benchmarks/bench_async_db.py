@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Load test: news reads while writes wait on a held SQLite write lock.
+
+Mounts two variants of the same endpoints on a throwaway FastAPI app:
+  /sync/...   calls backend/database.py directly inside async handlers (old behaviour)
+  /async/...  awaits backend/async_database.py (thread-pool offloaded)
+
+A background thread repeatedly holds the write lock for --lock-ms, so every
+write request has to wait. With the sync variant that wait happens on the
+event loop and concurrent reads queue behind it; with the async variant reads
+keep flowing.
+
+Usage: python benchmarks/bench_async_db.py [--readers 20] [--seconds 3] [--lock-ms 200]
+"""
+
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import asyncio
+import argparse
+import tempfile
+import threading
+import statistics
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+
+from backend import database, async_database, init_db
+
+app = FastAPI()
+
+
+@app.get("/sync/news")
+async def sync_news():
+    return {"data": database.get_all_news(limit=20)}
+
+
+@app.post("/sync/news")
+async def sync_add_news():
+    return {"id": database.add_news("yük testi", "özet", "içerik", 1)}
+
+
+@app.get("/async/news")
+async def async_news():
+    return {"data": await async_database.get_all_news(limit=20)}
+
+
+@app.post("/async/news")
+async def async_add_news():
+    return {"id": await async_database.add_news("yük testi", "özet", "içerik", 1)}
+
+
+def hold_write_lock(path: str, hold_seconds: float, stop: threading.Event):
+    """Simulate a slow writer in another process holding the write lock"""
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    while not stop.is_set():
+        conn.execute("BEGIN IMMEDIATE")
+        time.sleep(hold_seconds)
+        conn.execute("COMMIT")
+        time.sleep(0.01)
+    conn.close()
+
+
+async def drive(client: httpx.AsyncClient, prefix: str, readers: int, seconds: float):
+    latencies = []
+    deadline = time.perf_counter() + seconds
+
+    async def reader():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await client.get(f"{prefix}/news")
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    async def writer():
+        while time.perf_counter() < deadline:
+            await client.post(f"{prefix}/news")
+            await asyncio.sleep(0.05)
+
+    await asyncio.gather(writer(), *(reader() for _ in range(readers)))
+    latencies.sort()
+    if not latencies:
+        return {"reads": 0, "rps": 0.0, "p50": float("nan"), "p99": float("nan")}
+    return {
+        "reads": len(latencies),
+        "rps": len(latencies) / seconds,
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000,
+    }
+
+
+def start_server(port: int) -> uvicorn.Server:
+    """Serve the benchmark app on its own event loop in a background thread"""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.readers + 1)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", limits=limits) as client:
+        results = {}
+        for prefix in ("/sync", "/async"):
+            stop = threading.Event()
+            holder = threading.Thread(
+                target=hold_write_lock, args=(database.DB_PATH, args.lock_ms / 1000, stop)
+            )
+            holder.start()
+            try:
+                results[prefix] = await drive(client, prefix, args.readers, args.seconds)
+            finally:
+                stop.set()
+                holder.join()
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--lock-ms", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="filizlen_bench_")
+    try:
+        path = os.path.join(tmp_dir, "bench.db")
+        init_db.DB_PATH = path
+        init_db.init_database()
+        database.DB_PATH = path
+
+        server = start_server(args.port)
+        results = asyncio.run(run(args))
+        server.should_exit = True
+        database.close_all_connections()
+
+        print("=" * 60)
+        print(f"News reads under write-lock contention ({args.readers} readers, "
+              f"lock held {args.lock_ms}ms, {args.seconds}s)")
+        print("=" * 60)
+        for prefix, label in (("/sync", "Sync handlers"), ("/async", "Async data layer")):
+            r = results[prefix]
+            print(f"  {label:17s} {r['rps']:8.1f} reads/s   p50 {r['p50']:7.1f}ms   p99 {r['p99']:7.1f}ms")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
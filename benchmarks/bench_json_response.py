@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+JSON response benchmark for a 1,000-news list.
+
+Compares, for the same rows returned by get_news_page(limit=1000):
+  - FastAPI's default path (jsonable_encoder + json.dumps), as the list
+    endpoints did before
+  - json_codec.dumps (orjson when installed) straight from the row dicts
+and reports the wire size uncompressed, gzip and brotli, plus the time
+each compression takes.
+
+Usage: python benchmarks/bench_json_response.py [--news 1000] [--rounds 20]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi.encoders import jsonable_encoder
+
+from backend import database, init_db, compression, json_codec
+
+
+def build_database(path: str, news_count: int):
+    init_db.DB_PATH = path
+    init_db.init_database()
+    database.DB_PATH = path
+    with database.get_db_connection() as conn:
+        conn.executemany(
+            "INSERT INTO news (title, summary, content, category_id, published_at) VALUES (?, ?, ?, ?, ?)",
+            [
+                (f"Haber {i}: Buğday hasadında verim artışı", "Çiftçiler için özet bilgi. " * 6,
+                 "Tarım sektöründe sulama, gübreleme ve hasat planlaması üzerine içerik. " * 40,
+                 i % 4 + 1, f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d} 10:00:00")
+                for i in range(news_count)
+            ]
+        )
+
+
+def timed(fn, rounds: int):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = fn()
+    return (time.perf_counter() - start) / rounds * 1000, result
+
+
+def default_render(payload):
+    """What FastAPI does for a returned dict without a response_model"""
+    return json.dumps(
+        jsonable_encoder(payload), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--news", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="filizlen_bench_")
+    try:
+        build_database(os.path.join(tmp_dir, "bench.db"), args.news)
+        page = database.get_news_page(limit=args.news)
+        payload = {"status": "success", "data": page["items"], "count": len(page["items"]),
+                   "next_cursor": page["next_cursor"]}
+
+        default_ms, default_body = timed(lambda: default_render(payload), args.rounds)
+        fast_ms, fast_body = timed(lambda: json_codec.dumps(payload), args.rounds)
+
+        encoder = "orjson" if json_codec.orjson is not None else "json (orjson not installed)"
+        print("=" * 60)
+        print(f"Serializing {len(page['items'])} news ({args.rounds} rounds)")
+        print("=" * 60)
+        print(f"  jsonable_encoder + json.dumps: {default_ms:8.2f} ms  ({len(default_body):,} bytes)")
+        print(f"  json_codec.dumps [{encoder}]: {fast_ms:8.2f} ms  ({len(fast_body):,} bytes)")
+        if fast_ms:
+            print(f"  Speedup: {default_ms / fast_ms:.1f}x")
+
+        print()
+        print("Wire size")
+        print(f"  identity: {len(fast_body):>12,} bytes")
+        encodings = ["gzip"] + (["br"] if compression.brotli is not None else [])
+        for encoding in encodings:
+            ms, body = timed(lambda: compression.compress(fast_body, encoding), max(args.rounds // 4, 1))
+            print(f"  {encoding:8}: {len(body):>12,} bytes  "
+                  f"({len(body) / len(fast_body):.1%}, {ms:.2f} ms to compress, done once per cache entry)")
+        if compression.brotli is None:
+            print("  br      : skipped (brotli not installed)")
+    finally:
+        database.close_all_connections()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
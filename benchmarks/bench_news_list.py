@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+News list throughput benchmark: connection-per-call vs pooled WAL connections.
+
+Builds a throwaway copy of the schema with synthetic news, then runs
+get_all_news(limit=20) from several reader threads while one thread keeps
+inserting, first with the old connect-per-call pattern and then with the
+pooled connections in backend/database.py.
+
+Usage: python benchmarks/bench_news_list.py [--news 2000] [--threads 4] [--seconds 3]
+"""
+
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import argparse
+import tempfile
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend import database, init_db
+
+NEWS_QUERY = """
+    SELECT n.*, nc.name as category_name
+    FROM news n
+    LEFT JOIN news_categories nc ON n.category_id = nc.id
+    ORDER BY n.published_at DESC LIMIT ?
+"""
+
+
+def build_database(path: str, news_count: int, journal_mode: str):
+    init_db.DB_PATH = path
+    init_db.init_database()
+    conn = sqlite3.connect(path)
+    conn.execute(f"PRAGMA journal_mode = {journal_mode}")
+    conn.executemany(
+        "INSERT INTO news (title, summary, content, category_id, published_at) VALUES (?, ?, ?, ?, ?)",
+        [
+            (f"Haber {i}", "Özet " * 20, "İçerik " * 400, i % 4 + 1,
+             f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d} 10:00:00")
+            for i in range(news_count)
+        ]
+    )
+    conn.commit()
+    conn.close()
+
+
+def baseline_get_all_news(path: str, limit: int):
+    """The original pattern: a brand new connection per call, rollback journal"""
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    try:
+        rows = [dict(row) for row in conn.execute(NEWS_QUERY, (limit,)).fetchall()]
+        conn.commit()
+        return rows
+    finally:
+        conn.close()
+
+
+def baseline_add_news(path: str):
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute(
+            "INSERT INTO news (title, summary, content, category_id) VALUES ('w', 's', 'c', 1)"
+        )
+        conn.commit()
+    except sqlite3.OperationalError:
+        pass
+    finally:
+        conn.close()
+
+
+def run(read_fn, write_fn, threads: int, seconds: float):
+    stop = threading.Event()
+    counts = [0] * threads
+    errors = [0]
+
+    def reader(index):
+        while not stop.is_set():
+            try:
+                read_fn()
+                counts[index] += 1
+            except sqlite3.OperationalError:
+                errors[0] += 1
+
+    def writer():
+        while not stop.is_set():
+            write_fn()
+            time.sleep(0.005)
+
+    workers = [threading.Thread(target=reader, args=(i,)) for i in range(threads)]
+    workers.append(threading.Thread(target=writer))
+    for worker in workers:
+        worker.start()
+    time.sleep(seconds)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    return sum(counts) / seconds, errors[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--news", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="filizlen_bench_")
+    try:
+        # Baseline: rollback journal, connection per call
+        baseline_path = os.path.join(tmp_dir, "baseline.db")
+        build_database(baseline_path, args.news, "DELETE")
+        before, before_errors = run(
+            lambda: baseline_get_all_news(baseline_path, args.limit),
+            lambda: baseline_add_news(baseline_path),
+            args.threads, args.seconds
+        )
+
+        # Pooled: WAL, thread-local readers, single writer
+        pooled_path = os.path.join(tmp_dir, "pooled.db")
+        build_database(pooled_path, args.news, "WAL")
+        database.DB_PATH = pooled_path
+        after, after_errors = run(
+            lambda: database.get_all_news(limit=args.limit),
+            lambda: database.add_news("w", "s", "c", 1),
+            args.threads, args.seconds
+        )
+        database.close_all_connections()
+
+        print("=" * 60)
+        print(f"News list throughput ({args.news} news, limit={args.limit}, "
+              f"{args.threads} readers + 1 writer, {args.seconds}s)")
+        print("=" * 60)
+        print(f"  Before (connect per call): {before:10.1f} req/s  ({before_errors} lock errors)")
+        print(f"  After  (pooled + WAL):     {after:10.1f} req/s  ({after_errors} lock errors)")
+        if before:
+            print(f"  Speedup: {after / before:.2f}x")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
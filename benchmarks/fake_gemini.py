@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Gemini REST API (generateContent, embedContent,
+batchEmbedContents, countTokens), for load tests that must not spend quota.
+
+Point the backend at it with
+    GEMINI_API_ENDPOINT=http://127.0.0.1:8089
+
+Each call sleeps for a latency drawn from the chosen profile, then may fail
+with 500 (--error-rate) or with 429 RESOURCE_EXHAUSTED once its API key has
+used up --quota requests in the current window, so key rotation and model
+fallback are exercised the same way real quota errors would.
+Embeddings are deterministic per text, so RAG retrieval stays stable.
+
+Usage: python benchmarks/fake_gemini.py [--port 8089] [--profile realistic]
+       [--latency-ms 900] [--error-rate 0.01] [--quota 60/60]
+
+GET /stats returns request counts per operation, key and status.
+"""
+
+import time
+import zlib
+import random
+import asyncio
+import argparse
+from collections import Counter
+from typing import Dict, Optional
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+EMBEDDING_DIM = 768
+
+# latency_ms / jitter_ms apply to generate; embed_ms to embeddings and token counts
+PROFILES = {
+    "fast": {"latency_ms": 20, "jitter_ms": 10, "embed_ms": 5, "error_rate": 0.0, "quota": None},
+    "realistic": {"latency_ms": 1200, "jitter_ms": 600, "embed_ms": 80, "error_rate": 0.005, "quota": None},
+    "flaky": {"latency_ms": 1200, "jitter_ms": 900, "embed_ms": 120, "error_rate": 0.05, "quota": None},
+    # Free-tier-like: 15 generate/embed calls per key per minute
+    "quota": {"latency_ms": 900, "jitter_ms": 300, "embed_ms": 80, "error_rate": 0.0, "quota": "15/60"},
+}
+
+
+class FakeGemini:
+    def __init__(self, latency_ms: float, jitter_ms: float, embed_ms: float, error_rate: float,
+                 quota: Optional[str] = None, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.embed_ms = embed_ms
+        self.error_rate = error_rate
+        self.quota_limit, self.quota_window = self._parse_quota(quota)
+        self.random = random.Random(seed)
+        # api key -> [window index, requests in window]
+        self.usage: Dict[str, list] = {}
+        self.counts: Counter = Counter()
+
+    @staticmethod
+    def _parse_quota(quota: Optional[str]):
+        if not quota:
+            return None, None
+        count, seconds = quota.split("/", 1)
+        return int(count), float(seconds)
+
+    def _over_quota(self, key: str) -> bool:
+        if self.quota_limit is None:
+            return False
+        index = int(time.monotonic() // self.quota_window)
+        usage = self.usage.setdefault(key, [index, 0])
+        if usage[0] != index:
+            usage[0], usage[1] = index, 0
+        usage[1] += 1
+        return usage[1] > self.quota_limit
+
+    async def call(self, operation: str, key: str, latency_ms: float):
+        """Sleep, then return an error response or None"""
+        if latency_ms > 0:
+            await asyncio.sleep(latency_ms / 1000)
+        if self._over_quota(key):
+            self.counts[(operation, key, 429)] += 1
+            return _error(429, "RESOURCE_EXHAUSTED", "Resource has been exhausted (e.g. check quota).")
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.counts[(operation, key, 500)] += 1
+            return _error(500, "INTERNAL", "An internal error has occurred.")
+        self.counts[(operation, key, 200)] += 1
+        return None
+
+    def generate_latency(self) -> float:
+        return max(0.0, self.random.gauss(self.latency_ms, self.jitter_ms / 2))
+
+
+def _error(code: int, status: str, message: str) -> JSONResponse:
+    return JSONResponse(status_code=code, content={"error": {"code": code, "message": message, "status": status}})
+
+
+def _text(content: Dict) -> str:
+    return " ".join(part.get("text", "") for part in (content or {}).get("parts", []))
+
+
+def embed(text: str):
+    """Deterministic unit vector per text"""
+    rng = np.random.default_rng(zlib.crc32(text.encode("utf-8")))
+    vector = rng.standard_normal(EMBEDDING_DIM)
+    return (vector / np.linalg.norm(vector)).round(6).tolist()
+
+
+def create_app(fake: FakeGemini) -> FastAPI:
+    app = FastAPI(title="Fake Gemini API")
+
+    def api_key(request: Request) -> str:
+        return request.headers.get("x-goog-api-key") or request.query_params.get("key") or "none"
+
+    @app.post("/{version}/models/{target}")
+    async def models(version: str, target: str, request: Request):
+        model, _, method = target.partition(":")
+        body = await request.json()
+        key = api_key(request)
+
+        if method == "generateContent":
+            error = await fake.call("generate", key, fake.generate_latency())
+            if error:
+                return error
+            prompt = " ".join(_text(content) for content in body.get("contents", []))
+            text = (f"[{model}] Sahte yanıt: sorunuz {len(prompt)} karakter uzunluğunda. "
+                    "Toprağınızı düzenli sulayın, gübrelemeyi toprak analizine göre planlayın.")
+            return {
+                "candidates": [{"content": {"parts": [{"text": text}], "role": "model"},
+                                "finishReason": "STOP", "index": 0}],
+                "usageMetadata": {"promptTokenCount": len(prompt) // 4, "candidatesTokenCount": len(text) // 4,
+                                  "totalTokenCount": (len(prompt) + len(text)) // 4},
+            }
+
+        if method == "embedContent":
+            error = await fake.call("embed", key, fake.embed_ms)
+            if error:
+                return error
+            return {"embedding": {"values": embed(_text(body.get("content")))}}
+
+        if method == "batchEmbedContents":
+            error = await fake.call("embed", key, fake.embed_ms)
+            if error:
+                return error
+            return {"embeddings": [{"values": embed(_text(item.get("content")))} for item in body.get("requests", [])]}
+
+        if method == "countTokens":
+            error = await fake.call("count_tokens", key, fake.embed_ms)
+            if error:
+                return error
+            text = " ".join(_text(content) for content in body.get("contents", []))
+            return {"totalTokens": max(1, len(text) // 4)}
+
+        return _error(404, "NOT_FOUND", f"Method {method} is not supported by the fake server.")
+
+    @app.get("/stats")
+    async def stats():
+        return [{"operation": op, "key": key[-6:], "status": status, "count": count}
+                for (op, key, status), count in sorted(fake.counts.items())]
+
+    return app
+
+
+def build_fake(args) -> FakeGemini:
+    profile = dict(PROFILES[args.profile])
+    for name in ("latency_ms", "jitter_ms", "embed_ms", "error_rate", "quota"):
+        value = getattr(args, name)
+        if value is not None:
+            profile[name] = value
+    return FakeGemini(seed=args.seed, **profile)
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="realistic")
+    parser.add_argument("--latency-ms", type=float, help="mean generate latency (overrides profile)")
+    parser.add_argument("--jitter-ms", type=float, help="generate latency spread (overrides profile)")
+    parser.add_argument("--embed-ms", type=float, help="embed/countTokens latency (overrides profile)")
+    parser.add_argument("--error-rate", type=float, help="fraction of calls answered with 500 (overrides profile)")
+    parser.add_argument("--quota", help="COUNT/SECONDS per API key before 429 RESOURCE_EXHAUSTED (overrides profile)")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    fake = build_fake(args)
+    print(f"Fake Gemini on http://{args.host}:{args.port} ({args.profile}: {fake.latency_ms:.0f}±{fake.jitter_ms:.0f} ms, "
+          f"errors {fake.error_rate:.1%}, quota {args.quota or PROFILES[args.profile]['quota'] or 'none'})",
+          flush=True)
+    uvicorn.run(create_app(fake), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
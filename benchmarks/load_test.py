@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Offline load test: the real backend against a local fake Gemini server.
+
+Starts benchmarks/fake_gemini.py and the backend (on a copy of database.db
+and the RAG cache, so nothing real is touched) as subprocesses, then sends a
+mix of chat, news and tips requests at a target rate. Arrivals are open-loop
+(Poisson), so a slow backend shows up as latency and errors instead of
+quietly lowering the offered load. Every virtual user sends its own
+X-Forwarded-For address, like the Streamlit frontend does for each browser.
+
+Reports throughput, p50/p95/p99/max latency and error rates per request
+kind, plus what the fake Gemini server saw. Exits with status 1 when
+--max-error-rate or --max-p95-ms is exceeded, so it can gate a deploy.
+
+Usage:
+    python benchmarks/load_test.py --rps 10 --duration 60 --profile realistic
+    python benchmarks/load_test.py --mix chat=0.5,news=0.3,tips=0.2 --profile quota
+    python benchmarks/load_test.py --backend-url http://vps:8000 --rps 2   # no fake, existing backend
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+
+from benchmarks.fake_gemini import PROFILES, add_profile_arguments
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+CHAT_MESSAGES = [
+    "Domatesleri ne sıklıkla sulamalıyım?",
+    "Buğday ekimi için en uygun zaman hangisi?",
+    "Zeytin ağaçlarında yaprak sararması neden olur?",
+    "Organik gübre nasıl hazırlanır?",
+    "Damla sulama sistemi kurmak için nelere dikkat etmeliyim?",
+    "Seralarda nem oranı kaç olmalı?",
+    "Patates böceğiyle nasıl mücadele ederim?",
+    "Toprak analizi ne zaman yapılmalı?",
+]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(url: str, process: subprocess.Popen, timeout: float = 120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url} exited with status {process.returncode} before it was ready")
+        try:
+            if httpx.get(url, timeout=1).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+def serve_backend(work_dir: str, port: int):
+    """Run the backend in this process against the copies in work_dir (used as a subprocess)"""
+    from backend import database, init_db
+    database.DB_PATH = init_db.DB_PATH = os.path.join(work_dir, "database.db")
+    from backend.rag_system import rag_system
+    rag_system.cache_file = os.path.join(work_dir, "rag_cache.pkl")
+
+    import uvicorn
+    from backend import main
+    uvicorn.run(main.app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def start_stack(args, work_dir: str) -> Tuple[str, str, List[subprocess.Popen]]:
+    """Start the fake Gemini server and the backend; returns both URLs and the processes"""
+    shutil.copy(os.path.join(ROOT, "database.db"), os.path.join(work_dir, "database.db"))
+    rag_cache = os.path.join(ROOT, "backend", "rag_cache.pkl")
+    if os.path.exists(rag_cache) and not args.rebuild_index:
+        shutil.copy(rag_cache, os.path.join(work_dir, "rag_cache.pkl"))
+
+    fake_port, backend_port = free_port(), free_port()
+    fake_cmd = [sys.executable, os.path.join(ROOT, "benchmarks", "fake_gemini.py"),
+                "--port", str(fake_port), "--profile", args.profile, "--seed", str(args.seed)]
+    for name in ("latency_ms", "jitter_ms", "embed_ms", "error_rate", "quota"):
+        value = getattr(args, name)
+        if value is not None:
+            fake_cmd += [f"--{name.replace('_', '-')}", str(value)]
+
+    env = dict(os.environ)
+    env.update({
+        "GEMINI_API_ENDPOINT": f"http://127.0.0.1:{fake_port}",
+        "PROMPT_TOKEN_CALIBRATION": "0",
+    })
+    # Several fake keys so rotation is exercised by the quota profile
+    for i in range(1, args.keys + 1):
+        env["GEMINI_API_KEY" if i == 1 else f"GEMINI_API_KEY_{i}"] = f"fake-key-{i}"
+    env.pop(f"GEMINI_API_KEY_{args.keys + 1}", None)
+
+    log = open(os.path.join(work_dir, "stack.log"), "w")
+    processes = [subprocess.Popen(fake_cmd, stdout=log, stderr=subprocess.STDOUT)]
+    wait_until_up(f"http://127.0.0.1:{fake_port}/stats", processes[0])
+    processes.append(subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--serve-backend", work_dir, "--port", str(backend_port)],
+        cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT
+    ))
+    backend_url = f"http://127.0.0.1:{backend_port}"
+    wait_until_up(f"{backend_url}/health/ready", processes[1])
+    return backend_url, f"http://127.0.0.1:{fake_port}", processes
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for item in spec.split(","):
+        kind, weight = item.split("=", 1)
+        if kind not in ("chat", "news", "tips"):
+            raise ValueError(f"unknown request kind '{kind}' (chat, news, tips)")
+        mix[kind] = float(weight)
+    return mix
+
+
+class LoadGenerator:
+    def __init__(self, client: httpx.AsyncClient, mix: Dict[str, float], users: int, seed: int):
+        self.client = client
+        self.kinds = list(mix)
+        self.weights = [mix[kind] for kind in self.kinds]
+        self.random = random.Random(seed)
+        # One address per virtual user, from the 198.18.0.0/15 benchmarking range
+        self.users = [f"198.18.{i // 256}.{i % 256}" for i in range(users)]
+        self.news_ids: List[int] = []
+        self.tip_ids: List[int] = []
+        # kind -> list of (latency seconds, outcome)
+        self.results: Dict[str, List] = defaultdict(list)
+
+    async def prime(self):
+        """Collect existing ids for detail requests"""
+        news = (await self.client.get("/api/news", params={"limit": 100, "fields": "id"})).json()
+        tips = (await self.client.get("/api/tips", params={"limit": 100, "fields": "id"})).json()
+        self.news_ids = [item["id"] for item in news.get("data", [])]
+        self.tip_ids = [item["id"] for item in tips.get("data", [])]
+
+    def _request(self, kind: str, user: str):
+        if kind == "chat":
+            conversation = f"{user}-conv" if self.random.random() < 0.7 else None
+            return "POST", "/api/chat", {
+                "json": {"message": self.random.choice(CHAT_MESSAGES), "conversation_id": conversation},
+            }
+        ids = self.news_ids if kind == "news" else self.tip_ids
+        if ids and self.random.random() < 0.4:
+            return "GET", f"/api/{kind}/{self.random.choice(ids)}", {}
+        params = {"limit": 10}
+        if kind == "news" and self.random.random() < 0.5:
+            params["fields"] = "id,title,summary,excerpt,published_at,category_name"
+        return "GET", f"/api/{kind}", {"params": params}
+
+    async def one(self, kind: str):
+        user = self.random.choice(self.users)
+        method, path, options = self._request(kind, user)
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, headers={"X-Forwarded-For": user}, **options)
+            outcome = str(response.status_code)
+            # /api/chat reports Gemini failures as 200 with status=error
+            if kind == "chat" and response.status_code == 200 and response.json().get("status") != "success":
+                outcome = "chat_error"
+        except httpx.TimeoutException:
+            outcome = "timeout"
+        except httpx.HTTPError as e:
+            outcome = type(e).__name__
+        self.results[kind].append((time.perf_counter() - start, outcome))
+
+    async def run(self, rps: float, duration: float):
+        tasks = []
+        start = time.perf_counter()
+        next_at = start
+        while next_at - start < duration:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            kind = self.random.choices(self.kinds, self.weights)[0]
+            tasks.append(asyncio.create_task(self.one(kind)))
+            next_at += self.random.expovariate(rps)
+        sending = time.perf_counter() - start
+        await asyncio.gather(*tasks)
+        return len(tasks), sending, time.perf_counter() - start
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    index = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(results: Dict[str, List], elapsed: float) -> Dict[str, Dict]:
+    summary = {}
+    everything = [item for kind in results for item in results[kind]]
+    for kind, items in list(results.items()) + [("all", everything)]:
+        latencies = sorted(latency for latency, _ in items)
+        outcomes = Counter(outcome for _, outcome in items)
+        errors = sum(count for outcome, count in outcomes.items() if not outcome.startswith(("2", "3")))
+        summary[kind] = {
+            "requests": len(items),
+            "throughput": len(items) / elapsed if elapsed else 0.0,
+            "p50": percentile(latencies, 0.50) * 1000,
+            "p95": percentile(latencies, 0.95) * 1000,
+            "p99": percentile(latencies, 0.99) * 1000,
+            "max": (latencies[-1] * 1000) if latencies else float("nan"),
+            "error_rate": errors / len(items) if items else 0.0,
+            "outcomes": dict(outcomes),
+        }
+    return summary
+
+
+def print_report(args, summary: Dict[str, Dict], sent: int, sending: float, elapsed: float,
+                 fake_stats: Optional[List]):
+    print("=" * 78)
+    print(f"Load test: {args.rps} req/s target, {sent} sent in {sending:.1f}s "
+          f"({sent / sending:.1f} req/s offered, last response after {elapsed:.1f}s), mix {args.mix}")
+    if fake_stats is not None:
+        profile = dict(PROFILES[args.profile])
+        profile.update({name: getattr(args, name) for name in profile if getattr(args, name) is not None})
+        print(f"Fake Gemini profile: {args.profile} {profile}")
+    print("=" * 78)
+    print(f"  {'kind':6s} {'reqs':>6s} {'req/s':>7s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s} "
+          f"{'max ms':>9s} {'errors':>7s}")
+    for kind, s in summary.items():
+        print(f"  {kind:6s} {s['requests']:6d} {s['throughput']:7.2f} {s['p50']:9.1f} {s['p95']:9.1f} "
+              f"{s['p99']:9.1f} {s['max']:9.1f} {s['error_rate']:7.1%}")
+    print()
+    print("Outcomes")
+    for kind, s in summary.items():
+        if kind != "all":
+            print(f"  {kind:6s} " + ", ".join(f"{k}: {v}" for k, v in sorted(s["outcomes"].items())))
+    if fake_stats:
+        print()
+        print("Fake Gemini calls")
+        totals = Counter()
+        for row in fake_stats:
+            totals[(row["operation"], row["status"])] += row["count"]
+        for (operation, status), count in sorted(totals.items()):
+            print(f"  {operation:13s} {status}: {count}")
+
+
+async def drive(args, backend_url: str) -> Tuple[Dict, int, float, float]:
+    timeout = httpx.Timeout(args.timeout)
+    limits = httpx.Limits(max_connections=args.max_connections)
+    async with httpx.AsyncClient(base_url=backend_url, timeout=timeout, limits=limits) as client:
+        generator = LoadGenerator(client, parse_mix(args.mix), args.users, args.seed)
+        await generator.prime()
+        sent, sending, elapsed = await generator.run(args.rps, args.duration)
+        return summarize(generator.results, elapsed), sent, sending, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rps", type=float, default=5.0, help="target request rate")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of load")
+    parser.add_argument("--mix", default="chat=0.3,news=0.45,tips=0.25")
+    parser.add_argument("--users", type=int, default=50, help="virtual users (distinct client addresses)")
+    parser.add_argument("--keys", type=int, default=3, help="fake API keys given to the backend")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--max-connections", type=int, default=200)
+    parser.add_argument("--rebuild-index", action="store_true", help="embed all documents at startup instead of copying the RAG cache")
+    parser.add_argument("--backend-url", help="test an already running backend (no fake server is started)")
+    parser.add_argument("--max-error-rate", type=float, help="exit 1 if the overall error rate is higher")
+    parser.add_argument("--max-p95-ms", type=float, help="exit 1 if the overall p95 latency is higher")
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--serve-backend", metavar="WORK_DIR", help=argparse.SUPPRESS)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    if args.serve_backend:
+        serve_backend(args.serve_backend, args.port)
+        return
+
+    work_dir = tempfile.mkdtemp(prefix="filizlen_load_")
+    processes = []
+    fake_url = None
+    try:
+        if args.backend_url:
+            backend_url = args.backend_url.rstrip("/")
+        else:
+            print("Starting fake Gemini server and backend...", flush=True)
+            backend_url, fake_url, processes = start_stack(args, work_dir)
+
+        summary, sent, sending, elapsed = asyncio.run(drive(args, backend_url))
+        fake_stats = httpx.get(f"{fake_url}/stats").json() if fake_url else None
+        print_report(args, summary, sent, sending, elapsed, fake_stats)
+    except Exception:
+        log = os.path.join(work_dir, "stack.log")
+        if os.path.exists(log):
+            print(open(log).read()[-3000:], file=sys.stderr)
+        raise
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    overall = summary["all"]
+    failed = []
+    if args.max_error_rate is not None and overall["error_rate"] > args.max_error_rate:
+        failed.append(f"error rate {overall['error_rate']:.1%} > {args.max_error_rate:.1%}")
+    if args.max_p95_ms is not None and overall["p95"] > args.max_p95_ms:
+        failed.append(f"p95 {overall['p95']:.0f} ms > {args.max_p95_ms:.0f} ms")
+    if failed:
+        print("\nFAILED: " + "; ".join(failed))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ import streamlit as st
 import requests
 import os
 import datetime
+import uuid
 from typing import List, Dict
 
 # Configuration
@@ -15,6 +16,16 @@ BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
 if not BACKEND_URL.startswith("http"):
     BACKEND_URL = f"http://{BACKEND_URL}"
 
+# News cards only need these; full content is fetched on the detail page
+NEWS_CARD_FIELDS = "id,title,summary,excerpt,published_at,category_name"
+
+# Proxies in front of this server (nginx) whose X-Forwarded-For is trusted
+TRUSTED_PROXIES = {
+    address.strip()
+    for address in os.getenv("FRONTEND_TRUSTED_PROXIES", "127.0.0.1,::1").split(",")
+    if address.strip()
+}
+
 # --- Page configuration ---
 st.set_page_config(
     page_title="Filizlen App",
@@ -337,11 +348,45 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+# --- Client Address ---
+def _browser_request():
+    """The HTTP request that opened this session's websocket, or None outside a session"""
+    try:
+        from streamlit.runtime import get_instance
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        session_info = get_instance()._session_mgr.get_session_info(get_script_run_ctx().session_id)
+        return session_info.client.request
+    except Exception:
+        return None
+
+def client_address():
+    """
+    The end user's address, so every session from the same client shares one
+    rate limit bucket on the backend (a page reload does not reset it).
+    X-Forwarded-For is only read when the connection came from a trusted proxy.
+    """
+    request = _browser_request()
+    if request is None:
+        return None
+    peer = request.remote_ip
+    if peer in TRUSTED_PROXIES:
+        forwarded = [a.strip() for a in request.headers.get("X-Forwarded-For", "").split(",") if a.strip()]
+        # nginx appends the address it saw; anything left of it is client-supplied
+        for address in reversed(forwarded):
+            if address not in TRUSTED_PROXIES:
+                return address
+    return peer
+
 # --- State Management ---
 if "page" not in st.session_state:
     st.session_state.page = "landing"
 if "messages" not in st.session_state:
     st.session_state.messages = []
+if "conversation_id" not in st.session_state:
+    st.session_state.conversation_id = uuid.uuid4().hex
+# The browser's address for the backend rate limiter (all requests come from this server)
+if "client_address" not in st.session_state:
+    st.session_state.client_address = client_address()
 if "selected_news" not in st.session_state:
     st.session_state.selected_news = None
 
@@ -354,49 +399,102 @@ def check_backend_health():
     except:
         return False
 
-def send_chat_message(message: str, conversation_history: List[Dict]):
-    """Send chat message to backend API"""
+def send_chat_message(message: str, conversation_id: str):
+    """Send chat message to backend API (history is kept server-side)"""
     try:
         response = requests.post(
             f"{BACKEND_URL}/api/chat",
             json={
                 "message": message,
-                "conversation_history": conversation_history
+                "conversation_id": conversation_id
             },
+            headers={"X-Forwarded-For": st.session_state.client_address} if st.session_state.client_address else {},
             timeout=30
         )
+        if response.status_code in (429, 503):
+            # Rate limited or shedding load; the detail already tells the user to retry shortly
+            return {"status": "error", "detail": response.json().get("detail", "Sistem şu anda çok yoğun.")}
         response.raise_for_status()
         return response.json()
     except requests.exceptions.RequestException as e:
         return {"status": "error", "detail": str(e)}
 
-def fetch_news(limit: int = 10):
-    """Fetch news from backend API"""
+def cached_get(path: str, params: Dict = None):
+    """
+    GET a read endpoint, revalidating with the stored ETag.
+    On 304 the body from the previous rerun is reused instead of re-downloaded.
+    """
+    cache = st.session_state.setdefault("http_cache", {})
+    key = (path, tuple(sorted((params or {}).items())))
+    headers = {}
+    if key in cache:
+        headers["If-None-Match"] = cache[key]["etag"]
+    response = requests.get(f"{BACKEND_URL}{path}", params=params, headers=headers, timeout=10)
+    if response.status_code == 304 and key in cache:
+        return cache[key]["body"]
+    response.raise_for_status()
+    body = response.json()
+    if response.headers.get("ETag"):
+        cache[key] = {"etag": response.headers["ETag"], "body": body}
+    return body
+
+def fetch_news(limit: int = 10, cursor: str = None):
+    """Fetch a page of news cards (without full content) from backend API"""
     try:
-        response = requests.get(f"{BACKEND_URL}/api/news?limit={limit}", timeout=10)
-        response.raise_for_status()
-        return response.json()
+        params = {"limit": limit, "fields": NEWS_CARD_FIELDS}
+        if cursor:
+            params["cursor"] = cursor
+        return cached_get("/api/news", params)
     except requests.exceptions.RequestException as e:
         return {"status": "error", "detail": str(e)}
 
-def fetch_tips(limit: int = 10):
-    """Fetch tips from backend API"""
+def fetch_tips(limit: int = 10, cursor: str = None):
+    """Fetch a page of tips from backend API"""
     try:
-        response = requests.get(f"{BACKEND_URL}/api/tips?limit={limit}", timeout=10)
-        response.raise_for_status()
-        return response.json()
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        return cached_get("/api/tips", params)
     except requests.exceptions.RequestException as e:
         return {"status": "error", "detail": str(e)}
 
 def fetch_news_item(news_id: int):
     """Fetch single news item from backend API"""
     try:
-        response = requests.get(f"{BACKEND_URL}/api/news/{news_id}", timeout=10)
-        response.raise_for_status()
-        return response.json()
+        return cached_get(f"/api/news/{news_id}")
     except requests.exceptions.RequestException as e:
         return {"status": "error", "detail": str(e)}
 
+def with_extra_pages(kind: str, first_page: Dict) -> List[Dict]:
+    """
+    Append pages loaded with the "load more" button to the first page.
+    Extra pages live in session state under f"{kind}_extra" / f"{kind}_cursor".
+    """
+    extra = st.session_state.get(f"{kind}_extra", [])
+    if not extra:
+        st.session_state[f"{kind}_cursor"] = first_page.get("next_cursor")
+    return first_page.get("data", []) + extra
+
+def load_more_button(kind: str, fetch_fn, page_size: int = 20):
+    """Show a button that fetches the next page using the stored cursor"""
+    cursor = st.session_state.get(f"{kind}_cursor")
+    if not cursor:
+        return False
+    if st.button("Daha Fazla Yükle", key=f"{kind}_load_more"):
+        response = fetch_fn(limit=page_size, cursor=cursor)
+        if response.get("status") == "success":
+            st.session_state[f"{kind}_extra"] = st.session_state.get(f"{kind}_extra", []) + response.get("data", [])
+            st.session_state[f"{kind}_cursor"] = response.get("next_cursor")
+            st.rerun()
+        else:
+            st.error(f"Sonraki sayfa yüklenemedi: {response.get('detail', 'Bilinmeyen hata')}")
+    return True
+
+def reset_pagination():
+    for kind in ("news", "tips"):
+        st.session_state[f"{kind}_extra"] = []
+        st.session_state[f"{kind}_cursor"] = None
+
 def go_to_landing():
     st.query_params.clear()
     st.session_state.internal_nav = True
@@ -411,11 +509,13 @@ def go_to_news():
     st.query_params.clear()
     st.session_state.internal_nav = True
     st.session_state.page = "news"
+    reset_pagination()
 
 def go_to_tips():
     st.query_params.clear()
     st.session_state.internal_nav = True
     st.session_state.page = "tips"
+    reset_pagination()
 
 def back_to_news():
     """Navigate back to news list from detail"""
@@ -516,6 +616,7 @@ def chat_interface():
         st.divider()
         if st.button("🗑️ Clear Conversation"):
             st.session_state.messages = []
+            st.session_state.conversation_id = uuid.uuid4().hex
             st.rerun()
 
     # Display conversation history
@@ -530,20 +631,11 @@ def chat_interface():
         with st.chat_message("user"):
             st.markdown(prompt)
         
-        # Prepare conversation history for API
-        conversation_history = [
-            {
-                "user": msg["content"] if msg["role"] == "user" else "",
-                "assistant": msg["content"] if msg["role"] == "assistant" else ""
-            }
-            for msg in st.session_state.messages[:-1]
-        ]
-        
         # Show loading indicator
         with st.chat_message("assistant"):
             placeholder = st.empty()
             with st.spinner("Thinking..."):
-                response = send_chat_message(prompt, conversation_history)
+                response = send_chat_message(prompt, st.session_state.conversation_id)
 
             if response and response.get("status") == "success":
                 assistant_response = response.get("response", "No response received")
@@ -588,7 +680,7 @@ def news_interface():
         news_response = fetch_news(limit=20)
         
     if news_response.get("status") == "success":
-        news_items = news_response.get("data", [])
+        news_items = with_extra_pages("news", news_response)
         
         if not news_items:
             st.info("Henüz hiç haber bulunmuyor.")
@@ -607,10 +699,10 @@ def news_interface():
                 except:
                     display_date = item['published_at']
             
-            # Use 'summary' for the card content, fallback to truncated 'content'
+            # Use 'summary' for the card content, fallback to the start of the content
             content_preview = item.get('summary')
-            if not content_preview and item.get('content'):
-                content_preview = item['content'][:150] + "..." if len(item['content']) > 150 else item['content']
+            if not content_preview and item.get('excerpt'):
+                content_preview = item['excerpt'][:150] + "..." if len(item['excerpt']) > 150 else item['excerpt']
             
             
             # Navigation using HTML link to preserve style
@@ -628,7 +720,8 @@ def news_interface():
             </a>
             """, unsafe_allow_html=True)
             
-        st.info("Haberlerin sonu.")
+        if not load_more_button("news", fetch_news):
+            st.info("Haberlerin sonu.")
         
     else:
         error_msg = news_response.get('detail', 'Sunucuya bağlanılamadı.')
@@ -659,10 +752,11 @@ def news_detail_interface():
     # Get news item - either from session state or fetch using ID from query params
     item = st.session_state.selected_news
     
-    # If no item in session but we have ID in query params (direct link or refresh)
-    if not item and "news_id" in st.query_params:
+    # Fetch the full article if we only have the ID (direct link or refresh)
+    # or a list card, which is loaded without content
+    if (not item or "content" not in item) and (item or "news_id" in st.query_params):
         try:
-            news_id = int(st.query_params["news_id"])
+            news_id = int(item["id"]) if item else int(st.query_params["news_id"])
             with st.spinner("Haber yükleniyor..."):
                 response = fetch_news_item(news_id)
                 if response.get("status") == "success":
@@ -729,7 +823,7 @@ def tips_interface():
         tips_response = fetch_tips(limit=20)
         
     if tips_response.get("status") == "success":
-        tips_items = tips_response.get("data", [])
+        tips_items = with_extra_pages("tips", tips_response)
         
         if not tips_items:
             st.info("Henüz hiç ipucu bulunmuyor.")
@@ -757,7 +851,8 @@ def tips_interface():
             </div>
             """, unsafe_allow_html=True)
             
-        st.info("İpuçlarının sonu.")
+        if not load_more_button("tips", fetch_tips):
+            st.info("İpuçlarının sonu.")
         
     else:
         error_msg = tips_response.get('detail', 'Sunucuya bağlanılamadı.')